@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import re
+import time
 from datetime import datetime, timedelta, date
 
 from aiogram import Router, F
@@ -17,9 +19,11 @@ from database import (
 	get_users_paginated, get_user_by_telegram_id, get_reports_by_user,
 	block_user, unblock_user, check_user_blocked, update_user_name, get_user_reports_count,
 	update_user_group, get_telegram_group_by_id, get_database_stats,
-	get_reports_count_by_date, get_total_users_count, get_total_reports_count,
+	get_total_users_count, get_total_reports_count,
 	get_confirmed_reports_count, get_pending_reports_count, get_current_password,
-	update_password, update_group_google_sheet
+	update_password, update_group_google_sheet, count_reports_for_export, iter_reports_for_export,
+	get_region_stats, count_broadcast_recipients, create_broadcast, get_daily_stats_totals, get_seller_stats,
+	rebuild_report_daily_stats
 )
 from keyboards import (
 	get_main_menu_reply_keyboard, get_admin_cancel_inline_keyboard,
@@ -29,12 +33,22 @@ from keyboards import (
 	get_reports_stats_keyboard, get_worker_sales_back_keyboard,
 	get_sheets_list_keyboard, get_sheet_management_keyboard,
 	get_google_sheets_selection_keyboard, get_password_change_keyboard,
-	get_settings_keyboard
+	get_settings_keyboard, get_export_group_selection_keyboard, get_system_info_keyboard,
+	get_broadcast_confirm_keyboard, get_broadcast_progress_keyboard, get_leaderboard_keyboard,
+	get_leaderboard_groups_keyboard
 )
-from google_sheets_integration import (
+from sheets import (
 	test_google_sheets_connection, get_reports_statistics,
-	save_report_to_sheets, get_worksheet
+	get_worksheet, get_next_row_number,
+	build_report_row, append_report_rows
 )
+from sheet_rotation import (
+	rotation_enabled, resolve_target_worksheet, record_rows_written, get_statistics_worksheets
+)
+from metrics import STARTED_AT, handler_summary, dependency_summary, in_flight_total
+from rate_limiter import send_limiter, Priority
+from broadcast import format_broadcast_progress, start_broadcast, cancel_broadcast
+from leaderboard import PERIOD_TITLES, format_amount_sum, resolve_period, get_leaderboard, format_leaderboard
 
 admin_router = Router()
 
@@ -48,6 +62,10 @@ class AdminStates(StatesGroup):
 	waiting_for_google_sheet_worksheet_name = State()
 	waiting_for_new_password = State()
 	waiting_for_password_confirmation = State()
+	waiting_for_export_date_range = State()
+	waiting_for_broadcast_message = State()
+
+EXPORT_PROGRESS_INTERVAL = 3
 
 def is_admin(user_id: int) -> bool:
 	return user_id == ADMIN_ID
@@ -139,6 +157,22 @@ async def handle_admin_command(message: Message, state: FSMContext):
 	)
 	logging.info(f"Admin {message.from_user.id} admin panelga kirdi")
 
+@admin_router.message(Command("rebuild_stats"))
+async def handle_rebuild_stats_command(message: Message, state: FSMContext):
+	"""Kunlik statistika jadvalini sales_reports'dan qayta hisoblash (qo'lda tuzatish yoki migratsiyadan keyin)"""
+	if not is_admin(message.from_user.id):
+		await message.answer("🚫 Sizda bu buyruqdan foydalanish uchun ruxsat yo'q.")
+		return
+	
+	status_message = await message.answer("⏳ Statistika qayta hisoblanmoqda...")
+	stat_rows = await asyncio.to_thread(rebuild_report_daily_stats)
+	if stat_rows < 0:
+		await status_message.edit_text("❌ Statistikani qayta hisoblashda xatolik yuz berdi.")
+		return
+	
+	await status_message.edit_text(f"✅ Statistika qayta hisoblandi: {stat_rows} ta kunlik yozuv.")
+	logging.info(f"Admin {message.from_user.id} statistikani qayta hisobladi: {stat_rows} ta yozuv")
+
 @admin_router.callback_query(F.data == "admin_workers")
 async def show_workers(callback_query: CallbackQuery, state: FSMContext):
 	if not is_admin(callback_query.from_user.id):
@@ -699,7 +733,8 @@ async def process_google_sheet_worksheet_name(message: Message, state: FSMContex
 					f"📊 Nom: {sheet_name}\n"
 					f"📄 ID: {spreadsheet_id}\n"
 					f"📋 Varaq: {worksheet_name}\n\n"
-					f"Endi bu Sheet'ni guruhlarga tayinlashingiz mumkin."
+					f"Endi bu Sheet'ni guruhlarga tayinlashingiz mumkin.\n"
+					f"📤 Mavjud hisobotlarni Sheet sahifasidagi 'Tarixni eksport qilish' tugmasi orqali yuklang."
 				)
 				logging.info(f"Google Sheet added: {sheet_name} ({spreadsheet_id}/{worksheet_name})")
 			else:
@@ -743,9 +778,14 @@ async def show_sheet_details(callback_query: CallbackQuery, state: FSMContext):
 		f"📄 Spreadsheet ID: {spreadsheet_id[:20]}...\n"
 		f"📋 Worksheet: {worksheet_name}\n"
 		f"🔘 Holat: {'Faol' if is_active else 'Nofaol'}\n\n"
-		f"💡 Kerakli amalni tanlang:"
 	)
 	
+	if rotation_enabled():
+		active_worksheet, _ = await resolve_target_worksheet(sheet_id, worksheet_name)
+		text += f"📑 Faol varaq: {active_worksheet}\n\n"
+	
+	text += "💡 Kerakli amalni tanlang:"
+	
 	try:
 		await callback_query.message.edit_text(text, reply_markup=get_sheet_management_keyboard(sheet_id))
 	except TelegramBadRequest:
@@ -792,7 +832,8 @@ async def show_sheet_stats(callback_query: CallbackQuery, state: FSMContext):
 	sheet_id, sheet_name, spreadsheet_id, worksheet_name, is_active = sheet_info
 	
 	try:
-		stats = get_reports_statistics(spreadsheet_id, worksheet_name)
+		worksheet_names = await get_statistics_worksheets(sheet_id, worksheet_name)
+		stats = get_reports_statistics(spreadsheet_id, worksheet_names)
 		if stats:
 			text = (
 				f"📊 {sheet_name} STATISTIKASI\n\n"
@@ -816,6 +857,181 @@ async def show_sheet_stats(callback_query: CallbackQuery, state: FSMContext):
 	
 	await callback_query.answer(text, show_alert=True)
 
+def parse_export_date_range(text: str) -> tuple:
+	text = text.strip()
+	if text == "-":
+		return None, None
+	
+	parts = text.split()
+	if len(parts) not in (1, 2):
+		raise ValueError(text)
+	
+	for part in parts:
+		datetime.strptime(part, '%Y-%m-%d')
+	
+	start_date = parts[0]
+	end_date = parts[1] if len(parts) == 2 else None
+	return start_date, end_date
+
+def format_export_progress(sheet_name: str, exported: int, total: int, finished: bool = False) -> str:
+	percent = round(exported / total * 100, 1) if total else 100
+	header = "✅ EKSPORT YAKUNLANDI" if finished else "📤 EKSPORT DAVOM ETMOQDA"
+	return (
+		f"{header}\n\n"
+		f"📊 Sheet: {sheet_name}\n"
+		f"📝 Yuklandi: {exported} / {total} ta ({percent}%)"
+	)
+
+@admin_router.callback_query(F.data.startswith("sheet_export_"))
+async def start_sheet_export(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	sheet_id = int(callback_query.data.split("_")[-1])
+	sheet_info = await get_google_sheet_by_id(sheet_id)
+	
+	if not sheet_info:
+		await callback_query.answer("❌ Sheet topilmadi!", show_alert=True)
+		return
+	
+	groups = await get_all_telegram_groups()
+	text = (
+		f"📤 TARIXNI EKSPORT QILISH\n\n"
+		f"'{sheet_info[1]}' Sheet'iga qaysi guruhning tasdiqlangan hisobotlari yuklansin?"
+	)
+	
+	try:
+		await callback_query.message.edit_text(text, reply_markup=get_export_group_selection_keyboard(groups, sheet_id))
+	except TelegramBadRequest:
+		await callback_query.message.answer(text, reply_markup=get_export_group_selection_keyboard(groups, sheet_id))
+	await callback_query.answer()
+
+@admin_router.callback_query(F.data.startswith("export_group_"))
+async def process_export_group_selection(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	parts = callback_query.data.split("_")
+	sheet_id = int(parts[2])
+	group_id = int(parts[3])
+	
+	await state.update_data(temp_export_sheet_id=sheet_id, temp_export_group_id=group_id or None)
+	await state.set_state(AdminStates.waiting_for_export_date_range)
+	
+	text = (
+		"📅 SANA ORALIG'I\n\n"
+		"Eksport qilinadigan sana oralig'ini kiriting:\n\n"
+		"📝 Masalan:\n"
+		"• 2025-01-01 2025-12-31\n"
+		"• 2025-06-01 (shu sanadan boshlab)\n"
+		"• - (barcha hisobotlar)"
+	)
+	
+	try:
+		await callback_query.message.edit_text(text, reply_markup=get_admin_cancel_inline_keyboard())
+	except TelegramBadRequest:
+		await callback_query.message.answer(text, reply_markup=get_admin_cancel_inline_keyboard())
+	await callback_query.answer()
+
+@admin_router.message(AdminStates.waiting_for_export_date_range)
+async def process_export_date_range(message: Message, state: FSMContext):
+	if not is_admin(message.from_user.id):
+		await message.answer("🚫 Ruxsat yo'q.")
+		await state.clear()
+		return
+	
+	try:
+		start_date, end_date = parse_export_date_range(message.text or "")
+	except ValueError:
+		await message.answer(
+			"❌ XATO\n\n"
+			"Sanani YYYY-MM-DD formatida kiriting yoki barchasi uchun '-' yuboring",
+			reply_markup=get_admin_cancel_inline_keyboard()
+		)
+		return
+	
+	data = await state.get_data()
+	sheet_id = data.get("temp_export_sheet_id")
+	group_id = data.get("temp_export_group_id")
+	await state.clear()
+	
+	sheet_info = await get_google_sheet_by_id(sheet_id)
+	if not sheet_info:
+		await message.answer("❌ Sheet topilmadi!")
+		return
+	
+	await run_history_export(message, sheet_info, group_id, start_date, end_date)
+
+async def run_history_export(message: Message, sheet_info: tuple, group_id: int = None,
+                             start_date: str = None, end_date: str = None):
+	sheet_id, sheet_name, spreadsheet_id, worksheet_name, is_active = sheet_info
+	
+	total = await count_reports_for_export(group_id, start_date, end_date)
+	if total == 0:
+		await message.answer("ℹ️ Eksport qilish uchun tasdiqlangan hisobotlar topilmadi.")
+		return
+	
+	progress_message = await message.answer(format_export_progress(sheet_name, 0, total))
+	
+	worksheet = None
+	target_worksheet = None
+	row_number = 1
+	exported = 0
+	last_progress_at = time.monotonic()
+	
+	chunks = iter_reports_for_export(group_id, start_date, end_date)
+	try:
+		while True:
+			# Har bir bo'lak alohida oqimda o'qiladi (generator har safar o'z ulanishini ochadi) — event loop bloklanmaydi
+			chunk = await asyncio.to_thread(next, chunks, None)
+			if chunk is None:
+				break
+			
+			# Eksport davomida qator chegarasiga yetilsa, keyingi bo'lak yangi varaqqa yoziladi
+			worksheet_for_chunk, tab_id = await resolve_target_worksheet(sheet_id, worksheet_name, spreadsheet_id)
+			if worksheet_for_chunk != target_worksheet:
+				target_worksheet = worksheet_for_chunk
+				worksheet = await asyncio.to_thread(get_worksheet, spreadsheet_id, target_worksheet)
+				if not worksheet:
+					await progress_message.edit_text("❌ ULANISH XATOSI\n\nGoogle Sheet'ga ulanib bo'lmadi.")
+					return
+				row_number = await asyncio.to_thread(get_next_row_number, worksheet)
+			
+			rows = []
+			for report in chunk:
+				submitted_at = None
+				if report.get('submission_timestamp'):
+					try:
+						submitted_at = datetime.fromisoformat(str(report['submission_timestamp']))
+					except ValueError:
+						submitted_at = None
+				rows.append(build_report_row(row_number, report, submitted_at))
+				row_number += 1
+			
+			await asyncio.to_thread(append_report_rows, worksheet, rows)
+			await record_rows_written(tab_id, len(rows))
+			exported += len(rows)
+			
+			if time.monotonic() - last_progress_at >= EXPORT_PROGRESS_INTERVAL:
+				last_progress_at = time.monotonic()
+				try:
+					await progress_message.edit_text(format_export_progress(sheet_name, exported, total))
+				except TelegramBadRequest:
+					pass
+	except Exception as e:
+		logging.error(f"History export to {sheet_name} failed after {exported} rows: {e}")
+		await progress_message.edit_text(
+			f"❌ EKSPORT TO'XTADI\n\n"
+			f"📝 Yuklandi: {exported} / {total} ta\n"
+			f"Xatolik: {str(e)}"
+		)
+		return
+	
+	await progress_message.edit_text(format_export_progress(sheet_name, exported, total, finished=True))
+	logging.info(f"History export finished: {exported} rows to {sheet_name} ({spreadsheet_id}/{worksheet_name})")
+
 @admin_router.callback_query(F.data.startswith("sheet_delete_"))
 async def delete_sheet(callback_query: CallbackQuery, state: FSMContext):
 	if not is_admin(callback_query.from_user.id):
@@ -991,6 +1207,54 @@ async def show_reports_menu(callback_query: CallbackQuery, state: FSMContext):
 		)
 	await callback_query.answer()
 
+async def show_leaderboard(callback_query: CallbackQuery, period: str, metric: str, group_id: int):
+	scope = "Barcha guruhlar"
+	if group_id:
+		group = await get_telegram_group_by_id(group_id)
+		scope = group[2] if group else str(group_id)
+	
+	start_date, end_date = resolve_period(period)
+	rows = await get_leaderboard(start_date, end_date, group_id or None, metric)
+	text = format_leaderboard(rows, PERIOD_TITLES[period], metric, scope)
+	keyboard = get_leaderboard_keyboard(period, metric, group_id)
+	try:
+		await callback_query.message.edit_text(text, reply_markup=keyboard)
+	except TelegramBadRequest:
+		# Tanlov o'zgarmagan bo'lsa ("message is not modified") xabar qoladi
+		pass
+	await callback_query.answer()
+
+@admin_router.callback_query(F.data == "reports_sellers")
+async def show_sellers_leaderboard(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	await show_leaderboard(callback_query, "today", "count", 0)
+
+@admin_router.callback_query(F.data.startswith("leaderboard_groups_"))
+async def select_leaderboard_group(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	_, _, period, metric = callback_query.data.split("_")
+	groups = await get_all_telegram_groups()
+	await callback_query.message.edit_text(
+		"👥 Reyting uchun guruhni tanlang:",
+		reply_markup=get_leaderboard_groups_keyboard(groups, period, metric)
+	)
+	await callback_query.answer()
+
+@admin_router.callback_query(F.data.startswith("leaderboard_"))
+async def switch_leaderboard(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	_, period, metric, group_id = callback_query.data.split("_")
+	await show_leaderboard(callback_query, period, metric, int(group_id))
+
 @admin_router.callback_query(F.data == "reports_general")
 async def show_general_reports(callback_query: CallbackQuery, state: FSMContext):
 	if not is_admin(callback_query.from_user.id):
@@ -1001,10 +1265,16 @@ async def show_general_reports(callback_query: CallbackQuery, state: FSMContext)
 	
 	today = date.today()
 	week_ago = today - timedelta(days=7)
-	week_reports = await get_reports_count_by_date(week_ago.isoformat(), today.isoformat())
-	
 	month_ago = today - timedelta(days=30)
-	month_reports = await get_reports_count_by_date(month_ago.isoformat(), today.isoformat())
+	
+	# Hafta/oy ko'rsatkichlari kunlik rollup'dan olinadi — hisobotlar soni oshsa ham so'rovlar tez qoladi
+	week_totals = await get_daily_stats_totals(week_ago.isoformat(), today.isoformat())
+	month_totals = await get_daily_stats_totals(month_ago.isoformat(), today.isoformat())
+	week_reports = sum(count for count, _ in week_totals.values())
+	month_reports = sum(count for count, _ in month_totals.values())
+	month_amount = sum(amount for _, amount in month_totals.values())
+	month_top_sellers = await get_seller_stats(month_ago.isoformat(), today.isoformat(), limit=3)
+	month_top_regions = await get_region_stats(month_ago.isoformat(), today.isoformat(), limit=3)
 	
 	text = (
 		"📊 UMUMIY STATISTIKA\n\n"
@@ -1015,9 +1285,20 @@ async def show_general_reports(callback_query: CallbackQuery, state: FSMContext)
 		f"📅 Bugungi hisobotlar: {stats.get('today_reports', 0)} ta\n"
 		f"📈 Haftalik hisobotlar: {week_reports} ta\n"
 		f"📊 Oylik hisobotlar: {month_reports} ta\n"
+		f"💰 Oylik summa: {format_amount_sum(month_amount)} so'm\n"
 		f"🎯 Tasdiqlash foizi: {stats.get('confirmation_rate', 0)}%"
 	)
 	
+	if month_top_sellers:
+		text += "\n\n🏆 OYNING TOP SOTUVCHILARI:\n"
+		for i, (_, seller, count, _) in enumerate(month_top_sellers, 1):
+			text += f"{i}. {seller}: {count} ta\n"
+	
+	if month_top_regions:
+		text += "\n📍 OYNING TOP HUDUDLARI:\n"
+		for i, (region, count) in enumerate(month_top_regions, 1):
+			text += f"{i}. {region}: {count} ta\n"
+	
 	try:
 		await callback_query.message.edit_text(text, reply_markup=get_reports_stats_keyboard())
 	except TelegramBadRequest:
@@ -1042,6 +1323,128 @@ async def show_settings_menu(callback_query: CallbackQuery, state: FSMContext):
 		)
 	await callback_query.answer()
 
+def format_system_info() -> str:
+	uptime = int(time.time() - STARTED_AT)
+	text = (
+		"📊 TIZIM MA'LUMOTLARI\n\n"
+		f"⏱ Ishlash vaqti: {uptime // 86400} kun {uptime % 86400 // 3600} soat {uptime % 3600 // 60} daqiqa\n"
+		f"⚙️ Hozir bajarilmoqda: {in_flight_total()} ta\n\n"
+	)
+	
+	dependency_names = {"db": "🗄️ Baza", "sheets": "📈 Sheets"}
+	for kind, (calls, p50, p95, p99) in dependency_summary().items():
+		text += (
+			f"{dependency_names.get(kind, kind)}: {calls} ta chaqiruv, "
+			f"p50 {p50 * 1000:.0f} / p95 {p95 * 1000:.0f} / p99 {p99 * 1000:.0f} ms\n"
+		)
+	
+	send_stats = send_limiter.stats()
+	priority_names = {Priority.USER_REPLY: "javoblar", Priority.GROUP_REPORT: "guruh", Priority.NOTIFICATION: "xabarnomalar"}
+	text += (
+		"📤 Yuborish navbati: "
+		+ ", ".join(f"{priority_names[priority]} {depth}" for priority, depth in send_stats["queue_depth"].items())
+		+ f"\n🚦 Kutganlar: {sum(send_stats['throttled'].values())} ta, retry_after: {send_stats['retry_after']} ta\n"
+	)
+	
+	rows = handler_summary()
+	if not rows:
+		return text + "\nℹ️ Hali handler metrikalari yo'q."
+	
+	text += "\n⏳ HANDLERLAR (p50 / p95 / p99, ms):\n"
+	for router_name, handler_name, count, p50, p95, p99, errors in rows:
+		errors_text = f", ❌ {errors}" if errors else ""
+		text += (
+			f"• {router_name}.{handler_name}: {count} ta — "
+			f"{p50 * 1000:.0f} / {p95 * 1000:.0f} / {p99 * 1000:.0f}{errors_text}\n"
+		)
+	return text
+
+@admin_router.callback_query(F.data == "system_info")
+async def show_system_info(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	text = format_system_info()
+	try:
+		await callback_query.message.edit_text(text, reply_markup=get_system_info_keyboard())
+	except TelegramBadRequest:
+		await callback_query.message.answer(text, reply_markup=get_system_info_keyboard())
+	await callback_query.answer()
+
+@admin_router.callback_query(F.data == "admin_broadcast")
+async def start_broadcast_creation(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	recipients = await count_broadcast_recipients()
+	await state.set_state(AdminStates.waiting_for_broadcast_message)
+	text = (
+		"📣 XABAR YUBORISH\n\n"
+		f"👥 Qabul qiluvchilar: {recipients} ta (bloklanmagan foydalanuvchilar)\n\n"
+		"Yuboriladigan xabarni jo'nating (matn, rasm yoki fayl). Xabar aynan shu ko'rinishda nusxalanadi."
+	)
+	try:
+		await callback_query.message.edit_text(text, reply_markup=get_admin_cancel_inline_keyboard())
+	except TelegramBadRequest:
+		await callback_query.message.answer(text, reply_markup=get_admin_cancel_inline_keyboard())
+	await callback_query.answer()
+
+@admin_router.message(AdminStates.waiting_for_broadcast_message)
+async def process_broadcast_message(message: Message, state: FSMContext):
+	if not is_admin(message.from_user.id):
+		await message.answer("🚫 Ruxsat yo'q.")
+		await state.clear()
+		return
+	
+	recipients = await count_broadcast_recipients()
+	await state.update_data(temp_broadcast_message_id=message.message_id)
+	await message.answer(
+		f"❓ Yuqoridagi xabar {recipients} ta foydalanuvchiga yuborilsinmi?",
+		reply_markup=get_broadcast_confirm_keyboard()
+	)
+
+@admin_router.callback_query(AdminStates.waiting_for_broadcast_message, F.data == "broadcast_confirm")
+async def confirm_broadcast(callback_query: CallbackQuery, state: FSMContext):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	data = await state.get_data()
+	source_message_id = data.get("temp_broadcast_message_id")
+	await state.clear()
+	if not source_message_id:
+		await callback_query.answer("❌ Xabar topilmadi, qaytadan boshlang.", show_alert=True)
+		return
+	
+	chat_id = callback_query.message.chat.id
+	total = await count_broadcast_recipients()
+	broadcast_id = await create_broadcast(callback_query.from_user.id, chat_id, source_message_id, total)
+	if not broadcast_id:
+		await callback_query.answer("❌ Xatolik yuz berdi.", show_alert=True)
+		return
+	
+	progress = {'status': 'running', 'total': total, 'sent': 0, 'failed': 0, 'blocked': 0}
+	await callback_query.message.edit_text(
+		format_broadcast_progress(progress), reply_markup=get_broadcast_progress_keyboard(broadcast_id)
+	)
+	await callback_query.answer("📣 Yuborish boshlandi")
+	# Fonda: minglab qabul qiluvchiga yuborish handler'ni ushlab turmaydi
+	start_broadcast(callback_query.bot, broadcast_id, chat_id, callback_query.message.message_id)
+
+@admin_router.callback_query(F.data.startswith("broadcast_cancel_"))
+async def stop_broadcast(callback_query: CallbackQuery):
+	if not is_admin(callback_query.from_user.id):
+		await callback_query.answer("🚫 Ruxsat yo'q.", show_alert=True)
+		return
+	
+	broadcast_id = int(callback_query.data.split("_")[-1])
+	if await cancel_broadcast(broadcast_id):
+		await callback_query.answer("⏹ Yuborish to'xtatilmoqda...")
+	else:
+		await callback_query.answer("ℹ️ Bu yuborish allaqachon yakunlangan.", show_alert=True)
+
 @admin_router.callback_query(F.data == "admin_menu")
 async def back_to_admin_menu(callback_query: CallbackQuery, state: FSMContext):
 	if not is_admin(callback_query.from_user.id):
@@ -1104,10 +1507,3 @@ async def cancel_admin_action_handler(callback_query: CallbackQuery, state: FSMC
 		reply_markup=get_main_menu_reply_keyboard()
 	)
 	await callback_query.answer()
-
-logging.basicConfig(
-	level=logging.INFO,
-	format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
-logging.info("Admin router initialized successfully")
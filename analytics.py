@@ -0,0 +1,248 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from regions import normalize_region
+
+SHEET_DATE_LENGTH = 10  # "dd.mm.YYYY"
+
+def factorize(values) -> tuple:
+	"""
+	(codes, uniques): har bir qiymat noyob qiymatlar ro'yxatidagi indeksiga almashtiriladi.
+	Hash orqali (dict.fromkeys va map C darajasida ishlaydi) — satrlar massivini np.unique bilan
+	saralashdan ancha tez. Sana, summa va nomlarda noyob qiymatlar kam, shuning uchun keyingi
+	tahlil faqat uniques ustida bajariladi va natija codes orqali yoyiladi.
+	"""
+	values = values if isinstance(values, list) else list(values)
+	uniques = list(dict.fromkeys(values))
+	index = dict(zip(uniques, range(len(uniques))))
+	codes = np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values))
+	return codes, uniques
+
+def encode_categories(values, exclude_test: bool = True) -> tuple:
+	"""
+	Matn ustunini kategoriya kodlariga aylantiradi: (codes, labels).
+	Bo'sh va TEST qiymatlar -1 kodini oladi.
+	"""
+	codes, uniques = factorize(values)
+	if not uniques:
+		return np.empty(0, dtype=np.int64), np.empty(0, dtype=str)
+	
+	raw_labels = np.char.strip(np.array(uniques, dtype=str))
+	labels, label_codes = np.unique(raw_labels, return_inverse=True)
+	codes = label_codes.astype(np.int64)[codes]
+	
+	invalid = labels == ''
+	if exclude_test:
+		invalid |= np.char.find(np.char.upper(labels), 'TEST') >= 0
+	
+	if invalid.any():
+		# Yaroqsiz yorliqlarni olib tashlab, kodlarni qayta raqamlash
+		remap = np.cumsum(~invalid) - 1
+		remap[invalid] = -1
+		codes = remap[codes]
+		labels = labels[~invalid]
+	
+	return codes, labels
+
+def map_categories(codes: np.ndarray, labels: np.ndarray, mapper) -> tuple:
+	"""Har bir noyob yorliqqa bir marta mapper qo'llab, kodlarni yangi kategoriyalarga o'tkazadi"""
+	if labels.size == 0:
+		return codes, labels
+	
+	mapped = np.array([mapper(label) or '' for label in labels], dtype=str)
+	new_labels, label_codes = np.unique(mapped, return_inverse=True)
+	
+	empty = new_labels == ''
+	if empty.any():
+		remap = np.cumsum(~empty) - 1
+		remap[empty] = -1
+		label_codes = remap[label_codes]
+		new_labels = new_labels[~empty]
+	
+	# Oxirgi element -1 kodlari uchun: butun ustun bitta indekslash bilan o'tkaziladi
+	return np.append(label_codes, -1)[codes], new_labels
+
+def parse_sheet_dates(values) -> np.ndarray:
+	"""
+	"dd.mm.YYYY" yoki "dd.mm.YYYY HH:MM" satrlarini datetime64[D] ga aylantiradi.
+	Tahlil qilib bo'lmaydigan qiymatlar NaT bo'ladi.
+	"""
+	# Vaqt qismi deyarli har bir qatorni noyob qiladi — kesib tashlansa, noyoblar soni kunlar soniga teng
+	codes, uniques = factorize([value[:SHEET_DATE_LENGTH] for value in values])
+	return _parse_unique_sheet_dates(uniques)[codes]
+
+def _parse_unique_sheet_dates(values: list) -> np.ndarray:
+	array = np.asarray(values, dtype=f'U{SHEET_DATE_LENGTH}')
+	result = np.full(array.shape, np.datetime64('NaT'), dtype='datetime64[D]')
+	if array.size == 0:
+		return result
+	
+	chars = np.ascontiguousarray(array).view('U1').reshape(-1, SHEET_DATE_LENGTH)
+	digit_positions = [0, 1, 3, 4, 6, 7, 8, 9]
+	valid = (chars[:, 2] == '.') & (chars[:, 5] == '.')
+	valid &= np.all(np.char.isdigit(chars[:, digit_positions]), axis=1)
+	
+	if valid.any():
+		iso_chars = chars[valid][:, [6, 7, 8, 9, 2, 3, 4, 2, 0, 1]].copy()
+		iso_chars[:, [4, 7]] = '-'
+		iso = iso_chars.view(f'U{SHEET_DATE_LENGTH}').ravel()
+		try:
+			result[valid] = iso.astype('datetime64[D]')
+		except ValueError:
+			result[valid] = [_parse_iso_date(value) for value in iso]
+	
+	# "1.10.2026" kabi nostandart yozuvlar kam uchraydi — ularni alohida tahlil qilamiz
+	leftovers = np.flatnonzero(~valid & (np.char.str_len(array) > 0))
+	for index in leftovers:
+		try:
+			result[index] = np.datetime64(datetime.strptime(str(values[index]).split(' ')[0], '%d.%m.%Y').date(), 'D')
+		except ValueError:
+			continue
+	
+	return result
+
+def _parse_iso_date(value: str):
+	try:
+		return np.datetime64(value, 'D')
+	except ValueError:
+		return np.datetime64('NaT')
+
+def parse_amounts(values) -> np.ndarray:
+	"""
+	"5.000.000", "5,000,000 so'm" kabi summalarni butun songa aylantiradi (yaroqsizlari 0)
+	"""
+	codes, uniques = factorize(values)
+	if not uniques:
+		return np.empty(0, dtype=np.int64)
+	return _parse_unique_amounts(uniques)[codes]
+
+def _parse_unique_amounts(values: list) -> np.ndarray:
+	array = np.asarray(values, dtype=str)
+	
+	cleaned = np.char.replace(array, "so'm", '')
+	for separator in ('.', ',', ' '):
+		cleaned = np.char.replace(cleaned, separator, '')
+	
+	result = np.zeros(array.shape, dtype=np.int64)
+	valid = np.char.isdigit(cleaned) & (np.char.str_len(cleaned) <= 18)
+	if valid.any():
+		result[valid] = cleaned[valid].astype(np.int64)
+	
+	return result
+
+# -1 kodlari 0-katakka tushadi va tashlab yuboriladi — niqob bilan ustunlarni nusxalash shart emas
+def count_by(codes: np.ndarray, size: int) -> np.ndarray:
+	return np.bincount(codes + 1, minlength=size + 1)[1:]
+
+def sum_by(codes: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+	return np.bincount(codes + 1, weights=weights, minlength=size + 1)[1:]
+
+def top_k(labels: np.ndarray, values: np.ndarray, k: int = 10) -> Dict[str, int]:
+	"""Eng katta k ta qiymatni (kamayish tartibida) butun massivni saralamasdan topadi"""
+	if labels.size == 0:
+		return {}
+	
+	k = min(k, labels.size)
+	candidates = np.argpartition(-values, k - 1)[:k]
+	ordered = candidates[np.lexsort((labels[candidates], -values[candidates]))]
+	return {str(labels[i]): _to_python_number(values[i]) for i in ordered if values[i] > 0}
+
+def daily_histogram(dates: np.ndarray, start: date, end: date) -> Dict[str, int]:
+	start_day = np.datetime64(start, 'D')
+	days = (end - start).days + 1
+	offsets = (dates[~np.isnat(dates)] - start_day).astype(np.int64)
+	offsets = offsets[(offsets >= 0) & (offsets < days)]
+	counts = np.bincount(offsets, minlength=days)
+	return {(start + timedelta(days=i)).isoformat(): int(counts[i]) for i in range(days)}
+
+def monthly_histogram(dates: np.ndarray) -> Dict[str, int]:
+	return _unit_counts(dates[~np.isnat(dates)].astype('datetime64[M]'))
+
+def day_counts(dates: np.ndarray) -> Dict[str, int]:
+	return _unit_counts(dates[~np.isnat(dates)])
+
+def _unit_counts(values: np.ndarray) -> Dict[str, int]:
+	"""Sana qiymatlari sanog'i: oraliq kichik (kunlar/oylar), shuning uchun saralash o'rniga bincount"""
+	if values.size == 0:
+		return {}
+	
+	offsets = values.view(np.int64)
+	first = offsets.min()
+	counts = np.bincount(offsets - first)
+	present = np.flatnonzero(counts)
+	labels = (present + first).astype(values.dtype)
+	return {str(label): int(count) for label, count in zip(labels, counts[present])}
+
+def _to_python_number(value):
+	return int(value) if float(value).is_integer() else float(value)
+
+def _to_dict(labels: np.ndarray, counts: np.ndarray) -> Dict[str, int]:
+	return {str(label): _to_python_number(count) for label, count in zip(labels, counts) if count > 0}
+
+class ReportFrame:
+	"""
+	Hisobot ustunlari NumPy massivlari ko'rinishida: sotuvchi/mahsulot/hudud kategoriya
+	kodlari, datetime64 sanalar va butun son summalar.
+	"""
+	
+	def __init__(self, sellers, products, locations, dates: np.ndarray, amounts: Optional[np.ndarray] = None,
+	             region_mapper=normalize_region):
+		self.seller_codes, self.seller_labels = encode_categories(sellers)
+		self.product_codes, self.product_labels = encode_categories(products)
+		location_codes, location_labels = encode_categories(locations)
+		self.region_codes, self.region_labels = map_categories(location_codes, location_labels, region_mapper)
+		self.dates = dates
+		self.amounts = amounts if amounts is not None else np.zeros(len(dates), dtype=np.int64)
+	
+	@classmethod
+	def from_sheet_columns(cls, sellers: List[str], products: List[str], locations: List[str],
+	                       dates: List[str], amounts: List[str] = None, **kwargs) -> 'ReportFrame':
+		return cls(
+			sellers, products, locations, parse_sheet_dates(dates),
+			parse_amounts(amounts) if amounts is not None else None,
+			**kwargs
+		)
+	
+	def __len__(self) -> int:
+		return len(self.dates)
+	
+	def seller_counts(self) -> np.ndarray:
+		return count_by(self.seller_codes, self.seller_labels.size)
+	
+	def product_counts(self) -> np.ndarray:
+		return count_by(self.product_codes, self.product_labels.size)
+	
+	def region_counts(self) -> np.ndarray:
+		return count_by(self.region_codes, self.region_labels.size)
+	
+	def seller_amounts(self) -> np.ndarray:
+		return sum_by(self.seller_codes, self.amounts, self.seller_labels.size)
+	
+	def total_amount(self) -> int:
+		return int(self.amounts.sum())
+
+def compute_report_statistics(frame: ReportFrame, top: int = 10, today: date = None) -> Dict:
+	"""get_reports_statistics bilan bir xil ko'rinishdagi statistika lug'ati"""
+	today = today or date.today()
+	
+	seller_counts = frame.seller_counts()
+	product_counts = frame.product_counts()
+	region_counts = frame.region_counts()
+	
+	return {
+		'total_reports': len(frame),
+		'sellers_stats': _to_dict(frame.seller_labels, seller_counts),
+		'top_sellers': top_k(frame.seller_labels, seller_counts, top),
+		'monthly_stats': monthly_histogram(frame.dates),
+		'daily_stats': day_counts(frame.dates),
+		'last_30_days': dict(reversed(list(daily_histogram(frame.dates, today - timedelta(days=29), today).items()))),
+		'product_stats': _to_dict(frame.product_labels, product_counts),
+		'top_products': top_k(frame.product_labels, product_counts, top),
+		'location_stats': _to_dict(frame.region_labels, region_counts),
+		'top_locations': top_k(frame.region_labels, region_counts, top),
+		'total_amount': frame.total_amount(),
+		'seller_amounts': _to_dict(frame.seller_labels, frame.seller_amounts()),
+		'last_updated': datetime.now().strftime('%d.%m.%Y %H:%M:%S')
+	}
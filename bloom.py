@@ -0,0 +1,36 @@
+import hashlib
+import math
+
+class BloomFilter:
+	"""
+	Oddiy Bloom filtri: "yo'q" javobi aniq, "bor" javobi esa error_rate ehtimol bilan xato bo'lishi mumkin.
+	Bitlar bytearray'da saqlanadi (1 mln element, 1% xato uchun ~1.2 MB).
+	"""
+	
+	def __init__(self, capacity: int, error_rate: float = 0.01):
+		capacity = max(capacity, 1)
+		self.capacity = capacity
+		self.error_rate = error_rate
+		self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+		self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+		self.bits = bytearray((self.size + 7) // 8)
+		self.count = 0
+	
+	def _positions(self, item: str):
+		digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+		h1 = int.from_bytes(digest[:8], 'little')
+		h2 = int.from_bytes(digest[8:], 'little') | 1
+		for i in range(self.hash_count):
+			yield (h1 + i * h2) % self.size
+	
+	def add(self, item: str):
+		for position in self._positions(item):
+			self.bits[position >> 3] |= 1 << (position & 7)
+		self.count += 1
+	
+	def __contains__(self, item: str) -> bool:
+		return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+	
+	@property
+	def is_saturated(self) -> bool:
+		return self.count > self.capacity
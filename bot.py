@@ -1,23 +1,40 @@
 import asyncio
 import logging
-import sys
+import signal
 
 from aiogram import Bot, Dispatcher, F, Router
 from aiogram.enums import ParseMode
-from aiogram.filters import CommandStart
+from aiogram.filters import CommandStart, Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.types import Message, CallbackQuery
 from aiogram.client.default import DefaultBotProperties
 
-from config import BOT_TOKEN, ADMIN_PASSWORD, HELPER_ID
+from config import BOT_TOKEN, ADMIN_PASSWORD, HELPER_ID, BOT_MODE, METRICS_PORT, WORKER_COUNT
 from database import (
-	init_db, add_user_to_db, check_user_exists, get_todays_sales_by_user,
-	check_full_name_exists, get_all_telegram_groups, check_user_blocked,
-	get_current_password
+	init_db, add_user_to_db, get_todays_sales_by_user,
+	check_full_name_exists, get_all_telegram_groups, get_current_password
 )
 from otchot import otchot_router
 from admin import admin_router
+from message_scheduler import message_scheduler
+from fsm_storage import SQLiteStorage
+from contracts import warm_contract_filter
+from webhook import run_webhook
+from user_gate import UserGateMiddleware, UserContext
+from metrics import install_handler_metrics, start_metrics_server, in_flight_total
+from shared_state import shared_state
+from lifecycle import lifecycle, wait_until_idle
+from logging_setup import setup_logging, worker_log_file
+from rate_limiter import RateLimitMiddleware, UpdateChatMiddleware
+from callback_tasks import drain_background_tasks
+import sheets_outbox
+import broadcast
+import leaderboard
+from sharding import (
+	ShardForwardMiddleware, consume_updates, start_worker_processes, supervise_workers, stop_worker_processes
+)
 from keyboards import (
 	get_main_menu_reply_keyboard, get_developer_contact_inline_keyboard,
 	get_group_selection_keyboard
@@ -28,7 +45,6 @@ class RegistrationStates(StatesGroup):
 	waiting_for_full_name = State()
 	waiting_for_group_selection = State()
 
-logging.basicConfig(level=logging.INFO, stream=sys.stdout, format='%(asctime)s - %(levelname)s - %(message)s')
 main_router = Router()
 
 def extract_first_name(full_text: str) -> str:
@@ -38,18 +54,12 @@ def extract_first_name(full_text: str) -> str:
 	return full_text.strip()
 
 @main_router.message(CommandStart())
-async def handle_start(message: Message, state: FSMContext):
+async def handle_start(message: Message, state: FSMContext, user_context: UserContext):
 	await state.clear()
 	user_id = message.from_user.id
 	
-	if await check_user_blocked(user_id):
-		await message.answer(
-			"🚫 Sizning hisobingiz vaqtincha bloklangan.\n"
-			"Qo'shimcha ma'lumot uchun admin bilan bog'laning."
-		)
-		return
-	
-	if await check_user_exists(user_id):
+	# Bloklangan foydalanuvchilar UserGateMiddleware'da to'xtatiladi
+	if user_context.is_registered:
 		await message.answer(
 			f"👋 Assalomu alaykum, {message.from_user.full_name}!\n"
 			f"Xush kelibsiz! Kerakli bo'limni tanlang:",
@@ -63,12 +73,12 @@ async def handle_start(message: Message, state: FSMContext):
 			f"Yangi foydalanuvchi {user_id} ({message.from_user.full_name}) ro'yxatdan o'tish jarayonini boshladi.")
 
 @main_router.message(RegistrationStates.waiting_for_password)
-async def handle_password(message: Message, state: FSMContext):
+async def handle_password(message: Message, state: FSMContext, user_context: UserContext):
 	current_password = await get_current_password()
 	
 	if message.text == current_password:
 		user_id = message.from_user.id
-		if await check_user_exists(user_id):
+		if user_context.is_registered:
 			await state.clear()
 			await message.answer(
 				f"👋 Assalomu alaykum, {message.from_user.full_name}!\nSiz allaqachon ro'yxatdan o'tgansiz. Botimizga xush kelibsiz!",
@@ -191,13 +201,6 @@ async def handle_developer_contact(message: Message, state: FSMContext):
 async def handle_my_sales(message: Message):
 	user_id = message.from_user.id
 	
-	if await check_user_blocked(user_id):
-		await message.answer(
-			"🚫 Sizning hisobingiz vaqtincha bloklangan.\n"
-			"Qo'shimcha ma'lumot uchun admin bilan bog'laning."
-		)
-		return
-	
 	sales_today = await get_todays_sales_by_user(user_id)
 	
 	if not sales_today:
@@ -211,6 +214,148 @@ async def handle_my_sales(message: Message):
 	
 	await message.answer(response_text, parse_mode=ParseMode.HTML)
 
+@main_router.message(Command("top"))
+async def handle_top(message: Message, command: CommandObject, user_context: UserContext):
+	"""
+	Sotuvchilar reytingi: guruhda — shu guruh bo'yicha, shaxsiy chatda — admin uchun umumiy,
+	sotuvchi uchun o'z guruhi bo'yicha. /top [bugun|hafta|oy|YYYY-MM-DD YYYY-MM-DD] [soni|summa]
+	"""
+	try:
+		title, start_date, end_date, metric = leaderboard.parse_top_args(command.args)
+	except ValueError:
+		await message.answer(
+			"❌ Noto'g'ri format. Masalan:\n"
+			"/top hafta\n"
+			"/top oy summa\n"
+			"/top 2024-01-01 2024-01-31"
+		)
+		return
+	
+	if message.chat.type != "private":
+		group_id, scope = message.chat.id, message.chat.title
+	elif user_context.is_staff:
+		group_id, scope = None, "Barcha guruhlar"
+	elif user_context.is_registered and user_context.assigned_group_id:
+		group_id, scope = user_context.assigned_group_id, None
+	else:
+		await message.answer("⚠️ Reytingni ko'rish uchun avval ro'yxatdan o'ting va guruhga biriktiriling.")
+		return
+	
+	rows = await leaderboard.get_leaderboard(start_date, end_date, group_id, metric)
+	await message.answer(leaderboard.format_leaderboard(rows, title, metric, scope))
+
+def create_bot() -> Bot:
+	bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+	# Telegram cheklovlari: yuborishlar token bucket'lar va ustuvorlik navbati orqali o'tadi
+	bot.session.middleware(RateLimitMiddleware())
+	return bot
+
+def build_dispatcher(storage: BaseStorage = None, shard_queues: list = None) -> Dispatcher:
+	dp = Dispatcher(storage=storage)
+	if shard_queues:
+		# Asosiy jarayon: update'lar worker'larga uzatiladi, routerlar faqat allowed_updates uchun ulanadi
+		dp.update.outer_middleware(ShardForwardMiddleware(shard_queues))
+	else:
+		# Foydalanuvchi holati har update uchun bir marta aniqlanadi, bloklanganlar routerlarga yetmaydi
+		dp.update.outer_middleware(UserGateMiddleware())
+		dp.update.outer_middleware(UpdateChatMiddleware())
+		for router, router_name in ((main_router, "main"), (otchot_router, "otchot"), (admin_router, "admin")):
+			install_handler_metrics(router, router_name)
+	dp.include_router(main_router)
+	dp.include_router(otchot_router)
+	dp.include_router(admin_router)
+	return dp
+
+async def receive_updates(bot: Bot, dp: Dispatcher):
+	"""Update'larni lifecycle.request_stop() chaqirilguncha qabul qiladi; boshlangan handler'lar to'xtatilmaydi"""
+	if BOT_MODE == "webhook":
+		await run_webhook(bot, dp)
+		return
+	
+	# Avval webhook o'rnatilgan bo'lsa, getUpdates ishlamaydi
+	await bot.delete_webhook()
+	# Signal'lar lifecycle'da ushlanadi; sessiya fon ishlari tugagandan keyin yopiladi
+	polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, close_bot_session=False))
+	stop_requested = asyncio.create_task(lifecycle.wait_for_stop())
+	await asyncio.wait((polling, stop_requested), return_when=asyncio.FIRST_COMPLETED)
+	if stop_requested.done():
+		try:
+			await dp.stop_polling()
+		except RuntimeError:
+			# Polling hali boshlanmagan
+			polling.cancel()
+	else:
+		stop_requested.cancel()
+	
+	try:
+		await polling
+	except asyncio.CancelledError:
+		pass
+
+async def start_services(bot: Bot, storage: BaseStorage, metrics_port: int, resume_pending: bool = True):
+	"""
+	Fon xizmatlarini ishga tushiradi. To'xtashda lifecycle ularni teskari tartibda yakunlaydi: avval boshlangan
+	handler'lar va fon callback'lari, keyin Sheets navbati va xabar o'chirishlar, oxirida FSM va bot sessiyasi.
+	"""
+	lifecycle.register("Bot sessiyasi", bot.session.close)
+	lifecycle.register("FSM storage", storage.close)
+	metrics_runner = await start_metrics_server(metrics_port)
+	if metrics_runner:
+		lifecycle.register("Metrikalar", metrics_runner.cleanup)
+	if WORKER_COUNT > 1:
+		lifecycle.register("Umumiy holat", shared_state.stop, start=shared_state.start)
+	lifecycle.register("Xabar o'chirish navbati", message_scheduler.stop, start=message_scheduler.start)
+	# Bir nechta worker bo'lsa, yozilmay qolgan hisobotlar va tugamagan ommaviy xabarlarni faqat bittasi davom ettiradi
+	lifecycle.register("Sheets navbati", sheets_outbox.stop, start=sheets_outbox.start if resume_pending else None)
+	lifecycle.register(
+		"Ommaviy xabarlar", broadcast.stop_broadcasts,
+		start=(lambda: broadcast.resume_broadcasts(bot)) if resume_pending else None
+	)
+	lifecycle.register(
+		"Kunlik reyting", leaderboard.stop, start=(lambda: leaderboard.start(bot)) if resume_pending else None
+	)
+	lifecycle.register("Fon callback'lari", drain_background_tasks)
+	lifecycle.register("Handler'lar", lambda: wait_until_idle(lambda: in_flight_total() > 0))
+	await lifecycle.start()
+
+async def run_worker(worker_index: int, update_queue):
+	"""Worker jarayoni: asosiy jarayon chat_id bo'yicha uzatgan update'larni qayta ishlaydi"""
+	await warm_contract_filter()
+	
+	bot = create_bot()
+	# Bitta chat faqat bitta worker'ga tushgani uchun FSM yozuvlari jarayonlar o'rtasida to'qnashmaydi
+	storage = SQLiteStorage()
+	dp = build_dispatcher(storage)
+	
+	await start_services(
+		bot, storage, METRICS_PORT + worker_index + 1 if METRICS_PORT else 0, resume_pending=worker_index == 0
+	)
+	logging.info(f"👷 Worker {worker_index} update'larni kutmoqda")
+	try:
+		handled = await consume_updates(dp, bot, update_queue)
+		logging.info(f"👷 Worker {worker_index} to'xtadi: {handled} ta update qayta ishlandi")
+	finally:
+		await lifecycle.shutdown()
+
+def worker_process(worker_index: int, update_queue):
+	# Ctrl+C va SIGTERM asosiy jarayonga tegishli (systemd butun guruhga yuboradi): worker to'xtash
+	# belgisini olguncha navbatdagilarni tugatadi, keyin o'z fon ishlarini yakunlaydi
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	signal.signal(signal.SIGTERM, signal.SIG_IGN)
+	setup_logging(worker_log_file(worker_index))
+	asyncio.run(run_worker(worker_index, update_queue))
+
+async def run_front(bot: Bot):
+	"""Asosiy jarayon: update'larni qabul qiladi (polling yoki webhook) va worker'larga taqsimlaydi"""
+	processes, queues = start_worker_processes(worker_process, WORKER_COUNT)
+	dp = build_dispatcher(shard_queues=queues)
+	supervisor = asyncio.create_task(supervise_workers(processes, queues, worker_process))
+	try:
+		await receive_updates(bot, dp)
+	finally:
+		supervisor.cancel()
+		await asyncio.to_thread(stop_worker_processes, processes, queues)
+
 async def main():
 	if not BOT_TOKEN or BOT_TOKEN == "YOUR_BOT_TOKEN_HERE":
 		logging.error("🚫 BOT_TOKEN topilmadi yoki o'rnatilmagan. Iltimos, config.py faylini to'g'rilang.")
@@ -221,23 +366,37 @@ async def main():
 		)
 	
 	init_db()
+	bot = create_bot()
+	lifecycle.install_signal_handlers()
 	
-	bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-	dp = Dispatcher()
-	dp.include_router(main_router)
-	dp.include_router(otchot_router)
-	dp.include_router(admin_router)
+	if WORKER_COUNT > 1:
+		logging.info(f"🤖 Bot ishga tushmoqda ({BOT_MODE} rejimi, {WORKER_COUNT} ta worker)...")
+		try:
+			await run_front(bot)
+		except Exception as e:
+			logging.error(f"🆘 Bot ishlayotganda xatolik: {e}")
+		finally:
+			await bot.session.close()
+			logging.info("🛑 Bot to'xtatildi.")
+		return
+	
+	await warm_contract_filter()
+	# Tugallanmagan hisobotlar va admin jarayonlari qayta ishga tushirishda saqlanib qoladi
+	storage = SQLiteStorage()
+	dp = build_dispatcher(storage)
 	
-	logging.info("🤖 Bot ishga tushmoqda...")
+	logging.info(f"🤖 Bot ishga tushmoqda ({BOT_MODE} rejimi)...")
+	await start_services(bot, storage, METRICS_PORT)
 	try:
-		await dp.start_polling(bot)
+		await receive_updates(bot, dp)
 	except Exception as e:
 		logging.error(f"🆘 Bot ishlayotganda xatolik: {e}")
 	finally:
-		await bot.session.close()
+		await lifecycle.shutdown()
 		logging.info("🛑 Bot to'xtatildi.")
 
 if __name__ == "__main__":
+	setup_logging()
 	try:
 		asyncio.run(main())
 	except (KeyboardInterrupt, SystemExit):
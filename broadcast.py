@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from database import (
+	iter_broadcast_recipients, get_broadcast, get_running_broadcast_ids, save_broadcast_checkpoint, set_broadcast_status
+)
+from keyboards import get_broadcast_progress_keyboard
+from rate_limiter import send_priority, Priority
+
+# Bir vaqtda yuborilayotgan xabarlar; tezlikni rate_limiter cheklaydi, bu esa navbatni qisqa ushlaydi
+BROADCAST_CONCURRENCY = 5
+# Har bo'lakdan keyin natijalar va kursor bazaga yoziladi
+BROADCAST_CHUNK_SIZE = 100
+BROADCAST_PROGRESS_INTERVAL = 3
+
+# broadcast_id -> to'xtash so'ralganmi; faqat shu jarayonda ishlayotganlari
+_running: dict = {}
+_tasks: set = set()
+
+def format_broadcast_progress(broadcast: dict, finished: bool = False) -> str:
+	done = broadcast['sent'] + broadcast['failed'] + broadcast['blocked']
+	total = broadcast['total']
+	percent = round(done / total * 100, 1) if total else 100
+	if broadcast['status'] == 'cancelled':
+		header = "⏹ YUBORISH TO'XTATILDI"
+	elif finished:
+		header = "✅ YUBORISH YAKUNLANDI"
+	else:
+		header = "📣 XABAR YUBORILMOQDA"
+	return (
+		f"{header}\n\n"
+		f"📝 Jarayon: {done} / {total} ta ({percent}%)\n"
+		f"✅ Yetkazildi: {broadcast['sent']}\n"
+		f"🚫 Botni bloklagan: {broadcast['blocked']}\n"
+		f"❌ Xatolik: {broadcast['failed']}"
+	)
+
+async def _send_one(bot: Bot, broadcast: dict, telegram_id: int, semaphore: asyncio.Semaphore) -> tuple:
+	async with semaphore:
+		try:
+			await bot.copy_message(
+				chat_id=telegram_id,
+				from_chat_id=broadcast['source_chat_id'],
+				message_id=broadcast['source_message_id']
+			)
+			return telegram_id, 'sent', None
+		except TelegramForbiddenError as e:
+			return telegram_id, 'blocked', str(e)
+		except (TelegramBadRequest, TelegramRetryAfter) as e:
+			return telegram_id, 'failed', str(e)
+		except Exception as e:
+			logging.error(f"Broadcast xabarini {telegram_id} ga yuborishda xatolik: {e}")
+			return telegram_id, 'failed', str(e)
+
+async def run_broadcast(bot: Bot, broadcast_id: int, progress_chat_id: int, progress_message_id: int = None):
+	"""
+	Xabarni bo'laklab yuboradi. Har bo'lakdan keyin natijalar va kursor yoziladi, shuning uchun to'xtatilgan
+	(qayta ishga tushirish) yuborish shu joydan davom etadi va hech kimga ikki marta yetmaydi.
+	"""
+	broadcast = await get_broadcast(broadcast_id)
+	if not broadcast or broadcast['status'] != 'running':
+		return
+	
+	if progress_message_id is None:
+		progress_message = await bot.send_message(
+			progress_chat_id, "🔄 Xabar yuborish davom ettirilmoqda...\n\n" + format_broadcast_progress(broadcast),
+			reply_markup=get_broadcast_progress_keyboard(broadcast_id)
+		)
+		progress_message_id = progress_message.message_id
+	
+	_running[broadcast_id] = False
+	semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+	last_progress_at = time.monotonic()
+	try:
+		# Ustuvorlik: foydalanuvchilarga javoblar va guruh hisobotlari ommaviy xabardan oldin yuboriladi
+		with send_priority(Priority.NOTIFICATION):
+			for chunk in iter_broadcast_recipients(broadcast_id, broadcast['last_user_id'], BROADCAST_CHUNK_SIZE):
+				if _running.get(broadcast_id):
+					break
+				
+				results = await asyncio.gather(
+					*(_send_one(bot, broadcast, telegram_id, semaphore) for _, telegram_id in chunk)
+				)
+				await save_broadcast_checkpoint(broadcast_id, chunk[-1][0], results)
+				
+				broadcast = await get_broadcast(broadcast_id)
+				if broadcast['status'] != 'running':
+					# Boshqa worker jarayonida bekor qilingan
+					break
+				
+				if time.monotonic() - last_progress_at >= BROADCAST_PROGRESS_INTERVAL:
+					last_progress_at = time.monotonic()
+					try:
+						await bot.edit_message_text(
+							format_broadcast_progress(broadcast), chat_id=progress_chat_id,
+							message_id=progress_message_id, reply_markup=get_broadcast_progress_keyboard(broadcast_id)
+						)
+					except TelegramBadRequest:
+						pass
+	finally:
+		stopping = _running.pop(broadcast_id, False)
+	
+	if stopping == "shutdown":
+		logging.info(f"📣 Broadcast {broadcast_id} to'xtatildi, qayta ishga tushganda davom etadi")
+		return
+	
+	await set_broadcast_status(broadcast_id, 'finished', expected_status='running')
+	broadcast = await get_broadcast(broadcast_id)
+	try:
+		await bot.edit_message_text(
+			format_broadcast_progress(broadcast, finished=True), chat_id=progress_chat_id,
+			message_id=progress_message_id
+		)
+	except TelegramBadRequest:
+		pass
+	logging.info(
+		f"📣 Broadcast {broadcast_id} yakunlandi: {broadcast['sent']} yetkazildi, "
+		f"{broadcast['blocked']} bloklagan, {broadcast['failed']} xatolik"
+	)
+
+def start_broadcast(bot: Bot, broadcast_id: int, progress_chat_id: int, progress_message_id: int = None):
+	task = asyncio.create_task(_run(bot, broadcast_id, progress_chat_id, progress_message_id))
+	_tasks.add(task)
+	task.add_done_callback(_tasks.discard)
+
+async def _run(bot: Bot, broadcast_id: int, progress_chat_id: int, progress_message_id: int = None):
+	try:
+		await run_broadcast(bot, broadcast_id, progress_chat_id, progress_message_id)
+	except Exception as e:
+		logging.error(f"Broadcast {broadcast_id} to'xtadi: {e}")
+
+async def cancel_broadcast(broadcast_id: int) -> bool:
+	"""Admin to'xtatadi: joriy bo'lak tugagach yuborish to'xtaydi"""
+	if not await set_broadcast_status(broadcast_id, 'cancelled', expected_status='running'):
+		return False
+	if broadcast_id in _running:
+		_running[broadcast_id] = "cancelled"
+	return True
+
+async def resume_broadcasts(bot: Bot):
+	"""Oldingi ishga tushishda tugamay qolgan yuborishlarni davom ettirish"""
+	for broadcast_id in await get_running_broadcast_ids():
+		broadcast = await get_broadcast(broadcast_id)
+		logging.info(f"📣 Broadcast {broadcast_id} davom ettirilmoqda ({broadcast['last_user_id']} dan keyin)")
+		start_broadcast(bot, broadcast_id, broadcast['admin_id'])
+
+async def stop_broadcasts():
+	"""To'xtash paytida: joriy bo'laklar tugab, kursor yozilishi kutiladi; holat 'running' qoladi"""
+	for broadcast_id in _running:
+		_running[broadcast_id] = "shutdown"
+	while _tasks:
+		await asyncio.gather(*list(_tasks), return_exceptions=True)
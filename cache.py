@@ -0,0 +1,50 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+class TTLCache:
+	"""
+	Kichik in-memory kesh: har bir yozuv ttl soniya yashaydi, maxsize oshsa eng eski yozuv chiqariladi.
+	"""
+	
+	def __init__(self, ttl: float, maxsize: int = 1024):
+		self.ttl = ttl
+		self.maxsize = maxsize
+		self._items: OrderedDict = OrderedDict()
+	
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		item = self._items.get(key, _MISSING)
+		if item is _MISSING:
+			return default
+		
+		expires_at, value = item
+		if expires_at < time.monotonic():
+			del self._items[key]
+			return default
+		
+		self._items.move_to_end(key)
+		return value
+	
+	def set(self, key: Hashable, value: Any):
+		self._items[key] = (time.monotonic() + self.ttl, value)
+		self._items.move_to_end(key)
+		while len(self._items) > self.maxsize:
+			self._items.popitem(last=False)
+	
+	def invalidate(self, key: Hashable):
+		self._items.pop(key, None)
+	
+	def clear(self):
+		self._items.clear()
+	
+	def __contains__(self, key: Hashable) -> bool:
+		return self.get(key, _MISSING) is not _MISSING
+
+# Sotuvchi profili (telegram_id -> profil lug'ati); yangi hisobot yoki holat o'zgarishida tozalanadi
+seller_profile_cache = TTLCache(ttl=60, maxsize=512)
+# Foydalanuvchi holati (telegram_id -> UserContext); ro'yxatdan o'tish, bloklash va tahrirlashda tozalanadi
+user_status_cache = TTLCache(ttl=300, maxsize=4096)
+# Sotuvchilar reytingi ((boshlanish, tugash, guruh, ko'rsatkich, soni) -> qatorlar); tasdiqlash o'zgarganda tozalanadi
+leaderboard_cache = TTLCache(ttl=600, maxsize=256)
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable
+
+from aiogram.types import CallbackQuery
+
+# Hozir bajarilayotgan og'ir callback'lar kalitlari (masalan, ("report", 15))
+_in_flight: set = set()
+# Fon vazifalariga kuchli havola — aks holda GC ularni yakunlanmasdan yig'ib olishi mumkin
+_background_tasks: set = set()
+
+async def run_ack_first(callback_query: CallbackQuery, lock_key: Hashable,
+                        work: Callable[[], Awaitable[None]], ack_text: str = None,
+                        busy_text: str = "⏳ So'rov bajarilmoqda, kuting...") -> bool:
+	"""
+	Og'ir callback'ni darhol tasdiqlab (spinner yo'qoladi), ishni fonda bajaradi.
+	Shu kalit bo'yicha ish tugamaguncha takroriy bosishlar hech narsa qilmaydi.
+	Ish boshlangan bo'lsa True qaytaradi.
+	"""
+	if lock_key in _in_flight:
+		await callback_query.answer(busy_text)
+		return False
+	
+	_in_flight.add(lock_key)
+	try:
+		await callback_query.answer(ack_text)
+	except Exception as e:
+		logging.warning(f"Callback javobini yuborishda xatolik: {e}")
+	
+	task = asyncio.create_task(_run(lock_key, work))
+	_background_tasks.add(task)
+	task.add_done_callback(_background_tasks.discard)
+	return True
+
+async def _run(lock_key: Hashable, work: Callable[[], Awaitable[None]]):
+	try:
+		await work()
+	except Exception as e:
+		logging.error(f"Fon callback vazifasida xatolik {lock_key}: {e}")
+	finally:
+		_in_flight.discard(lock_key)
+
+def is_in_flight(lock_key: Hashable) -> bool:
+	return lock_key in _in_flight
+
+async def drain_background_tasks():
+	"""To'xtash paytida boshlangan fon vazifalari tugashini kutish (muddatni lifecycle belgilaydi)"""
+	while _background_tasks:
+		await asyncio.gather(*list(_background_tasks), return_exceptions=True)
@@ -5,5 +5,55 @@ HELPER_ID = 8039363087
 DEVELOPER_USERNAME = "roobotmee"
 DEVELOPER_USER_ID = 7000454062
 
+# Varaqlarni aylantirish: "month" — har oy yangi varaq ("Malumotlar 2026-10"), None — o'chirilgan
+SHEET_ROTATION_PERIOD = None
+# Faol varaqdagi qatorlar shu songa yetganda yangi varaq ochiladi (0 — o'chirilgan)
+SHEET_ROTATION_MAX_ROWS = 0
+
+# FSM holatlari bot_data.db da saqlanadi: yozuvlar shuncha soniyada bir marta birlashtirilib yoziladi
+FSM_FLUSH_INTERVAL = 1.0
+# Shuncha soat tegilmagan qoralamalar (tugallanmagan hisobotlar) o'chiriladi
+FSM_DRAFT_TTL_HOURS = 72
+
+# Update'larni qabul qilish usuli: "polling" yoki "webhook"
+BOT_MODE = "polling"
+# Tashqi HTTPS manzil (TLS reverse proxy'da tugaydi), masalan "https://bot.example.com"
+WEBHOOK_URL = ""
+WEBHOOK_PATH = "/telegram/webhook"
+# Telegram har so'rovda X-Telegram-Bot-Api-Secret-Token sarlavhasida yuboradi (A-Z, a-z, 0-9, _ va -)
+WEBHOOK_SECRET = ""
+# Ichki aiohttp server manzili; reverse proxy shu yerga yo'naltiradi
+WEBAPP_HOST = "127.0.0.1"
+WEBAPP_PORT = 8080
+
+# Prometheus /metrics manzili (faqat lokal); 0 — o'chirilgan. Worker'lar keyingi portlarni oladi
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9100
+
+# 1 — bitta jarayon. Ko'proq bo'lsa, asosiy jarayon update'larni qabul qilib, chat_id bo'yicha
+# shuncha worker jarayoniga taqsimlaydi (bitta chat har doim bitta worker'da)
+WORKER_COUNT = 1
+# Boshqa jarayonlardagi kesh o'zgarishlarini tekshirish oralig'i (soniya)
+SHARED_EVENT_POLL_INTERVAL = 1.0
+
+# SIGTERM/SIGINT dan keyin fon ishlarini (Sheets, FSM, rejalashtirilgan o'chirishlar) yakunlash uchun umumiy muddat (soniya).
+# systemd TimeoutStopSec / docker stop vaqtidan kamroq bo'lishi kerak
+SHUTDOWN_TIMEOUT = 25
+# Tasdiqlangan, lekin Sheets'ga yozilmagan hisobotlarni qayta yuborish oralig'i (soniya)
+SHEETS_RESYNC_INTERVAL = 300
+# Kunlik sotuvchilar reytingi guruhlarga shu vaqtda ("HH:MM") yuboriladi; "" — o'chirilgan
+LEADERBOARD_POST_TIME = "21:00"
+
+# Loglash: standart daraja va modul bo'yicha istisnolar (bot modullari fayl nomi, kutubxonalar logger nomi bilan)
+LOG_LEVEL = "INFO"
+LOG_LEVELS = {
+	# Har bir update uchun "Update id=... is handled" yozadi; vaqtlar metrikalarda bor
+	"aiogram.event": "WARNING",
+}
+# Aylanuvchi log fayli ("" — faqat konsol); worker'lar bot-worker-N.log ga yozadi
+LOG_FILE = "bot.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
 
 
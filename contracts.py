@@ -0,0 +1,61 @@
+import logging
+
+from bloom import BloomFilter
+from shared_state import shared_state
+from database import normalize_contract_id, count_contract_ids, iter_contract_ids, find_reports_by_contract
+
+# Filtr sig'imi: kamida shuncha, jadval kattalashsa — mavjud yozuvlarning ikki barobari
+MIN_FILTER_CAPACITY = 100_000
+
+_contract_filter: BloomFilter | None = None
+
+async def warm_contract_filter():
+	"""Bot ishga tushganda barcha shartnoma ID'larini Bloom filtriga yuklaydi"""
+	global _contract_filter
+	
+	total = await count_contract_ids()
+	contract_filter = BloomFilter(max(MIN_FILTER_CAPACITY, total * 2))
+	for chunk in iter_contract_ids():
+		for contract_id_norm in chunk:
+			contract_filter.add(contract_id_norm)
+	
+	_contract_filter = contract_filter
+	logging.info(f"📄 Shartnoma filtri tayyor: {contract_filter.count} ta ID")
+
+def remember_contract(contract_id: str):
+	"""Yangi hisobot saqlangandan keyin filtrni yangilash"""
+	contract_id_norm = normalize_contract_id(contract_id)
+	_add_to_filter(contract_id_norm)
+	# Boshqa worker jarayonlarining filtrlari ham yangilanadi, aks holda ular takrorni "yo'q" deb o'tkazib yuboradi
+	shared_state.publish("contract", contract_id_norm)
+
+def _add_to_filter(contract_id_norm: str | None):
+	if _contract_filter is None or not contract_id_norm:
+		return
+	
+	_contract_filter.add(contract_id_norm)
+	if _contract_filter.is_saturated:
+		logging.warning("📄 Shartnoma filtri to'lib qoldi, keyingi ishga tushishda kattaroq quriladi")
+
+shared_state.subscribe("contract", _add_to_filter)
+
+async def find_duplicate_contract(contract_id: str, exclude_report_id: int = None,
+                                  statuses: tuple = ('pending', 'confirmed')) -> tuple | None:
+	"""
+	Shu shartnoma bo'yicha boshqa (rad etilmagan) hisobotni qaytaradi: (id, sotuvchi, holat, sana).
+	Filtr "yo'q" desa bazaga umuman murojaat qilinmaydi.
+	"""
+	contract_id_norm = normalize_contract_id(contract_id)
+	if not contract_id_norm:
+		return None
+	
+	if _contract_filter is None:
+		await warm_contract_filter()
+	
+	if contract_id_norm not in _contract_filter:
+		return None
+	
+	for report in await find_reports_by_contract(contract_id_norm, statuses):
+		if report[0] != exclude_report_id:
+			return report
+	return None
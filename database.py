@@ -1,13 +1,82 @@
 import sqlite3
 import logging
+import json
+import re
+import sys
+import time
 from datetime import datetime, date
 
+from cache import seller_profile_cache, user_status_cache, leaderboard_cache
+from regions import normalize_region, UNKNOWN_REGION
+from metrics import TimedConnection
+from config import WORKER_COUNT
+
 DB_NAME = 'bot_data.db'
 
+# Hisobot tuple'lari shu tartibda qaytadi; yangi ustunlar qo'shilsa ham unpack buzilmaydi
+REPORT_TUPLE_COLUMNS = (
+	"id, user_telegram_id, client_name, phone_number, additional_phone_number, contract_id, "
+	"product_type, client_location, product_image_id, submission_date, submission_timestamp, "
+	"status, confirmed_by_helper_id, confirmation_timestamp, group_message_id, google_sheet_id"
+)
+
+EXPORT_CHUNK_SIZE = 500
+
+def connect_db() -> sqlite3.Connection:
+	# Ulanish yopilganda vaqti chaqirgan funksiya nomi bilan metrikalarga yoziladi
+	conn = sqlite3.connect(DB_NAME, factory=TimedConnection)
+	conn.operation = sys._getframe(1).f_code.co_name
+	return conn
+
+def normalize_contract_id(contract_id: str) -> str:
+	# 'sh-2024/001 ' va 'SH 2024 001' bir xil: faqat harf-raqamlar, katta harflarda
+	return re.sub(r'[\W_]+', '', contract_id or '').upper()
+
+def invalidate_seller_profile(telegram_id: int = None):
+	# telegram_id noma'lum bo'lsa (masalan, group_message_id bo'yicha yangilash) butun kesh tozalanadi
+	if telegram_id is None:
+		seller_profile_cache.clear()
+	else:
+		seller_profile_cache.invalidate(telegram_id)
+	publish_shared_event("seller_profile", telegram_id)
+
+def invalidate_leaderboard(rows=(), status: str = None):
+	# Reyting faqat tasdiqlangan hisobotlardan tuziladi: tasdiqlash, tasdiqni bekor qilish va o'chirishda tozalanadi
+	if status != 'confirmed' and not any(row[3] == 'confirmed' for row in rows):
+		return
+	leaderboard_cache.clear()
+	publish_shared_event("leaderboard")
+
+def invalidate_user_status(telegram_id: int):
+	seller_profile_cache.invalidate(telegram_id)
+	user_status_cache.invalidate(telegram_id)
+	publish_shared_event("user_status", telegram_id)
+
+def publish_shared_event(channel: str, key=None):
+	# Faqat bir nechta worker jarayoni bo'lsa kerak: boshqa jarayonlar keshlarini shu jurnal orqali yangilaydi
+	if WORKER_COUNT <= 1:
+		return
+	
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(
+			"INSERT INTO shared_events (channel, event_key, created_at) VALUES (?, ?, ?)",
+			(channel, None if key is None else str(key), time.time())
+		)
+		conn.commit()
+	except Exception as e:
+		logging.error(f"Error publishing shared event {channel}: {e}")
+	finally:
+		conn.close()
+
 def init_db():
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	
+	# Bir nechta jarayon bir vaqtda yozganda o'quvchilar bloklanmasin (tranzaksiyadan tashqarida o'rnatiladi)
+	cursor.execute("PRAGMA journal_mode=WAL").fetchone()
+	
 	cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -68,6 +137,80 @@ def init_db():
 	except sqlite3.OperationalError:
 		pass
 	
+	try:
+		cursor.execute("ALTER TABLE sales_reports ADD COLUMN group_id INTEGER")
+		logging.info("Added group_id column to sales_reports table")
+	except sqlite3.OperationalError:
+		pass
+	
+	try:
+		cursor.execute("ALTER TABLE sales_reports ADD COLUMN region TEXT")
+		logging.info("Added region column to sales_reports table")
+	except sqlite3.OperationalError:
+		pass
+	
+	# Albom bilan yuborilgan hisobotlar: barcha rasm file_id'lari va guruhdagi albom xabarlari (JSON ro'yxat)
+	try:
+		cursor.execute("ALTER TABLE sales_reports ADD COLUMN product_image_ids TEXT")
+		logging.info("Added product_image_ids column to sales_reports table")
+	except sqlite3.OperationalError:
+		pass
+	
+	try:
+		cursor.execute("ALTER TABLE sales_reports ADD COLUMN group_album_message_ids TEXT")
+		logging.info("Added group_album_message_ids column to sales_reports table")
+	except sqlite3.OperationalError:
+		pass
+	
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_reports_region_date ON sales_reports (region, submission_date)")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_reports_group_message ON sales_reports (group_message_id)")
+	cursor.execute(
+		"CREATE INDEX IF NOT EXISTS idx_sales_reports_user_timestamp ON sales_reports (user_telegram_id, submission_timestamp)"
+	)
+	
+	try:
+		cursor.execute("ALTER TABLE sales_reports ADD COLUMN contract_id_norm TEXT")
+		logging.info("Added contract_id_norm column to sales_reports table")
+	except sqlite3.OperationalError:
+		pass
+	
+	cursor.execute("SELECT id, contract_id FROM sales_reports WHERE contract_id_norm IS NULL AND contract_id IS NOT NULL")
+	missing_contracts = cursor.fetchall()
+	if missing_contracts:
+		cursor.executemany(
+			"UPDATE sales_reports SET contract_id_norm = ? WHERE id = ?",
+			[(normalize_contract_id(contract_id), report_id) for report_id, contract_id in missing_contracts]
+		)
+		logging.info(f"Backfilled contract_id_norm for {len(missing_contracts)} sales reports")
+	
+	cursor.execute(
+		"CREATE INDEX IF NOT EXISTS idx_sales_reports_contract_norm ON sales_reports (contract_id_norm, status)"
+	)
+	
+	# Tasdiqlangan hisobot Sheets'ga yozilganmi; yozilmaganlari qayta ishga tushishda qayta yuboriladi
+	try:
+		cursor.execute("ALTER TABLE sales_reports ADD COLUMN sheet_synced INTEGER DEFAULT 0")
+		# Ustun qo'shilishidan oldin tasdiqlangan hisobotlar allaqachon yozilgan deb hisoblanadi
+		cursor.execute("UPDATE sales_reports SET sheet_synced = 1 WHERE status = 'confirmed'")
+		logging.info("Added sheet_synced column to sales_reports table")
+	except sqlite3.OperationalError:
+		pass
+	
+	cursor.execute(
+		"CREATE INDEX IF NOT EXISTS idx_sales_reports_sheet_outbox ON sales_reports (confirmation_timestamp) "
+		"WHERE status = 'confirmed' AND sheet_synced = 0"
+	)
+	
+	# Eski hisobotlar uchun hududni manzildan bir marta hisoblab qo'yish
+	cursor.execute("SELECT id, client_location FROM sales_reports WHERE region IS NULL")
+	missing_regions = cursor.fetchall()
+	if missing_regions:
+		cursor.executemany(
+			"UPDATE sales_reports SET region = ? WHERE id = ?",
+			[(normalize_region(location or ''), report_id) for report_id, location in missing_regions]
+		)
+		logging.info(f"Backfilled region for {len(missing_regions)} sales reports")
+	
 	cursor.execute('''
         CREATE TABLE IF NOT EXISTS telegram_groups (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -109,6 +252,20 @@ def init_db():
 	except sqlite3.OperationalError:
 		pass
 	
+	cursor.execute('''
+        CREATE TABLE IF NOT EXISTS google_sheet_tabs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            google_sheet_id INTEGER NOT NULL,
+            worksheet_name TEXT NOT NULL,
+            period_key TEXT,
+            row_count INTEGER DEFAULT 0,
+            is_active INTEGER DEFAULT 1,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (google_sheet_id, worksheet_name),
+            FOREIGN KEY (google_sheet_id) REFERENCES google_sheets (id)
+        )
+    ''')
+	
 	cursor.execute('''
         CREATE TABLE IF NOT EXISTS bot_settings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -120,12 +277,155 @@ def init_db():
 	
 	cursor.execute("INSERT OR IGNORE INTO bot_settings (setting_key, setting_value) VALUES ('admin_password', '2025')")
 	
+	cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            storage_key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            updated_at REAL NOT NULL
+        )
+    ''')
+	
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated_at ON fsm_storage (updated_at)")
+	
+	# Jarayonlararo umumiy holat: kalit-qiymat (TTL bilan) va keshlarni bekor qilish jurnali
+	cursor.execute('''
+        CREATE TABLE IF NOT EXISTS shared_kv (
+            state_key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            expires_at REAL
+        )
+    ''')
+	
+	cursor.execute('''
+        CREATE TABLE IF NOT EXISTS shared_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT NOT NULL,
+            event_key TEXT,
+            created_at REAL NOT NULL
+        )
+    ''')
+	
+	# Kunlik yig'indilar: hisobot qo'shilishi, holati o'zgarishi va o'chirilishida shu tranzaksiyada yangilanadi.
+	# Guruhi yozilmagan eski hisobotlar 0-guruhga tushadi
+	cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'report_daily_stats'")
+	daily_stats_exists = cursor.fetchone() is not None
+	cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_daily_stats (
+            stat_date TEXT NOT NULL,
+            group_id INTEGER NOT NULL,
+            user_telegram_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            reports_count INTEGER NOT NULL DEFAULT 0,
+            amount_total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (stat_date, group_id, user_telegram_id, status)
+        )
+    ''')
+	cursor.execute(
+		"CREATE INDEX IF NOT EXISTS idx_report_daily_stats_user ON report_daily_stats (user_telegram_id, stat_date)"
+	)
+	
+	# Ommaviy xabarlar: last_user_id — users.id bo'yicha keyset kursori (davom ettirish nuqtasi)
+	cursor.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER NOT NULL,
+            source_chat_id INTEGER NOT NULL,
+            source_message_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            total INTEGER NOT NULL DEFAULT 0,
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+	
+	cursor.execute('''
+        CREATE TABLE IF NOT EXISTS broadcast_results (
+            broadcast_id INTEGER NOT NULL,
+            telegram_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            PRIMARY KEY (broadcast_id, telegram_id)
+        )
+    ''')
+	
 	conn.commit()
 	conn.close()
+	
+	if not daily_stats_exists:
+		rebuild_report_daily_stats()
 	logging.info(f"Database '{DB_NAME}' initialized successfully with all tables.")
 
+# Rollup kaliti (sana, guruh, sotuvchi, holat) va summa — _adjust_daily_stats shu tartibni kutadi
+DAILY_STATS_SOURCE = "submission_date, COALESCE(group_id, 0), user_telegram_id, status, contract_amount"
+
+def parse_amount(value) -> int:
+	"""analytics.parse_amounts'ning bitta qiymat uchun varianti: "5.000.000 so'm" -> 5000000, yaroqsizi 0"""
+	cleaned = str(value or '').replace("so'm", '')
+	for separator in ('.', ',', ' '):
+		cleaned = cleaned.replace(separator, '')
+	return int(cleaned) if cleaned.isdigit() and len(cleaned) <= 18 else 0
+
+def _select_daily_stats_source(cursor, where: str, params) -> list:
+	cursor.execute(f"SELECT {DAILY_STATS_SOURCE} FROM sales_reports WHERE {where}", params)
+	return cursor.fetchall()
+
+def _adjust_daily_stats(cursor, rows, sign: int):
+	"""Hisobot qatorlarini rollup'ga qo'shadi (sign=1) yoki ayiradi (sign=-1); commit chaqiruvchida"""
+	deltas = {}
+	for stat_date, group_id, user_telegram_id, status, amount in rows:
+		key = (str(stat_date), group_id, user_telegram_id, status or 'pending')
+		count, total = deltas.get(key, (0, 0))
+		deltas[key] = (count + sign, total + sign * parse_amount(amount))
+	cursor.executemany("""
+        INSERT INTO report_daily_stats (stat_date, group_id, user_telegram_id, status, reports_count, amount_total)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (stat_date, group_id, user_telegram_id, status) DO UPDATE SET
+            reports_count = reports_count + excluded.reports_count,
+            amount_total = amount_total + excluded.amount_total
+    """, [(*key, count, total) for key, (count, total) in deltas.items()])
+	if sign < 0:
+		cursor.executemany("""
+            DELETE FROM report_daily_stats
+            WHERE stat_date = ? AND group_id = ? AND user_telegram_id = ? AND status = ? AND reports_count <= 0
+        """, list(deltas))
+
+def rebuild_report_daily_stats(batch_size: int = EXPORT_CHUNK_SIZE) -> int:
+	"""Rollup'ni sales_reports'dan qaytadan hisoblaydi; yozish qulfi ostida, shuning uchun parallel yozuvlar yo'qolmaydi"""
+	conn = connect_db()
+	read_cursor = conn.cursor()
+	write_cursor = conn.cursor()
+	try:
+		write_cursor.execute("BEGIN IMMEDIATE")
+		write_cursor.execute("DELETE FROM report_daily_stats")
+		read_cursor.execute(f"SELECT {DAILY_STATS_SOURCE} FROM sales_reports")
+		reports = 0
+		while True:
+			rows = read_cursor.fetchmany(batch_size)
+			if not rows:
+				break
+			_adjust_daily_stats(write_cursor, rows, 1)
+			reports += len(rows)
+		conn.commit()
+		leaderboard_cache.clear()
+		publish_shared_event("leaderboard")
+		write_cursor.execute("SELECT COUNT(*) FROM report_daily_stats")
+		stat_rows = write_cursor.fetchone()[0]
+		logging.info(f"Rebuilt report_daily_stats: {reports} reports -> {stat_rows} rows")
+		return stat_rows
+	except Exception as e:
+		logging.error(f"Error rebuilding report_daily_stats: {e}")
+		conn.rollback()
+		return -1
+	finally:
+		conn.close()
+
 async def add_user_to_db(telegram_id: int, full_name: str, assigned_group_id: int = None):
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute(
@@ -133,6 +433,7 @@ async def add_user_to_db(telegram_id: int, full_name: str, assigned_group_id: in
 			(telegram_id, full_name, assigned_group_id)
 		)
 		conn.commit()
+		invalidate_user_status(telegram_id)
 		logging.info(f"User {telegram_id} added to database with group {assigned_group_id}.")
 	except sqlite3.IntegrityError:
 		logging.warning(f"User {telegram_id} already exists in database.")
@@ -140,7 +441,7 @@ async def add_user_to_db(telegram_id: int, full_name: str, assigned_group_id: in
 		conn.close()
 
 async def check_user_exists(telegram_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	cursor.execute("SELECT 1 FROM users WHERE telegram_id = ?", (telegram_id,))
 	result = cursor.fetchone()
@@ -148,7 +449,7 @@ async def check_user_exists(telegram_id: int) -> bool:
 	return result is not None
 
 async def check_user_blocked(telegram_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT is_blocked FROM users WHERE telegram_id = ?", (telegram_id,))
@@ -160,8 +461,21 @@ async def check_user_blocked(telegram_id: int) -> bool:
 	finally:
 		conn.close()
 
+async def get_user_status(telegram_id: int) -> tuple | None:
+	# UserGateMiddleware uchun: (full_name, is_blocked, assigned_group_id) yoki ro'yxatdan o'tmagan bo'lsa None
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(
+			"SELECT full_name, COALESCE(is_blocked, 0), assigned_group_id FROM users WHERE telegram_id = ?",
+			(telegram_id,)
+		)
+		return cursor.fetchone()
+	finally:
+		conn.close()
+
 async def get_user_assigned_group(telegram_id: int) -> tuple | None:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("""
@@ -179,12 +493,13 @@ async def get_user_assigned_group(telegram_id: int) -> tuple | None:
 		conn.close()
 
 async def block_user(telegram_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("UPDATE users SET is_blocked = 1 WHERE telegram_id = ?", (telegram_id,))
 		updated = cursor.rowcount > 0
 		conn.commit()
+		invalidate_user_status(telegram_id)
 		if updated:
 			logging.info(f"User {telegram_id} blocked successfully.")
 		return updated
@@ -196,12 +511,13 @@ async def block_user(telegram_id: int) -> bool:
 		conn.close()
 
 async def unblock_user(telegram_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("UPDATE users SET is_blocked = 0 WHERE telegram_id = ?", (telegram_id,))
 		updated = cursor.rowcount > 0
 		conn.commit()
+		invalidate_user_status(telegram_id)
 		if updated:
 			logging.info(f"User {telegram_id} unblocked successfully.")
 		return updated
@@ -213,7 +529,7 @@ async def unblock_user(telegram_id: int) -> bool:
 		conn.close()
 
 async def get_users_paginated(page: int = 1, per_page: int = 10) -> tuple:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT COUNT(*) FROM users")
@@ -240,7 +556,7 @@ async def get_users_paginated(page: int = 1, per_page: int = 10) -> tuple:
 		conn.close()
 
 async def check_full_name_exists(full_name: str) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT 1 FROM users WHERE LOWER(full_name) = LOWER(?)", (full_name,))
@@ -253,10 +569,12 @@ async def check_full_name_exists(full_name: str) -> bool:
 		conn.close()
 
 async def get_user_reports_count(telegram_id: int) -> int:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
-		cursor.execute("SELECT COUNT(*) FROM sales_reports WHERE user_telegram_id = ?", (telegram_id,))
+		cursor.execute(
+			"SELECT COALESCE(SUM(reports_count), 0) FROM report_daily_stats WHERE user_telegram_id = ?", (telegram_id,)
+		)
 		result = cursor.fetchone()
 		return result[0] if result else 0
 	except Exception as e:
@@ -265,8 +583,9 @@ async def get_user_reports_count(telegram_id: int) -> int:
 	finally:
 		conn.close()
 
-async def add_sales_report(user_id: int, report_data: dict, group_msg_id: int = None, google_sheet_id: int = None):
-	conn = sqlite3.connect(DB_NAME)
+async def add_sales_report(user_id: int, report_data: dict, group_msg_id: int = None, google_sheet_id: int = None,
+                           group_id: int = None):
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		# Avval jadvalga contract_amount ustunini qo'shish
@@ -279,26 +598,33 @@ async def add_sales_report(user_id: int, report_data: dict, group_msg_id: int =
 		cursor.execute("""
             INSERT INTO sales_reports (
                 user_telegram_id, client_name, phone_number, additional_phone_number,
-                contract_id, contract_amount, product_type, client_location, product_image_id,
-                submission_date, group_message_id, google_sheet_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                contract_id, contract_id_norm, contract_amount, product_type, client_location, region,
+                product_image_id, product_image_ids, submission_date, group_message_id, google_sheet_id, group_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
 			user_id,
 			report_data.get('client_name'),
 			report_data.get('phone_number'),
 			report_data.get('additional_phone_number', 'Mavjud emas'),
 			report_data.get('contract_id'),
+			normalize_contract_id(report_data.get('contract_id')) or None,
 			report_data.get('contract_amount'),
 			report_data.get('product_type'),
 			report_data.get('client_location'),
+			normalize_region(report_data.get('client_location') or ''),
 			report_data.get('product_image_id'),
+			json.dumps(report_data.get('product_image_ids') or [report_data.get('product_image_id')]),
 			date.today(),
 			group_msg_id,
-			google_sheet_id
+			google_sheet_id,
+			group_id
 		))
+		report_id = cursor.lastrowid
+		_adjust_daily_stats(cursor, _select_daily_stats_source(cursor, "id = ?", (report_id,)), 1)
 		conn.commit()
+		invalidate_seller_profile(user_id)
 		logging.info(f"Sales report for user {user_id} added to database.")
-		return cursor.lastrowid
+		return report_id
 	except Exception as e:
 		logging.error(f"Error adding sales report to DB: {e}")
 		return None
@@ -306,7 +632,7 @@ async def add_sales_report(user_id: int, report_data: dict, group_msg_id: int =
 		conn.close()
 
 async def get_todays_sales_by_user(user_telegram_id: int) -> list:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	today_str = date.today().isoformat()
 	try:
@@ -323,16 +649,23 @@ async def get_todays_sales_by_user(user_telegram_id: int) -> list:
 		conn.close()
 
 async def update_report_status_in_db(group_message_id: int, status: str, helper_id: int = None):
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
+		cursor.execute("BEGIN IMMEDIATE")
+		previous = _select_daily_stats_source(cursor, "group_message_id = ?", (group_message_id,))
 		cursor.execute("""
             UPDATE sales_reports
             SET status = ?, confirmed_by_helper_id = ?, confirmation_timestamp = ?
             WHERE group_message_id = ?
         """, (status, helper_id, datetime.now(), group_message_id))
+		updated = cursor.rowcount
+		_adjust_daily_stats(cursor, previous, -1)
+		_adjust_daily_stats(cursor, [(*row[:3], status, row[4]) for row in previous], 1)
 		conn.commit()
-		if cursor.rowcount > 0:
+		invalidate_seller_profile()
+		invalidate_leaderboard(previous, status)
+		if updated > 0:
 			logging.info(f"Report status updated to '{status}' for group_message_id {group_message_id}.")
 			return True
 		else:
@@ -344,8 +677,142 @@ async def update_report_status_in_db(group_message_id: int, status: str, helper_
 	finally:
 		conn.close()
 
+async def update_report_status_by_id(report_id: int, status: str, helper_id: int = None,
+                                     expected_status: str = None) -> bool:
+	"""expected_status berilsa, yangilash faqat hisobot shu holatda bo'lganda bajariladi"""
+	conn = connect_db()
+	cursor = conn.cursor()
+	query = """
+        UPDATE sales_reports
+        SET status = ?, confirmed_by_helper_id = ?, confirmation_timestamp = ?
+        WHERE id = ?
+    """
+	params = [status, helper_id, datetime.now(), report_id]
+	where, where_params = "id = ?", [report_id]
+	if expected_status:
+		query += " AND status = ?"
+		params.append(expected_status)
+		where += " AND status = ?"
+		where_params.append(expected_status)
+	try:
+		cursor.execute("BEGIN IMMEDIATE")
+		previous = _select_daily_stats_source(cursor, where, where_params)
+		cursor.execute(query, params)
+		updated = cursor.rowcount
+		_adjust_daily_stats(cursor, previous, -1)
+		_adjust_daily_stats(cursor, [(*row[:3], status, row[4]) for row in previous], 1)
+		conn.commit()
+		invalidate_leaderboard(previous, status)
+		if updated > 0:
+			cursor.execute("SELECT user_telegram_id FROM sales_reports WHERE id = ?", (report_id,))
+			invalidate_seller_profile(cursor.fetchone()[0])
+			logging.info(f"Report status updated to '{status}' for report {report_id}.")
+			return True
+		logging.warning(f"No report found to update status for report {report_id}.")
+		return False
+	except Exception as e:
+		logging.error(f"Error updating report status in DB: {e}")
+		return False
+	finally:
+		conn.close()
+
+async def confirm_report_by_id(report_id: int, helper_id: int = None) -> tuple:
+	"""
+	'pending' hisobotni tasdiqlaydi, agar shu shartnoma boshqa hisobotda tasdiqlanmagan bo'lsa.
+	Tekshiruv va yangilash bitta BEGIN IMMEDIATE tranzaksiyasida — bir shartnomani ikki hisobot
+	bir vaqtda tasdiqlay olmaydi. (tasdiqlandimi, takroriy hisobot (id, sotuvchi, holat, sana) yoki None)
+	"""
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("BEGIN IMMEDIATE")
+		cursor.execute("""
+            SELECT sr.id, COALESCE(u.full_name, ''), sr.status, sr.submission_date
+            FROM sales_reports cur
+            JOIN sales_reports sr ON sr.contract_id_norm = cur.contract_id_norm AND sr.id != cur.id
+            LEFT JOIN users u ON sr.user_telegram_id = u.telegram_id
+            WHERE cur.id = ? AND sr.status = 'confirmed'
+            ORDER BY sr.id
+            LIMIT 1
+        """, (report_id,))
+		duplicate = cursor.fetchone()
+		if duplicate:
+			conn.rollback()
+			logging.warning(f"Report {report_id} not confirmed: contract already confirmed in report {duplicate[0]}.")
+			return False, duplicate
+		
+		previous = _select_daily_stats_source(cursor, "id = ? AND status = 'pending'", (report_id,))
+		cursor.execute("""
+            UPDATE sales_reports
+            SET status = 'confirmed', confirmed_by_helper_id = ?, confirmation_timestamp = ?, sheet_synced = 0
+            WHERE id = ? AND status = 'pending'
+        """, (helper_id, datetime.now(), report_id))
+		updated = cursor.rowcount
+		_adjust_daily_stats(cursor, previous, -1)
+		_adjust_daily_stats(cursor, [(*row[:3], 'confirmed', row[4]) for row in previous], 1)
+		conn.commit()
+		invalidate_leaderboard(previous, 'confirmed')
+		if updated > 0:
+			cursor.execute("SELECT user_telegram_id FROM sales_reports WHERE id = ?", (report_id,))
+			invalidate_seller_profile(cursor.fetchone()[0])
+			logging.info(f"Report status updated to 'confirmed' for report {report_id}.")
+			return True, None
+		logging.warning(f"No pending report found to confirm for report {report_id}.")
+		return False, None
+	except Exception as e:
+		logging.error(f"Error confirming report {report_id}: {e}")
+		return False, None
+	finally:
+		conn.close()
+
+async def mark_report_sheet_synced(report_id: int) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("UPDATE sales_reports SET sheet_synced = 1 WHERE id = ?", (report_id,))
+		conn.commit()
+		return cursor.rowcount > 0
+	except Exception as e:
+		logging.error(f"Error marking report {report_id} as synced: {e}")
+		return False
+	finally:
+		conn.close()
+
+async def get_unsynced_report_ids(confirmed_before: datetime, limit: int = 100) -> list:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("""
+            SELECT id FROM sales_reports
+            WHERE status = 'confirmed' AND sheet_synced = 0 AND confirmation_timestamp < ?
+            ORDER BY confirmation_timestamp
+            LIMIT ?
+        """, (confirmed_before, limit))
+		return [row[0] for row in cursor.fetchall()]
+	except Exception as e:
+		logging.error(f"Error getting unsynced reports: {e}")
+		return []
+	finally:
+		conn.close()
+
+async def set_report_group_message(report_id: int, group_message_id: int, album_message_ids: list = None) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(
+			"UPDATE sales_reports SET group_message_id = ?, group_album_message_ids = ? WHERE id = ?",
+			(group_message_id, json.dumps(album_message_ids) if album_message_ids else None, report_id)
+		)
+		conn.commit()
+		return cursor.rowcount > 0
+	except Exception as e:
+		logging.error(f"Error setting group message for report {report_id}: {e}")
+		return False
+	finally:
+		conn.close()
+
 async def get_all_users() -> list:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute(
@@ -359,9 +826,12 @@ async def get_all_users() -> list:
 		conn.close()
 
 async def delete_user_from_db(telegram_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
+		cursor.execute("BEGIN IMMEDIATE")
+		deleted_reports = _select_daily_stats_source(cursor, "user_telegram_id = ?", (telegram_id,))
+		_adjust_daily_stats(cursor, deleted_reports, -1)
 		cursor.execute("DELETE FROM sales_reports WHERE user_telegram_id = ?", (telegram_id,))
 		reports_deleted = cursor.rowcount
 		logging.info(f"{reports_deleted} reports deleted for user {telegram_id}.")
@@ -369,6 +839,8 @@ async def delete_user_from_db(telegram_id: int) -> bool:
 		cursor.execute("DELETE FROM users WHERE telegram_id = ?", (telegram_id,))
 		user_deleted = cursor.rowcount > 0
 		conn.commit()
+		invalidate_user_status(telegram_id)
+		invalidate_leaderboard(deleted_reports)
 		if user_deleted:
 			logging.info(f"User {telegram_id} deleted from database.")
 		return user_deleted
@@ -380,7 +852,7 @@ async def delete_user_from_db(telegram_id: int) -> bool:
 		conn.close()
 
 async def get_all_sales_reports() -> list:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT * FROM sales_reports ORDER BY submission_timestamp DESC")
@@ -393,12 +865,17 @@ async def get_all_sales_reports() -> list:
 		conn.close()
 
 async def delete_sales_report(report_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
+		cursor.execute("BEGIN IMMEDIATE")
+		deleted_reports = _select_daily_stats_source(cursor, "id = ?", (report_id,))
+		_adjust_daily_stats(cursor, deleted_reports, -1)
 		cursor.execute("DELETE FROM sales_reports WHERE id = ?", (report_id,))
 		deleted = cursor.rowcount > 0
 		conn.commit()
+		invalidate_seller_profile()
+		invalidate_leaderboard(deleted_reports)
 		if deleted:
 			logging.info(f"Sales report {report_id} deleted from database.")
 		return deleted
@@ -411,7 +888,7 @@ async def delete_sales_report(report_id: int) -> bool:
 
 async def add_telegram_group(group_id: int, group_name: str, message_thread_id: int = None,
                              google_sheet_id: int = None) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute(
@@ -432,7 +909,7 @@ async def add_telegram_group(group_id: int, group_name: str, message_thread_id:
 		conn.close()
 
 async def get_all_telegram_groups() -> list:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("""
@@ -451,7 +928,7 @@ async def get_all_telegram_groups() -> list:
 		conn.close()
 
 async def get_telegram_group_by_id(group_id: int) -> tuple | None:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("""
@@ -470,7 +947,7 @@ async def get_telegram_group_by_id(group_id: int) -> tuple | None:
 		conn.close()
 
 async def delete_telegram_group(group_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("UPDATE users SET assigned_group_id = NULL WHERE assigned_group_id = ?", (group_id,))
@@ -488,7 +965,7 @@ async def delete_telegram_group(group_id: int) -> bool:
 		conn.close()
 
 async def add_google_sheet(sheet_name: str, spreadsheet_id: str, worksheet_name: str = 'Sheet1') -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute(
@@ -509,7 +986,7 @@ async def add_google_sheet(sheet_name: str, spreadsheet_id: str, worksheet_name:
 		conn.close()
 
 async def get_all_google_sheets() -> list:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute(
@@ -523,7 +1000,7 @@ async def get_all_google_sheets() -> list:
 		conn.close()
 
 async def get_google_sheet_by_id(sheet_id: int) -> tuple | None:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute(
@@ -538,7 +1015,7 @@ async def get_google_sheet_by_id(sheet_id: int) -> tuple | None:
 		conn.close()
 
 async def delete_google_sheet(sheet_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("UPDATE telegram_groups SET google_sheet_id = NULL WHERE google_sheet_id = ?", (sheet_id,))
@@ -556,7 +1033,7 @@ async def delete_google_sheet(sheet_id: int) -> bool:
 		conn.close()
 
 async def get_user_by_telegram_id(telegram_id: int) -> tuple | None:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("""
@@ -576,19 +1053,19 @@ async def get_user_by_telegram_id(telegram_id: int) -> tuple | None:
 		conn.close()
 
 async def get_reports_by_user(telegram_id: int, limit: int = None) -> list:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		if limit:
-			cursor.execute("""
-                SELECT * FROM sales_reports
+			cursor.execute(f"""
+                SELECT {REPORT_TUPLE_COLUMNS} FROM sales_reports
                 WHERE user_telegram_id = ?
                 ORDER BY submission_timestamp DESC
                 LIMIT ?
             """, (telegram_id, limit))
 		else:
-			cursor.execute("""
-                SELECT * FROM sales_reports
+			cursor.execute(f"""
+                SELECT {REPORT_TUPLE_COLUMNS} FROM sales_reports
                 WHERE user_telegram_id = ?
                 ORDER BY submission_timestamp DESC
             """, (telegram_id,))
@@ -601,7 +1078,7 @@ async def get_reports_by_user(telegram_id: int, limit: int = None) -> list:
 		conn.close()
 
 async def get_reports_by_status(status: str) -> list:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT * FROM sales_reports WHERE status = ? ORDER BY submission_timestamp DESC", (status,))
@@ -614,16 +1091,18 @@ async def get_reports_by_status(status: str) -> list:
 		conn.close()
 
 async def get_reports_count_by_date(start_date: str, end_date: str = None) -> int:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		if end_date:
 			cursor.execute("""
-                SELECT COUNT(*) FROM sales_reports
-                WHERE submission_date BETWEEN ? AND ?
+                SELECT COALESCE(SUM(reports_count), 0) FROM report_daily_stats
+                WHERE stat_date BETWEEN ? AND ?
             """, (start_date, end_date))
 		else:
-			cursor.execute("SELECT COUNT(*) FROM sales_reports WHERE submission_date = ?", (start_date,))
+			cursor.execute(
+				"SELECT COALESCE(SUM(reports_count), 0) FROM report_daily_stats WHERE stat_date = ?", (start_date,)
+			)
 		result = cursor.fetchone()
 		return result[0] if result else 0
 	except Exception as e:
@@ -633,7 +1112,7 @@ async def get_reports_count_by_date(start_date: str, end_date: str = None) -> in
 		conn.close()
 
 async def get_total_users_count() -> int:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT COUNT(*) FROM users")
@@ -646,10 +1125,10 @@ async def get_total_users_count() -> int:
 		conn.close()
 
 async def get_total_reports_count() -> int:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
-		cursor.execute("SELECT COUNT(*) FROM sales_reports")
+		cursor.execute("SELECT COALESCE(SUM(reports_count), 0) FROM report_daily_stats")
 		result = cursor.fetchone()
 		return result[0] if result else 0
 	except Exception as e:
@@ -659,10 +1138,10 @@ async def get_total_reports_count() -> int:
 		conn.close()
 
 async def get_confirmed_reports_count() -> int:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
-		cursor.execute("SELECT COUNT(*) FROM sales_reports WHERE status = 'confirmed'")
+		cursor.execute("SELECT COALESCE(SUM(reports_count), 0) FROM report_daily_stats WHERE status = 'confirmed'")
 		result = cursor.fetchone()
 		return result[0] if result else 0
 	except Exception as e:
@@ -672,10 +1151,10 @@ async def get_confirmed_reports_count() -> int:
 		conn.close()
 
 async def get_pending_reports_count() -> int:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
-		cursor.execute("SELECT COUNT(*) FROM sales_reports WHERE status = 'pending'")
+		cursor.execute("SELECT COALESCE(SUM(reports_count), 0) FROM report_daily_stats WHERE status = 'pending'")
 		result = cursor.fetchone()
 		return result[0] if result else 0
 	except Exception as e:
@@ -685,12 +1164,13 @@ async def get_pending_reports_count() -> int:
 		conn.close()
 
 async def update_user_name(telegram_id: int, new_name: str) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("UPDATE users SET full_name = ? WHERE telegram_id = ?", (new_name, telegram_id))
 		updated = cursor.rowcount > 0
 		conn.commit()
+		invalidate_user_status(telegram_id)
 		if updated:
 			logging.info(f"User {telegram_id} name updated to {new_name}.")
 		return updated
@@ -702,12 +1182,13 @@ async def update_user_name(telegram_id: int, new_name: str) -> bool:
 		conn.close()
 
 async def update_user_group(telegram_id: int, group_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("UPDATE users SET assigned_group_id = ? WHERE telegram_id = ?", (group_id, telegram_id))
 		updated = cursor.rowcount > 0
 		conn.commit()
+		invalidate_user_status(telegram_id)
 		if updated:
 			logging.info(f"User {telegram_id} group updated to {group_id}.")
 		return updated
@@ -742,7 +1223,7 @@ async def get_database_stats() -> dict:
 		return {}
 
 async def get_current_password() -> str:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT setting_value FROM bot_settings WHERE setting_key = 'admin_password'")
@@ -755,7 +1236,7 @@ async def get_current_password() -> str:
 		conn.close()
 
 async def update_password(new_password: str) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("""
@@ -773,7 +1254,7 @@ async def update_password(new_password: str) -> bool:
 		conn.close()
 
 async def get_group_google_sheet(group_id: int) -> tuple | None:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("""
@@ -791,7 +1272,7 @@ async def get_group_google_sheet(group_id: int) -> tuple | None:
 		conn.close()
 
 async def update_group_google_sheet(group_id: int, google_sheet_id: int) -> bool:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("UPDATE telegram_groups SET google_sheet_id = ? WHERE group_id = ?", (google_sheet_id, group_id))
@@ -808,7 +1289,7 @@ async def update_group_google_sheet(group_id: int, google_sheet_id: int) -> bool
 		conn.close()
 
 async def get_report_sender_by_message_id(group_message_id: int) -> int | None:
-	conn = sqlite3.connect(DB_NAME)
+	conn = connect_db()
 	cursor = conn.cursor()
 	try:
 		cursor.execute("SELECT user_telegram_id FROM sales_reports WHERE group_message_id = ?", (group_message_id,))
@@ -819,3 +1300,699 @@ async def get_report_sender_by_message_id(group_message_id: int) -> int | None:
 		return None
 	finally:
 		conn.close()
+
+
+def _export_filters(group_id: int = None, start_date: str = None, end_date: str = None) -> tuple:
+	conditions = ["sr.status = 'confirmed'"]
+	params = []
+	if group_id:
+		conditions.append("COALESCE(sr.group_id, u.assigned_group_id) = ?")
+		params.append(group_id)
+	if start_date:
+		conditions.append("sr.submission_date >= ?")
+		params.append(start_date)
+	if end_date:
+		conditions.append("sr.submission_date <= ?")
+		params.append(end_date)
+	return " AND ".join(conditions), params
+
+async def count_reports_for_export(group_id: int = None, start_date: str = None, end_date: str = None) -> int:
+	conn = connect_db()
+	cursor = conn.cursor()
+	where, params = _export_filters(group_id, start_date, end_date)
+	try:
+		cursor.execute(f"""
+            SELECT COUNT(*) FROM sales_reports sr
+            LEFT JOIN users u ON sr.user_telegram_id = u.telegram_id
+            WHERE {where}
+        """, params)
+		result = cursor.fetchone()
+		return result[0] if result else 0
+	except Exception as e:
+		logging.error(f"Error counting reports for export: {e}")
+		return 0
+	finally:
+		conn.close()
+
+def iter_reports_for_export(group_id: int = None, start_date: str = None, end_date: str = None,
+                            chunk_size: int = EXPORT_CHUNK_SIZE):
+	"""
+	Tasdiqlangan hisobotlarni id bo'yicha keyset sahifalab, chunk_size'dan oshmaydigan
+	bo'laklarda qaytaradi. Xotirada bir vaqtda faqat bitta bo'lak turadi.
+	"""
+	where, params = _export_filters(group_id, start_date, end_date)
+	last_id = 0
+	while True:
+		conn = connect_db()
+		conn.row_factory = sqlite3.Row
+		try:
+			cursor = conn.execute(f"""
+                SELECT sr.id, sr.client_name, sr.phone_number, sr.product_type, sr.client_location,
+                       sr.contract_id, sr.contract_amount, sr.submission_date, sr.submission_timestamp,
+                       COALESCE(u.full_name, '') AS sender_full_name
+                FROM sales_reports sr
+                LEFT JOIN users u ON sr.user_telegram_id = u.telegram_id
+                WHERE {where} AND sr.id > ?
+                ORDER BY sr.id ASC
+                LIMIT ?
+            """, (*params, last_id, chunk_size))
+			chunk = [dict(row) for row in cursor.fetchall()]
+		finally:
+			conn.close()
+		
+		if not chunk:
+			return
+		last_id = chunk[-1]['id']
+		yield chunk
+		if len(chunk) < chunk_size:
+			return
+
+async def get_active_sheet_tab(google_sheet_id: int) -> tuple | None:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("""
+            SELECT id, worksheet_name, period_key, row_count
+            FROM google_sheet_tabs
+            WHERE google_sheet_id = ? AND is_active = 1
+            ORDER BY id DESC
+            LIMIT 1
+        """, (google_sheet_id,))
+		return cursor.fetchone()
+	except Exception as e:
+		logging.error(f"Error getting active tab for Google Sheet {google_sheet_id}: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def activate_sheet_tab(google_sheet_id: int, worksheet_name: str, period_key: str = None,
+                             row_count: int = 0) -> int | None:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("UPDATE google_sheet_tabs SET is_active = 0 WHERE google_sheet_id = ?", (google_sheet_id,))
+		cursor.execute("""
+            INSERT INTO google_sheet_tabs (google_sheet_id, worksheet_name, period_key, row_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (google_sheet_id, worksheet_name) DO UPDATE SET is_active = 1, row_count = excluded.row_count
+        """, (google_sheet_id, worksheet_name, period_key, row_count))
+		cursor.execute(
+			"SELECT id FROM google_sheet_tabs WHERE google_sheet_id = ? AND worksheet_name = ?",
+			(google_sheet_id, worksheet_name)
+		)
+		tab_id = cursor.fetchone()[0]
+		conn.commit()
+		logging.info(f"Google Sheet {google_sheet_id} active tab set to '{worksheet_name}'.")
+		return tab_id
+	except Exception as e:
+		logging.error(f"Error activating tab '{worksheet_name}' for Google Sheet {google_sheet_id}: {e}")
+		conn.rollback()
+		return None
+	finally:
+		conn.close()
+
+async def add_sheet_tab_rows(tab_id: int, count: int) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("UPDATE google_sheet_tabs SET row_count = row_count + ? WHERE id = ?", (count, tab_id))
+		conn.commit()
+		return cursor.rowcount > 0
+	except Exception as e:
+		logging.error(f"Error updating row count for sheet tab {tab_id}: {e}")
+		conn.rollback()
+		return False
+	finally:
+		conn.close()
+
+async def set_sheet_tab_rows(tab_id: int, row_count: int) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("UPDATE google_sheet_tabs SET row_count = ? WHERE id = ?", (row_count, tab_id))
+		conn.commit()
+		return cursor.rowcount > 0
+	except Exception as e:
+		logging.error(f"Error setting row count for sheet tab {tab_id}: {e}")
+		conn.rollback()
+		return False
+	finally:
+		conn.close()
+
+async def get_sheet_tabs(google_sheet_id: int) -> list:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("""
+            SELECT id, worksheet_name, period_key, row_count, is_active
+            FROM google_sheet_tabs
+            WHERE google_sheet_id = ?
+            ORDER BY id ASC
+        """, (google_sheet_id,))
+		return cursor.fetchall()
+	except Exception as e:
+		logging.error(f"Error fetching tabs for Google Sheet {google_sheet_id}: {e}")
+		return []
+	finally:
+		conn.close()
+
+def _daily_stats_filter(start_date: str = None, end_date: str = None, group_id: int = None,
+                        user_telegram_id: int = None, statuses: tuple = None) -> tuple:
+	conditions, params = [], []
+	if start_date:
+		conditions.append("ds.stat_date >= ?")
+		params.append(start_date)
+	if end_date:
+		conditions.append("ds.stat_date <= ?")
+		params.append(end_date)
+	if group_id is not None:
+		conditions.append("ds.group_id = ?")
+		params.append(group_id)
+	if user_telegram_id is not None:
+		conditions.append("ds.user_telegram_id = ?")
+		params.append(user_telegram_id)
+	if statuses:
+		conditions.append(f"ds.status IN ({', '.join('?' * len(statuses))})")
+		params.extend(statuses)
+	return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+async def get_daily_stats_totals(start_date: str = None, end_date: str = None, group_id: int = None,
+                                 user_telegram_id: int = None) -> dict:
+	"""Rollup jadvalidan: {holat: (hisobotlar soni, summa)}"""
+	conn = connect_db()
+	cursor = conn.cursor()
+	where, params = _daily_stats_filter(start_date, end_date, group_id, user_telegram_id)
+	try:
+		cursor.execute(f"""
+            SELECT ds.status, SUM(ds.reports_count), SUM(ds.amount_total)
+            FROM report_daily_stats ds
+            {where}
+            GROUP BY ds.status
+        """, params)
+		return {status: (count, amount) for status, count, amount in cursor.fetchall() if count}
+	except Exception as e:
+		logging.error(f"Error fetching daily stats totals: {e}")
+		return {}
+	finally:
+		conn.close()
+
+async def get_seller_stats(start_date: str = None, end_date: str = None, group_id: int = None,
+                           statuses: tuple = None, limit: int = None, by_amount: bool = False) -> list:
+	"""Rollup jadvalidan sotuvchilar reytingi: (telegram_id, ism, soni, summa), soni (yoki summa) bo'yicha kamayish tartibida"""
+	conn = connect_db()
+	cursor = conn.cursor()
+	where, params = _daily_stats_filter(start_date, end_date, group_id, statuses=statuses)
+	query = f"""
+        SELECT ds.user_telegram_id, COALESCE(u.full_name, ''), SUM(ds.reports_count) AS reports_count,
+               SUM(ds.amount_total) AS amount_total
+        FROM report_daily_stats ds
+        LEFT JOIN users u ON u.telegram_id = ds.user_telegram_id
+        {where}
+        GROUP BY ds.user_telegram_id
+        HAVING reports_count > 0
+        ORDER BY {'amount_total DESC, reports_count DESC' if by_amount else 'reports_count DESC, amount_total DESC'}
+    """
+	if limit:
+		query += " LIMIT ?"
+		params.append(limit)
+	try:
+		cursor.execute(query, params)
+		return cursor.fetchall()
+	except Exception as e:
+		logging.error(f"Error fetching seller stats: {e}")
+		return []
+	finally:
+		conn.close()
+
+async def get_region_stats(start_date: str = None, end_date: str = None, limit: int = None) -> list:
+	conn = connect_db()
+	cursor = conn.cursor()
+	conditions = []
+	params = [UNKNOWN_REGION]
+	if start_date:
+		conditions.append("submission_date >= ?")
+		params.append(start_date)
+	if end_date:
+		conditions.append("submission_date <= ?")
+		params.append(end_date)
+	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+	query = f"""
+        SELECT COALESCE(region, ?), COUNT(*) AS reports_count
+        FROM sales_reports
+        {where}
+        GROUP BY region
+        ORDER BY reports_count DESC
+    """
+	if limit:
+		query += " LIMIT ?"
+		params.append(limit)
+	try:
+		cursor.execute(query, params)
+		return cursor.fetchall()
+	except Exception as e:
+		logging.error(f"Error fetching region stats: {e}")
+		return []
+	finally:
+		conn.close()
+
+async def get_fsm_record(storage_key: str) -> tuple | None:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("SELECT state, data, updated_at FROM fsm_storage WHERE storage_key = ?", (storage_key,))
+		return cursor.fetchone()
+	except Exception as e:
+		logging.error(f"Error fetching FSM record {storage_key}: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def save_fsm_records(records: list, deleted_keys: list) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		if records:
+			cursor.executemany("""
+                INSERT INTO fsm_storage (storage_key, state, data, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(storage_key) DO UPDATE SET
+                    state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+            """, records)
+		if deleted_keys:
+			cursor.executemany("DELETE FROM fsm_storage WHERE storage_key = ?", [(key,) for key in deleted_keys])
+		conn.commit()
+		return True
+	except Exception as e:
+		logging.error(f"Error saving FSM records: {e}")
+		return False
+	finally:
+		conn.close()
+
+async def delete_expired_fsm_records(cutoff: float) -> int:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("DELETE FROM fsm_storage WHERE updated_at < ?", (cutoff,))
+		conn.commit()
+		return cursor.rowcount
+	except Exception as e:
+		logging.error(f"Error deleting expired FSM records: {e}")
+		return 0
+	finally:
+		conn.close()
+
+REPORT_DETAIL_COLUMNS = [
+	'id', 'user_telegram_id', 'sender_full_name', 'client_name', 'phone_number', 'additional_phone_number',
+	'contract_id', 'contract_amount', 'product_type', 'client_location', 'product_image_id', 'submission_date',
+	'submission_timestamp', 'status', 'group_message_id', 'google_sheet_id', 'group_id', 'product_image_ids',
+	'group_album_message_ids'
+]
+
+REPORT_DETAIL_QUERY = """
+    SELECT sr.id, sr.user_telegram_id, u.full_name, sr.client_name, sr.phone_number, sr.additional_phone_number,
+           sr.contract_id, sr.contract_amount, sr.product_type, sr.client_location, sr.product_image_id,
+           sr.submission_date, sr.submission_timestamp, sr.status, sr.group_message_id, sr.google_sheet_id,
+           sr.group_id, sr.product_image_ids, sr.group_album_message_ids
+    FROM sales_reports sr
+    LEFT JOIN users u ON sr.user_telegram_id = u.telegram_id
+"""
+
+def _report_detail(row) -> dict:
+	report = dict(zip(REPORT_DETAIL_COLUMNS, row))
+	# Ustun qo'shilishidan oldingi hisobotlarda faqat bitta rasm bor
+	report['product_image_ids'] = json.loads(report['product_image_ids'] or 'null') or (
+		[report['product_image_id']] if report['product_image_id'] else []
+	)
+	report['group_album_message_ids'] = json.loads(report['group_album_message_ids'] or '[]')
+	return report
+
+async def get_report_by_id(report_id: int) -> dict | None:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(REPORT_DETAIL_QUERY + " WHERE sr.id = ?", (report_id,))
+		row = cursor.fetchone()
+		return _report_detail(row) if row else None
+	except Exception as e:
+		logging.error(f"Error getting report {report_id}: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def get_report_by_group_message(group_id: int, group_message_id: int) -> dict | None:
+	"""Tugmalarida hisobot ID'si bo'lmagan eski guruh xabarlari uchun"""
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(
+			REPORT_DETAIL_QUERY + """
+            WHERE sr.group_message_id = ? AND (sr.group_id = ? OR sr.group_id IS NULL)
+            ORDER BY sr.id DESC LIMIT 1
+        """, (group_message_id, group_id))
+		row = cursor.fetchone()
+		return _report_detail(row) if row else None
+	except Exception as e:
+		logging.error(f"Error getting report by group message {group_message_id}: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def get_seller_profile(telegram_id: int, recent_limit: int = 5) -> dict | None:
+	"""Profil, butun tarix bo'yicha holatlar soni (rollup'dan) va so'nggi faollik — bitta so'rov bilan"""
+	cached = seller_profile_cache.get(telegram_id)
+	if cached is not None:
+		return cached
+	
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("""
+            SELECT u.telegram_id, u.full_name, u.registration_date,
+                   COALESCE(u.is_blocked, 0),
+                   COALESCE(tg.group_name, 'Guruh tayinlanmagan'),
+                   COALESCE(SUM(ds.reports_count), 0),
+                   COALESCE(SUM(CASE WHEN ds.status = 'confirmed' THEN ds.reports_count END), 0),
+                   COALESCE(SUM(CASE WHEN ds.status = 'pending' THEN ds.reports_count END), 0),
+                   COALESCE(SUM(CASE WHEN ds.status = 'rejected' THEN ds.reports_count END), 0),
+                   (SELECT MAX(submission_timestamp) FROM sales_reports WHERE user_telegram_id = u.telegram_id)
+            FROM users u
+            LEFT JOIN telegram_groups tg ON u.assigned_group_id = tg.group_id
+            LEFT JOIN report_daily_stats ds ON ds.user_telegram_id = u.telegram_id
+            WHERE u.telegram_id = ?
+            GROUP BY u.id
+        """, (telegram_id,))
+		row = cursor.fetchone()
+		if not row:
+			return None
+		
+		cursor.execute(f"""
+            SELECT {REPORT_TUPLE_COLUMNS} FROM sales_reports
+            WHERE user_telegram_id = ?
+            ORDER BY submission_timestamp DESC
+            LIMIT ?
+        """, (telegram_id, recent_limit))
+		recent_reports = cursor.fetchall()
+		
+		profile = {
+			'telegram_id': row[0],
+			'full_name': row[1],
+			'reg_date': row[2],
+			'is_blocked': row[3],
+			'group_name': row[4],
+			'total_reports': row[5],
+			'confirmed_count': row[6],
+			'pending_count': row[7],
+			'rejected_count': row[8],
+			'last_activity': row[9],
+			'recent_reports': recent_reports
+		}
+		seller_profile_cache.set(telegram_id, profile)
+		return profile
+	except Exception as e:
+		logging.error(f"Error fetching seller profile {telegram_id}: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def count_contract_ids() -> int:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("SELECT COUNT(*) FROM sales_reports WHERE contract_id_norm IS NOT NULL")
+		return cursor.fetchone()[0]
+	except Exception as e:
+		logging.error(f"Error counting contract ids: {e}")
+		return 0
+	finally:
+		conn.close()
+
+def iter_contract_ids(chunk_size: int = 10000):
+	"""Rad etilmagan hisobotlarning normallashtirilgan shartnoma ID'lari, bo'laklab (indeks bo'yicha)"""
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("""
+            SELECT contract_id_norm FROM sales_reports
+            WHERE contract_id_norm IS NOT NULL AND status != 'rejected'
+        """)
+		while True:
+			rows = cursor.fetchmany(chunk_size)
+			if not rows:
+				break
+			yield [row[0] for row in rows]
+	except Exception as e:
+		logging.error(f"Error iterating contract ids: {e}")
+	finally:
+		conn.close()
+
+async def find_reports_by_contract(contract_id_norm: str, statuses: tuple = ('pending', 'confirmed')) -> list:
+	conn = connect_db()
+	cursor = conn.cursor()
+	placeholders = ", ".join("?" for _ in statuses)
+	try:
+		cursor.execute(f"""
+            SELECT sr.id, COALESCE(u.full_name, ''), sr.status, sr.submission_date
+            FROM sales_reports sr
+            LEFT JOIN users u ON sr.user_telegram_id = u.telegram_id
+            WHERE sr.contract_id_norm = ? AND sr.status IN ({placeholders})
+            ORDER BY sr.id
+        """, (contract_id_norm, *statuses))
+		return cursor.fetchall()
+	except Exception as e:
+		logging.error(f"Error finding reports by contract {contract_id_norm}: {e}")
+		return []
+	finally:
+		conn.close()
+
+async def get_shared_events(after_id: int, limit: int = 500) -> list:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(
+			"SELECT id, channel, event_key FROM shared_events WHERE id > ? ORDER BY id LIMIT ?",
+			(after_id, limit)
+		)
+		return cursor.fetchall()
+	except Exception as e:
+		logging.error(f"Error getting shared events: {e}")
+		return []
+	finally:
+		conn.close()
+
+async def get_last_shared_event_id() -> int:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("SELECT COALESCE(MAX(id), 0) FROM shared_events")
+		return cursor.fetchone()[0]
+	except Exception as e:
+		logging.error(f"Error getting last shared event id: {e}")
+		return 0
+	finally:
+		conn.close()
+
+async def delete_shared_events_before(cutoff: float) -> int:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("DELETE FROM shared_events WHERE created_at < ?", (cutoff,))
+		deleted = cursor.rowcount
+		cursor.execute("DELETE FROM shared_kv WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+		conn.commit()
+		return deleted
+	except Exception as e:
+		logging.error(f"Error deleting old shared events: {e}")
+		return 0
+	finally:
+		conn.close()
+
+async def get_shared_value(state_key: str) -> str | None:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(
+			"SELECT value FROM shared_kv WHERE state_key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+			(state_key, time.time())
+		)
+		row = cursor.fetchone()
+		return row[0] if row else None
+	except Exception as e:
+		logging.error(f"Error getting shared value {state_key}: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def get_shared_values(prefix: str) -> dict:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(
+			"SELECT state_key, value FROM shared_kv WHERE state_key LIKE ? AND (expires_at IS NULL OR expires_at >= ?)",
+			(prefix + '%', time.time())
+		)
+		return dict(cursor.fetchall())
+	except Exception as e:
+		logging.error(f"Error getting shared values {prefix}: {e}")
+		return {}
+	finally:
+		conn.close()
+
+async def set_shared_value(state_key: str, value: str, expires_at: float = None) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("""
+            INSERT INTO shared_kv (state_key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(state_key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+        """, (state_key, value, expires_at))
+		conn.commit()
+		return True
+	except Exception as e:
+		logging.error(f"Error setting shared value {state_key}: {e}")
+		return False
+	finally:
+		conn.close()
+
+async def delete_shared_value(state_key: str) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("DELETE FROM shared_kv WHERE state_key = ?", (state_key,))
+		conn.commit()
+		return cursor.rowcount > 0
+	except Exception as e:
+		logging.error(f"Error deleting shared value {state_key}: {e}")
+		return False
+	finally:
+		conn.close()
+
+BROADCAST_COLUMNS = [
+	'id', 'admin_id', 'source_chat_id', 'source_message_id', 'status', 'total', 'last_user_id',
+	'sent', 'failed', 'blocked', 'created_at', 'finished_at'
+]
+
+async def count_broadcast_recipients() -> int:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("SELECT COUNT(*) FROM users WHERE is_blocked = 0")
+		return cursor.fetchone()[0]
+	except Exception as e:
+		logging.error(f"Error counting broadcast recipients: {e}")
+		return 0
+	finally:
+		conn.close()
+
+def iter_broadcast_recipients(broadcast_id: int, after_user_id: int = 0, chunk_size: int = EXPORT_CHUNK_SIZE):
+	"""
+	Bloklanmagan foydalanuvchilar users.id bo'yicha keyset sahifalab, (id, telegram_id) bo'laklarida.
+	Shu xabar allaqachon yuborilganlar (natijasi yozilgan) o'tkazib yuboriladi — davom ettirishda takror bo'lmaydi.
+	"""
+	last_id = after_user_id
+	while True:
+		conn = connect_db()
+		try:
+			cursor = conn.execute("""
+                SELECT u.id, u.telegram_id
+                FROM users u
+                LEFT JOIN broadcast_results br ON br.broadcast_id = ? AND br.telegram_id = u.telegram_id
+                WHERE u.is_blocked = 0 AND u.id > ? AND br.telegram_id IS NULL
+                ORDER BY u.id ASC
+                LIMIT ?
+            """, (broadcast_id, last_id, chunk_size))
+			chunk = cursor.fetchall()
+		finally:
+			conn.close()
+		
+		if not chunk:
+			return
+		last_id = chunk[-1][0]
+		yield chunk
+		if len(chunk) < chunk_size:
+			return
+
+async def create_broadcast(admin_id: int, source_chat_id: int, source_message_id: int, total: int) -> int | None:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("""
+            INSERT INTO broadcasts (admin_id, source_chat_id, source_message_id, total)
+            VALUES (?, ?, ?, ?)
+        """, (admin_id, source_chat_id, source_message_id, total))
+		conn.commit()
+		logging.info(f"Broadcast {cursor.lastrowid} created by {admin_id} for {total} recipients")
+		return cursor.lastrowid
+	except Exception as e:
+		logging.error(f"Error creating broadcast: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def get_broadcast(broadcast_id: int) -> dict | None:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute(f"SELECT {', '.join(BROADCAST_COLUMNS)} FROM broadcasts WHERE id = ?", (broadcast_id,))
+		row = cursor.fetchone()
+		return dict(zip(BROADCAST_COLUMNS, row)) if row else None
+	except Exception as e:
+		logging.error(f"Error getting broadcast {broadcast_id}: {e}")
+		return None
+	finally:
+		conn.close()
+
+async def get_running_broadcast_ids() -> list:
+	conn = connect_db()
+	cursor = conn.cursor()
+	try:
+		cursor.execute("SELECT id FROM broadcasts WHERE status = 'running' ORDER BY id")
+		return [row[0] for row in cursor.fetchall()]
+	except Exception as e:
+		logging.error(f"Error getting running broadcasts: {e}")
+		return []
+	finally:
+		conn.close()
+
+async def save_broadcast_checkpoint(broadcast_id: int, last_user_id: int, results: list) -> bool:
+	"""results: [(telegram_id, status, error)] — natijalar va kursor bitta tranzaksiyada yoziladi"""
+	conn = connect_db()
+	cursor = conn.cursor()
+	counts = {'sent': 0, 'failed': 0, 'blocked': 0}
+	try:
+		# Qayta ishga tushishda allaqachon yozilgan natijalar o'tkazib yuboriladi — hisoblagichlarga
+		# faqat haqiqatan qo'shilgan qatorlar qo'shiladi, aks holda jami 'total'dan oshib ketadi
+		for telegram_id, status, error in results:
+			cursor.execute(
+				"INSERT OR IGNORE INTO broadcast_results (broadcast_id, telegram_id, status, error) VALUES (?, ?, ?, ?)",
+				(broadcast_id, telegram_id, status, error)
+			)
+			counts[status] += cursor.rowcount
+		cursor.execute("""
+            UPDATE broadcasts
+            SET last_user_id = MAX(last_user_id, ?), sent = sent + ?, failed = failed + ?, blocked = blocked + ?
+            WHERE id = ?
+        """, (last_user_id, counts['sent'], counts['failed'], counts['blocked'], broadcast_id))
+		conn.commit()
+		return True
+	except Exception as e:
+		logging.error(f"Error saving broadcast checkpoint {broadcast_id}: {e}")
+		return False
+	finally:
+		conn.close()
+
+async def set_broadcast_status(broadcast_id: int, status: str, expected_status: str = None) -> bool:
+	conn = connect_db()
+	cursor = conn.cursor()
+	query = "UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ?"
+	params = [status, datetime.now() if status != 'running' else None, broadcast_id]
+	if expected_status:
+		query += " AND status = ?"
+		params.append(expected_status)
+	try:
+		cursor.execute(query, params)
+		conn.commit()
+		return cursor.rowcount > 0
+	except Exception as e:
+		logging.error(f"Error setting broadcast {broadcast_id} status: {e}")
+		return False
+	finally:
+		conn.close()
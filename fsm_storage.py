@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from config import FSM_FLUSH_INTERVAL, FSM_DRAFT_TTL_HOURS
+from database import get_fsm_record, save_fsm_records, delete_expired_fsm_records
+
+# Xotiradagi yozuv shuncha soniya ishlatilmasa keshdan chiqariladi (bazada qoladi)
+CACHE_IDLE_SECONDS = 15 * 60
+# Eskirgan qoralamalarni tozalash oralig'i
+EVICTION_INTERVAL = 10 * 60
+
+class _Entry:
+	__slots__ = ('state', 'data', 'updated_at', 'last_access')
+	
+	def __init__(self, state: str | None, data: Dict[str, Any], updated_at: float):
+		self.state = state
+		self.data = data
+		self.updated_at = updated_at
+		self.last_access = time.monotonic()
+
+class SQLiteStorage(BaseStorage):
+	"""
+	bot_data.db dagi fsm_storage jadvaliga yoziladigan FSM storage.
+	O'qishlar xotiradagi keshdan, yozuvlar esa "iflos" deb belgilanib, FSM_FLUSH_INTERVAL
+	ichida bitta tranzaksiyada yoziladi. FSM_DRAFT_TTL_HOURS dan eski qoralamalar o'chiriladi.
+	"""
+	
+	def __init__(self, flush_interval: float = FSM_FLUSH_INTERVAL, draft_ttl_hours: float = FSM_DRAFT_TTL_HOURS):
+		self.flush_interval = flush_interval
+		self.draft_ttl = draft_ttl_hours * 3600
+		self._cache: Dict[str, _Entry] = {}
+		self._dirty = set()
+		self._flush_handle = None
+		self._maintenance_task = None
+		self._closed = False
+	
+	@staticmethod
+	def _key(key: StorageKey) -> str:
+		return ":".join(str(part) for part in (
+			key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+		))
+	
+	async def _entry(self, key: StorageKey) -> _Entry:
+		storage_key = self._key(key)
+		entry = self._cache.get(storage_key)
+		if entry is None:
+			record = await get_fsm_record(storage_key)
+			if record and record[2] >= time.time() - self.draft_ttl:
+				entry = _Entry(record[0], json.loads(record[1] or '{}'), record[2])
+			else:
+				entry = _Entry(None, {}, time.time())
+			self._cache[storage_key] = entry
+		entry.last_access = time.monotonic()
+		return entry
+	
+	def _mark_dirty(self, key: StorageKey, entry: _Entry):
+		entry.updated_at = time.time()
+		self._dirty.add(self._key(key))
+		self._ensure_maintenance()
+		if self._flush_handle is None and not self._closed:
+			# Bir oraliqdagi barcha yozuvlar bitta flush'ga birlashadi
+			self._flush_handle = asyncio.get_running_loop().call_later(
+				self.flush_interval, lambda: asyncio.create_task(self.flush())
+			)
+	
+	async def get_state(self, key: StorageKey) -> str | None:
+		return (await self._entry(key)).state
+	
+	async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+		return (await self._entry(key)).data.copy()
+	
+	async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+		entry = await self._entry(key)
+		entry.state = state.state if isinstance(state, State) else state
+		self._mark_dirty(key, entry)
+	
+	async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+		entry = await self._entry(key)
+		entry.data = dict(data)
+		self._mark_dirty(key, entry)
+	
+	async def set_state_and_data(self, key: StorageKey, state: StateType, data: Mapping[str, Any]) -> None:
+		"""StateTransaction uchun: holat va ma'lumot bitta yozuv sifatida"""
+		entry = await self._entry(key)
+		entry.state = state.state if isinstance(state, State) else state
+		entry.data = dict(data)
+		self._mark_dirty(key, entry)
+	
+	async def flush(self):
+		self._flush_handle = None
+		if not self._dirty:
+			return
+		
+		dirty_keys, self._dirty = self._dirty, set()
+		records = []
+		deleted_keys = []
+		for storage_key in dirty_keys:
+			entry = self._cache.get(storage_key)
+			if entry is None:
+				continue
+			if entry.state is None and not entry.data:
+				deleted_keys.append(storage_key)
+			else:
+				records.append((storage_key, entry.state, json.dumps(entry.data, ensure_ascii=False), entry.updated_at))
+		
+		if not await save_fsm_records(records, deleted_keys):
+			# Keyingi flush'da qayta urinish
+			self._dirty |= dirty_keys
+	
+	def _ensure_maintenance(self):
+		if self._maintenance_task is None and not self._closed:
+			self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+	
+	async def _maintenance_loop(self):
+		while True:
+			await asyncio.sleep(EVICTION_INTERVAL)
+			try:
+				await self.evict()
+			except Exception as e:
+				logging.error(f"FSM storage tozalashda xatolik: {e}")
+	
+	async def evict(self):
+		"""Eskirgan qoralamalarni bazadan, uzoq ishlatilmagan yozuvlarni keshdan chiqaradi"""
+		await self.flush()
+		
+		cutoff = time.time() - self.draft_ttl
+		idle_cutoff = time.monotonic() - CACHE_IDLE_SECONDS
+		for storage_key, entry in list(self._cache.items()):
+			if storage_key not in self._dirty and (entry.updated_at < cutoff or entry.last_access < idle_cutoff):
+				del self._cache[storage_key]
+		
+		removed = await delete_expired_fsm_records(cutoff)
+		if removed:
+			logging.info(f"🧹 {removed} ta eskirgan FSM qoralamasi o'chirildi")
+	
+	async def close(self) -> None:
+		if self._closed:
+			return
+		self._closed = True
+		if self._flush_handle:
+			self._flush_handle.cancel()
+			self._flush_handle = None
+		if self._maintenance_task:
+			self._maintenance_task.cancel()
+			self._maintenance_task = None
+		await self.flush()
@@ -1,11 +1,15 @@
 import gspread
 from google.oauth2.service_account import Credentials
 import logging
-from datetime import datetime, date, timedelta
+from datetime import datetime
 import json
 import os
+import re
 from typing import Dict, List, Tuple, Optional
 
+from analytics import ReportFrame, compute_report_statistics
+from metrics import timed_dependency
+
 SCOPES = [
 	'https://www.googleapis.com/auth/spreadsheets',
 	'https://www.googleapis.com/auth/drive'
@@ -46,6 +50,7 @@ def get_google_sheets_client():
 		logging.error(f"❌ Google Sheets client yaratishda xato: {e}")
 		return None
 
+@timed_dependency("sheets")
 def get_worksheet(spreadsheet_id: str, worksheet_name: str):
 	try:
 		client = get_google_sheets_client()
@@ -125,6 +130,7 @@ def format_worksheet_headers(worksheet):
 	except Exception as e:
 		logging.error(f"❌ Sarlavhalarni formatlashda xato: {e}")
 
+@timed_dependency("sheets")
 def get_next_row_number(worksheet) -> int:
 	try:
 		all_values = worksheet.get_all_values()
@@ -142,6 +148,81 @@ def get_next_row_number(worksheet) -> int:
 		logging.error(f"❌ Tartib raqamini aniqlashda xato: {e}")
 		return 1
 
+@timed_dependency("sheets")
+def count_worksheet_rows(spreadsheet_id: str, worksheet_name: str) -> Optional[int]:
+	"""Varaqdagi ma'lumot qatorlari soni (sarlavhasiz); varaq hali yo'q bo'lsa 0, xatolikda None"""
+	try:
+		client = get_google_sheets_client()
+		if not client:
+			return None
+		
+		worksheet = client.open_by_key(spreadsheet_id).worksheet(worksheet_name)
+		return max(len(worksheet.col_values(1)) - 1, 0)
+	except gspread.WorksheetNotFound:
+		return 0
+	except Exception as e:
+		logging.error(f"❌ '{worksheet_name}' qatorlarini sanashda xato: {e}")
+		return None
+
+def build_report_row(row_number: int, report_data: dict, submitted_at: datetime = None) -> List[str]:
+	submitted_at = submitted_at or datetime.now()
+	current_date = submitted_at.strftime('%d.%m.%Y')
+	current_time = submitted_at.strftime('%H:%M')
+	
+	return [
+		str(row_number),  # A: № (Tartib raqami)
+		report_data.get('client_name') or '',  # B: Mijoz ismi
+		report_data.get('phone_number') or '',  # C: Telefon raqami
+		report_data.get('product_type') or '',  # D: Mahsulot nomi
+		'',  # E: Jo'natma turi (bo'sh)
+		report_data.get('client_location') or '',  # F: Mijoz manzili
+		current_date,  # G: Shartnoma imzolangan sana
+		f"{current_date} {current_time}",  # H: Hisobot yuborilgan sana
+		'',  # I: Yuborilgan sana (bo'sh)
+		report_data.get('contract_id') or '',  # J: Shartnoma raqami
+		report_data.get('contract_amount') or '',  # K: Shartnoma summasi
+		report_data.get('sender_full_name') or ''  # L: Sotuvchi ismi
+	]
+
+@timed_dependency("sheets")
+def append_report_rows(worksheet, rows: List[List[str]]) -> int:
+	"""
+	Bir nechta qatorni bitta append_rows so'rovi bilan qo'shadi va
+	birinchi qo'shilgan qator indeksini qaytaradi (topilmasa 0).
+	"""
+	if not rows:
+		return 0
+	
+	response = worksheet.append_rows(rows)
+	updated_range = (response or {}).get('updates', {}).get('updatedRange', '')
+	match = re.search(r"![A-Z]+(\d+)", updated_range)
+	first_row_index = int(match.group(1)) if match else 0
+	
+	if first_row_index:
+		format_rows_block(worksheet, first_row_index, first_row_index + len(rows) - 1)
+	
+	return first_row_index
+
+def format_rows_block(worksheet, first_row_index: int, last_row_index: int):
+	try:
+		last_col = chr(64 + len(COLUMN_HEADERS))
+		worksheet.format(f"A{first_row_index}:{last_col}{last_row_index}", {
+			'borders': {
+				'top': {'style': 'SOLID', 'width': 1},
+				'bottom': {'style': 'SOLID', 'width': 1},
+				'left': {'style': 'SOLID', 'width': 1},
+				'right': {'style': 'SOLID', 'width': 1}
+			}
+		})
+		worksheet.format(f"A{first_row_index}:A{last_row_index}", {
+			'horizontalAlignment': 'CENTER',
+			'textFormat': {'bold': True}
+		})
+	
+	except Exception as e:
+		logging.error(f"❌ Qatorlar blokini formatlashda xato: {e}")
+
+@timed_dependency("sheets")
 def save_report_to_sheets(spreadsheet_id: str, worksheet_name: str, report_data: dict) -> bool:
 	try:
 		worksheet = get_worksheet(spreadsheet_id, worksheet_name)
@@ -151,23 +232,7 @@ def save_report_to_sheets(spreadsheet_id: str, worksheet_name: str, report_data:
 		
 		row_number = get_next_row_number(worksheet)
 		
-		current_date = datetime.now().strftime('%d.%m.%Y')
-		current_time = datetime.now().strftime('%H:%M')
-		
-		row_data = [
-			str(row_number),  # A: № (Tartib raqami)
-			report_data.get('client_name', ''),  # B: Mijoz ismi
-			report_data.get('phone_number', ''),  # C: Telefon raqami
-			report_data.get('product_type', ''),  # D: Mahsulot nomi
-			'',  # E: Jo'natma turi (bo'sh)
-			report_data.get('client_location', ''),  # F: Mijoz manzili
-			current_date,  # G: Shartnoma imzolangan sana
-			f"{current_date} {current_time}",  # H: Hisobot yuborilgan sana
-			'',  # I: Yuborilgan sana (bo'sh)
-			report_data.get('contract_id', ''),  # J: Shartnoma raqami
-			report_data.get('contract_amount', ''),  # K: Shartnoma summasi
-			report_data.get('sender_full_name', '')  # L: Sotuvchi ismi
-		]
+		row_data = build_report_row(row_number, report_data)
 		
 		worksheet.append_row(row_data)
 		
@@ -221,6 +286,7 @@ def format_new_row(worksheet, row_index: int, row_number: int):
 	except Exception as e:
 		logging.error(f"❌ Qatorni formatlashda xato: {e}")
 
+@timed_dependency("sheets")
 def test_google_sheets_connection(spreadsheet_id: str, worksheet_name: str) -> Tuple[bool, str]:
 	try:
 		worksheet = get_worksheet(spreadsheet_id, worksheet_name)
@@ -271,16 +337,115 @@ def test_google_sheets_connection(spreadsheet_id: str, worksheet_name: str) -> T
 		logging.error(error_msg)
 		return False, error_msg
 
-def get_reports_statistics(spreadsheet_id: str, worksheet_name: str) -> Dict:
+@timed_dependency("sheets")
+def get_records_from_worksheets(spreadsheet_id: str, worksheet_names) -> Optional[List[Dict]]:
+	"""
+	Bir yoki bir nechta varaqdagi (aylantirilgan varaqlar) yozuvlarni birlashtirib qaytaradi.
+	Ulanib bo'lmasa None qaytaradi.
+	"""
+	if isinstance(worksheet_names, str):
+		worksheet_names = [worksheet_names]
+	
+	client = get_google_sheets_client()
+	if not client:
+		return None
+	
+	spreadsheet = client.open_by_key(spreadsheet_id)
+	records = []
+	for worksheet_name in worksheet_names:
+		try:
+			records.extend(spreadsheet.worksheet(worksheet_name).get_all_records())
+		except gspread.WorksheetNotFound:
+			logging.warning(f"⚠️ Varaq topilmadi, o'tkazib yuborildi: '{worksheet_name}'")
+	
+	return records
+
+def column_letter(column_index: int) -> str:
+	letters = ""
+	column_index += 1
+	while column_index:
+		column_index, remainder = divmod(column_index - 1, 26)
+		letters = chr(65 + remainder) + letters
+	return letters
+
+def quote_worksheet_name(worksheet_name: str) -> str:
+	return "'" + worksheet_name.replace("'", "''") + "'"
+
+@timed_dependency("sheets")
+def read_columns(spreadsheet_id: str, worksheet_names, column_names: List[str]) -> Optional[Dict[str, List[str]]]:
+	"""
+	Faqat kerakli ustunlarni bitta values.batchGet so'rovi bilan o'qiydi.
+	Natija: {ustun nomi: [qiymatlar]} — barcha ustunlar bir xil uzunlikda, sarlavhasiz.
+	Bir nechta varaq berilsa, ularning qiymatlari ketma-ket birlashtiriladi.
+	"""
+	if isinstance(worksheet_names, str):
+		worksheet_names = [worksheet_names]
+	
+	column_letters = []
+	for column_name in column_names:
+		if column_name not in COLUMN_HEADERS:
+			raise ValueError(f"Noma'lum ustun: {column_name}")
+		column_letters.append(column_letter(COLUMN_HEADERS.index(column_name)))
+	
+	client = get_google_sheets_client()
+	if not client:
+		return None
+	
+	def batch_get(tabs: list) -> list:
+		ranges = [
+			f"{quote_worksheet_name(tab)}!{letter}2:{letter}"
+			for tab in tabs
+			for letter in column_letters
+		]
+		# Varaq nomi diapazonning o'zida — spreadsheet metama'lumotini olmasdan bitta batchGet
+		response = client.http_client.values_batch_get(spreadsheet_id, ranges, params={'majorDimension': 'COLUMNS'})
+		return response.get('valueRanges', [])
+	
+	tabs = list(worksheet_names)
+	columns = {column_name: [] for column_name in column_names}
 	try:
-		worksheet = get_worksheet(spreadsheet_id, worksheet_name)
-		if not worksheet:
+		value_ranges = batch_get(tabs)
+	except gspread.exceptions.APIError:
+		# Varaqlardan biri yo'q bo'lsa butun so'rov rad etiladi: mavjudlarini aniqlab, qayta so'raymiz
+		existing_titles = {worksheet.title for worksheet in client.open_by_key(spreadsheet_id).worksheets()}
+		missing = [tab for tab in tabs if tab not in existing_titles]
+		if not missing:
+			raise
+		for worksheet_name in missing:
+			logging.warning(f"⚠️ Varaq topilmadi, o'tkazib yuborildi: '{worksheet_name}'")
+		tabs = [tab for tab in tabs if tab in existing_titles]
+		if not tabs:
+			return columns
+		value_ranges = batch_get(tabs)
+	
+	for tab_index in range(len(tabs)):
+		tab_ranges = value_ranges[tab_index * len(column_names):(tab_index + 1) * len(column_names)]
+		tab_columns = [(value_range.get('values') or [[]])[0] for value_range in tab_ranges]
+		tab_length = max((len(values) for values in tab_columns), default=0)
+		
+		for column_name, values in zip(column_names, tab_columns):
+			columns[column_name].extend(values)
+			# Oxiridagi bo'sh kataklar API javobida tushib qoladi — uzunliklarni tenglashtiramiz
+			columns[column_name].extend([''] * (tab_length - len(values)))
+	
+	return columns
+
+ANALYTICS_COLUMNS = ["Sotuvchi ismi", "Mahsulot nomi", "Mijoz manzili", "Hisobot yuborilgan sana"]
+
+@timed_dependency("sheets")
+def get_reports_statistics(spreadsheet_id: str, worksheet_name) -> Dict:
+	try:
+		columns = read_columns(spreadsheet_id, worksheet_name, ANALYTICS_COLUMNS + ["Shartnoma summasi"])
+		if columns is None:
 			logging.error("❌ Worksheet topilmadi")
 			return {}
 		
-		all_records = worksheet.get_all_records()
+		sellers = columns["Sotuvchi ismi"]
+		products = columns["Mahsulot nomi"]
+		locations = columns["Mijoz manzili"]
+		dates = columns["Hisobot yuborilgan sana"]
 		
-		if not all_records:
+		if not sellers:
 			logging.info("ℹ️ Google Sheets'da ma'lumotlar topilmadi")
 			return {
 				'total_reports': 0,
@@ -292,77 +457,11 @@ def get_reports_statistics(spreadsheet_id: str, worksheet_name: str) -> Dict:
 				'last_updated': datetime.now().strftime('%d.%m.%Y %H:%M:%S')
 			}
 		
-		total_reports = len(all_records)
-		sellers_stats = {}
-		monthly_stats = {}
-		daily_stats = {}
-		product_stats = {}
-		location_stats = {}
-		
-		for record in all_records:
-			seller = record.get('Sotuvchi ismi', '').strip()
-			if seller and seller != '' and 'TEST' not in seller.upper():
-				sellers_stats[seller] = sellers_stats.get(seller, 0) + 1
-			
-			product = record.get('Mahsulot nomi', '').strip()
-			if product and product != '' and 'TEST' not in product.upper():
-				product_stats[product] = product_stats.get(product, 0) + 1
-			
-			location = record.get('Mijoz manzili', '').strip()
-			if location and 'TEST' not in location.upper():
-				if 'shahar' in location.lower():
-					city = location.split('shahar')[0].strip() + ' shahar'
-				elif 'viloyat' in location.lower():
-					city = location.split('viloyat')[0].strip() + ' viloyat'
-				else:
-					city = location.split(',')[0].strip() if ',' in location else 'Boshqa'
-				
-				location_stats[city] = location_stats.get(city, 0) + 1
-			
-			try:
-				date_str = record.get('Hisobot yuborilgan sana', '').strip()
-				if date_str:
-					if ' ' in date_str:
-						date_str = date_str.split(' ')[0]
-					
-					date_obj = datetime.strptime(date_str, '%d.%m.%Y')
-					
-					month_key = date_obj.strftime('%Y-%m')
-					monthly_stats[month_key] = monthly_stats.get(month_key, 0) + 1
-					
-					day_key = date_obj.strftime('%Y-%m-%d')
-					daily_stats[day_key] = daily_stats.get(day_key, 0) + 1
-			
-			except ValueError as e:
-				logging.warning(f"⚠️ Sanani tahlil qilishda xato: {date_str} - {e}")
-				continue
-		
-		top_sellers = dict(sorted(sellers_stats.items(), key=lambda x: x[1], reverse=True)[:10])
-		
-		top_products = dict(sorted(product_stats.items(), key=lambda x: x[1], reverse=True)[:10])
-		
-		top_locations = dict(sorted(location_stats.items(), key=lambda x: x[1], reverse=True)[:10])
-		
-		today = date.today()
-		last_30_days = {}
-		for i in range(30):
-			day = today - timedelta(days=i)
-			day_key = day.strftime('%Y-%m-%d')
-			last_30_days[day_key] = daily_stats.get(day_key, 0)
-		
-		statistics = {
-			'total_reports': total_reports,
-			'sellers_stats': sellers_stats,
-			'top_sellers': top_sellers,
-			'monthly_stats': monthly_stats,
-			'daily_stats': daily_stats,
-			'last_30_days': last_30_days,
-			'product_stats': product_stats,
-			'top_products': top_products,
-			'location_stats': location_stats,
-			'top_locations': top_locations,
-			'last_updated': datetime.now().strftime('%d.%m.%Y %H:%M:%S')
-		}
+		frame = ReportFrame.from_sheet_columns(
+			sellers, products, locations, dates, columns["Shartnoma summasi"]
+		)
+		statistics = compute_report_statistics(frame)
+		total_reports = statistics['total_reports']
 		
 		logging.info(f"📊 Statistika muvaffaqiyatli olindi: {total_reports} ta yozuv")
 		return statistics
@@ -371,13 +470,13 @@ def get_reports_statistics(spreadsheet_id: str, worksheet_name: str) -> Dict:
 		logging.error(f"❌ Statistika olishda xato: {e}")
 		return {}
 
-def get_reports_by_date_range(spreadsheet_id: str, worksheet_name: str, start_date: str, end_date: str) -> List[Dict]:
+@timed_dependency("sheets")
+def get_reports_by_date_range(spreadsheet_id: str, worksheet_name, start_date: str, end_date: str) -> List[Dict]:
 	try:
-		worksheet = get_worksheet(spreadsheet_id, worksheet_name)
-		if not worksheet:
+		all_records = get_records_from_worksheets(spreadsheet_id, worksheet_name)
+		if all_records is None:
 			return []
 		
-		all_records = worksheet.get_all_records()
 		filtered_reports = []
 		
 		start_dt = datetime.strptime(start_date, '%Y-%m-%d')
@@ -404,19 +503,39 @@ def get_reports_by_date_range(spreadsheet_id: str, worksheet_name: str, start_da
 		logging.error(f"❌ Sana bo'yicha filtrlashda xato: {e}")
 		return []
 
-def get_seller_reports(spreadsheet_id: str, worksheet_name: str, seller_name: str) -> List[Dict]:
+@timed_dependency("sheets")
+def get_seller_reports(spreadsheet_id: str, worksheet_name, seller_name: str,
+                       column_names: List[str] = None) -> List[Dict]:
+	"""
+	Sotuvchining hisobotlari. Odatda to'liq qatorlar (barcha ustunlar) qaytariladi; column_names berilsa,
+	faqat shu ustunlar bitta batchGet bilan o'qiladi.
+	"""
 	try:
-		worksheet = get_worksheet(spreadsheet_id, worksheet_name)
-		if not worksheet:
-			return []
-		
-		all_records = worksheet.get_all_records()
 		seller_reports = []
+		seller_name_lower = seller_name.lower()
 		
-		for record in all_records:
-			record_seller = record.get('Sotuvchi ismi', '').strip()
-			if record_seller.lower() == seller_name.lower():
-				seller_reports.append(record)
+		if column_names is None:
+			all_records = get_records_from_worksheets(spreadsheet_id, worksheet_name)
+			if all_records is None:
+				return []
+			
+			for record in all_records:
+				if str(record.get('Sotuvchi ismi', '')).strip().lower() == seller_name_lower:
+					seller_reports.append(record)
+		else:
+			column_names = list(column_names)
+			if "Sotuvchi ismi" not in column_names:
+				column_names.insert(0, "Sotuvchi ismi")
+			
+			columns = read_columns(spreadsheet_id, worksheet_name, column_names)
+			if columns is None:
+				return []
+			
+			for row_index, record_seller in enumerate(columns["Sotuvchi ismi"]):
+				if record_seller.strip().lower() == seller_name_lower:
+					seller_reports.append({
+						column_name: columns[column_name][row_index] for column_name in column_names
+					})
 		
 		logging.info(f"👤 Sotuvchi '{seller_name}' uchun {len(seller_reports)} ta hisobot topildi")
 		return seller_reports
@@ -425,6 +544,7 @@ def get_seller_reports(spreadsheet_id: str, worksheet_name: str, seller_name: st
 		logging.error(f"❌ Sotuvchi hisobotlarini olishda xato: {e}")
 		return []
 
+@timed_dependency("sheets")
 def update_contract_amount(spreadsheet_id: str, worksheet_name: str, contract_id: str, amount: str) -> bool:
 	try:
 		worksheet = get_worksheet(spreadsheet_id, worksheet_name)
@@ -465,6 +585,7 @@ def update_contract_amount(spreadsheet_id: str, worksheet_name: str, contract_id
 		logging.error(f"❌ Summa yangilashda xato: {e}")
 		return False
 
+@timed_dependency("sheets")
 def clear_test_data(spreadsheet_id: str, worksheet_name: str) -> bool:
 	try:
 		worksheet = get_worksheet(spreadsheet_id, worksheet_name)
@@ -515,6 +636,7 @@ def renumber_rows(worksheet):
 	except Exception as e:
 		logging.error(f"❌ Qator raqamlarini yangilashda xato: {e}")
 
+@timed_dependency("sheets")
 def get_sheet_info(spreadsheet_id: str) -> Dict:
 	try:
 		client = get_google_sheets_client()
@@ -570,17 +692,3 @@ def handle_sheets_errors(func):
 	
 	
 	return wrapper
-
-logging.basicConfig(
-	level=logging.INFO,
-	format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-	handlers=[
-		logging.StreamHandler(),
-		logging.FileHandler('google_sheets.log', encoding='utf-8')
-	]
-)
-
-logging.info("🚀 Google Sheets Integration moduli muvaffaqiyatli yuklandi")
-logging.info("📊 Ma'lumotlar saqlash tartibi: Birinchi hisobot #1 (eng tepada), keyingisi #2 (pastda)")
-logging.info(
-	"📋 Ustunlar: № | Mijoz | Telefon | Mahsulot | Jo'natma | Manzil | Sana | Hisobot | Yuborilgan | Shartnoma | Summa | Sotuvchi")
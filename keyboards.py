@@ -72,6 +72,9 @@ def get_admin_menu_inline_keyboard() -> InlineKeyboardMarkup:
 			InlineKeyboardButton(text="🔐 Parolni o'zgartirish", callback_data="admin_change_password"),
 			InlineKeyboardButton(text="⚙️ Sozlamalar", callback_data="admin_settings")
 		],
+		[
+			InlineKeyboardButton(text="📣 Xabar yuborish", callback_data="admin_broadcast")
+		],
 		[
 			InlineKeyboardButton(text="🔙 Asosiy menyu", callback_data="admin_exit")
 		]
@@ -84,6 +87,21 @@ def get_admin_cancel_inline_keyboard() -> InlineKeyboardMarkup:
 	]
 	return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+def get_broadcast_confirm_keyboard() -> InlineKeyboardMarkup:
+	buttons = [
+		[
+			InlineKeyboardButton(text="✅ Yuborish", callback_data="broadcast_confirm"),
+			InlineKeyboardButton(text="🚫 Bekor qilish", callback_data="cancel_admin_action")
+		]
+	]
+	return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+def get_broadcast_progress_keyboard(broadcast_id: int) -> InlineKeyboardMarkup:
+	buttons = [
+		[InlineKeyboardButton(text="⏹ To'xtatish", callback_data=f"broadcast_cancel_{broadcast_id}")]
+	]
+	return InlineKeyboardMarkup(inline_keyboard=buttons)
+
 def get_workers_list_keyboard(workers: list, page: int = 1) -> InlineKeyboardMarkup:
 	buttons = []
 	
@@ -196,12 +214,29 @@ def get_sheet_management_keyboard(sheet_id: int) -> InlineKeyboardMarkup:
 			InlineKeyboardButton(text="🗑️ O'chirish", callback_data=f"sheet_delete_{sheet_id}"),
 			InlineKeyboardButton(text="🔄 Yangilash", callback_data=f"sheet_update_{sheet_id}")
 		],
+		[
+			InlineKeyboardButton(text="📤 Tarixni eksport qilish", callback_data=f"sheet_export_{sheet_id}")
+		],
 		[
 			InlineKeyboardButton(text="🔙 Sheetlar ro'yxati", callback_data="sheets_list")
 		]
 	]
 	return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+def get_export_group_selection_keyboard(groups: list, sheet_id: int) -> InlineKeyboardMarkup:
+	buttons = [[InlineKeyboardButton(text="🌐 Barcha guruhlar", callback_data=f"export_group_{sheet_id}_0")]]
+	
+	for group in groups:
+		db_id, group_id, group_name, topic_id, google_sheet_id, sheet_name = group
+		buttons.append([InlineKeyboardButton(
+			text=f"📁 {group_name}",
+			callback_data=f"export_group_{sheet_id}_{group_id}"
+		)])
+	
+	buttons.append([InlineKeyboardButton(text="🚫 Bekor qilish", callback_data="cancel_admin_action")])
+	
+	return InlineKeyboardMarkup(inline_keyboard=buttons)
+
 def get_google_sheets_selection_keyboard(sheets: list) -> InlineKeyboardMarkup:
 	buttons = []
 	
@@ -242,7 +277,7 @@ def get_reports_stats_keyboard() -> InlineKeyboardMarkup:
 	buttons = [
 		[
 			InlineKeyboardButton(text="📅 Oylik hisobot", callback_data="reports_monthly"),
-			InlineKeyboardButton(text="👥 Sotuvchilar", callback_data="reports_sellers")
+			InlineKeyboardButton(text="🏆 Sotuvchilar reytingi", callback_data="reports_sellers")
 		],
 		[
 			InlineKeyboardButton(text="📊 Umumiy statistika", callback_data="reports_general"),
@@ -254,6 +289,44 @@ def get_reports_stats_keyboard() -> InlineKeyboardMarkup:
 	]
 	return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+def get_leaderboard_keyboard(period: str, metric: str, group_id: int = 0) -> InlineKeyboardMarkup:
+	# callback: leaderboard_{davr}_{ko'rsatkich}_{guruh} (0 — barcha guruhlar)
+	period_names = {"today": "Bugun", "week": "Hafta", "month": "Oy"}
+	metric_names = {"count": "📝 Soni", "amount": "💰 Summa"}
+	buttons = [
+		[
+			InlineKeyboardButton(
+				text=f"✅ {name}" if key == period else name,
+				callback_data=f"leaderboard_{key}_{metric}_{group_id}"
+			)
+			for key, name in period_names.items()
+		],
+		[
+			InlineKeyboardButton(
+				text=f"✅ {name}" if key == metric else name,
+				callback_data=f"leaderboard_{period}_{key}_{group_id}"
+			)
+			for key, name in metric_names.items()
+		],
+		[InlineKeyboardButton(text="👥 Guruhni tanlash", callback_data=f"leaderboard_groups_{period}_{metric}")],
+		[InlineKeyboardButton(text="🔙 Hisobotlar", callback_data="admin_reports")]
+	]
+	return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+def get_leaderboard_groups_keyboard(groups: list, period: str, metric: str) -> InlineKeyboardMarkup:
+	buttons = [[InlineKeyboardButton(text="🌐 Barcha guruhlar", callback_data=f"leaderboard_{period}_{metric}_0")]]
+	
+	for group in groups:
+		db_id, group_id, group_name, topic_id, google_sheet_id, sheet_name = group
+		buttons.append([InlineKeyboardButton(
+			text=f"📁 {group_name}",
+			callback_data=f"leaderboard_{period}_{metric}_{group_id}"
+		)])
+	
+	buttons.append([InlineKeyboardButton(text="🔙 Hisobotlar", callback_data="admin_reports")])
+	
+	return InlineKeyboardMarkup(inline_keyboard=buttons)
+
 def get_worker_sales_back_keyboard(telegram_id: int) -> InlineKeyboardMarkup:
 	buttons = [
 		[InlineKeyboardButton(text="🔙 Ishchi ma'lumotlari", callback_data=f"worker_select_{telegram_id}")]
@@ -288,6 +361,15 @@ def get_settings_keyboard() -> InlineKeyboardMarkup:
 	]
 	return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+def get_system_info_keyboard() -> InlineKeyboardMarkup:
+	buttons = [
+		[
+			InlineKeyboardButton(text="🔄 Yangilash", callback_data="system_info"),
+			InlineKeyboardButton(text="🔙 Sozlamalar", callback_data="admin_settings")
+		]
+	]
+	return InlineKeyboardMarkup(inline_keyboard=buttons)
+
 def get_edit_selection_keyboard() -> InlineKeyboardMarkup:
 	buttons = [
 		[
@@ -312,11 +394,12 @@ def get_edit_selection_keyboard() -> InlineKeyboardMarkup:
 	]
 	return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_group_report_keyboard() -> InlineKeyboardMarkup:
+def get_group_report_keyboard(report_id: int = None) -> InlineKeyboardMarkup:
+	suffix = f"_{report_id}" if report_id else ""
 	buttons = [
 		[
-			InlineKeyboardButton(text="✅ Tasdiqlash", callback_data="confirm_report_action"),
-			InlineKeyboardButton(text="❌ Bekor qilish", callback_data="reject_report_action")
+			InlineKeyboardButton(text="✅ Tasdiqlash", callback_data=f"confirm_report_action{suffix}"),
+			InlineKeyboardButton(text="❌ Bekor qilish", callback_data=f"reject_report_action{suffix}")
 		],
 		# [
 		# 	InlineKeyboardButton(text="👨‍💼 Sotuvchi", callback_data="view_seller_info")
@@ -0,0 +1,154 @@
+import asyncio
+import html
+import logging
+from datetime import date, datetime, timedelta
+
+from aiogram import Bot
+
+from cache import leaderboard_cache
+from config import LEADERBOARD_POST_TIME
+from database import get_seller_stats, get_all_telegram_groups
+from rate_limiter import send_priority, Priority
+
+LEADERBOARD_SIZE = 10
+PERIOD_TITLES = {"today": "Bugun", "week": "Shu hafta", "month": "Shu oy"}
+PERIOD_ALIASES = {
+	"bugun": "today", "today": "today",
+	"hafta": "week", "week": "week",
+	"oy": "month", "month": "month",
+}
+METRIC_ALIASES = {"soni": "count", "count": "count", "summa": "amount", "amount": "amount"}
+MEDALS = ("🥇", "🥈", "🥉")
+
+_post_task: asyncio.Task | None = None
+_stop_event: asyncio.Event | None = None
+
+def format_amount_sum(amount: int) -> str:
+	return f"{amount:,}".replace(",", ".")
+
+def resolve_period(period: str, today: date = None) -> tuple:
+	"""Davr nomi -> (boshlanish, tugash): hafta dushanbadan, oy 1-sanadan boshlanadi"""
+	today = today or date.today()
+	if period == "week":
+		return today - timedelta(days=today.weekday()), today
+	if period == "month":
+		return today.replace(day=1), today
+	return today, today
+
+def parse_top_args(args: str | None) -> tuple:
+	"""
+	/top argumentlari: "[bugun|hafta|oy] [soni|summa]" yoki "YYYY-MM-DD YYYY-MM-DD [soni|summa]".
+	(sarlavha, boshlanish, tugash, ko'rsatkich) qaytaradi; noto'g'ri argumentda ValueError.
+	"""
+	period, dates, metric = "today", [], "count"
+	for part in (args or "").lower().split():
+		if part in PERIOD_ALIASES:
+			period = PERIOD_ALIASES[part]
+		elif part in METRIC_ALIASES:
+			metric = METRIC_ALIASES[part]
+		else:
+			dates.append(datetime.strptime(part, '%Y-%m-%d').date())
+	
+	if len(dates) > 2:
+		raise ValueError(args)
+	if dates:
+		start_date, end_date = dates[0], dates[-1]
+		if start_date > end_date:
+			start_date, end_date = end_date, start_date
+		title = start_date.isoformat() if start_date == end_date else f"{start_date.isoformat()} — {end_date.isoformat()}"
+		return title, start_date, end_date, metric
+	
+	start_date, end_date = resolve_period(period)
+	return PERIOD_TITLES[period], start_date, end_date, metric
+
+async def get_leaderboard(start_date: date, end_date: date, group_id: int = None, metric: str = "count",
+                          limit: int = LEADERBOARD_SIZE) -> list:
+	"""
+	Tasdiqlangan hisobotlar bo'yicha reyting (rollup'dan): (telegram_id, ism, soni, summa).
+	Natija davr va guruh bo'yicha keshlanadi; hisobot tasdiqlanganda yoki tasdiq bekor qilinganda kesh tozalanadi.
+	"""
+	key = (start_date.isoformat(), end_date.isoformat(), group_id, metric, limit)
+	rows = leaderboard_cache.get(key)
+	if rows is None:
+		rows = await get_seller_stats(
+			start_date.isoformat(), end_date.isoformat(), group_id, ('confirmed',), limit, by_amount=metric == "amount"
+		)
+		leaderboard_cache.set(key, rows)
+	return rows
+
+def format_leaderboard(rows: list, title: str, metric: str = "count", scope: str = None) -> str:
+	header = f"🏆 SOTUVCHILAR REYTINGI — {title}"
+	if scope:
+		header += f"\n👥 {html.escape(scope)}"
+	header += f"\n📊 Saralash: {'summa' if metric == 'amount' else 'hisobotlar soni'}\n\n"
+	
+	if not rows:
+		return header + "Bu davrda tasdiqlangan hisobotlar yo'q"
+	
+	lines = []
+	for i, (_, full_name, reports_count, amount_total) in enumerate(rows, 1):
+		place = MEDALS[i - 1] if i <= len(MEDALS) else f"{i}."
+		seller = html.escape(full_name or "Noma'lum")
+		lines.append(f"{place} {seller}: {reports_count} ta, {format_amount_sum(amount_total)} so'm")
+	return header + "\n".join(lines)
+
+async def post_daily_leaderboards(bot: Bot) -> int:
+	"""Har bir guruhga bugungi reytingni yuboradi (tasdiqlangan hisobot bo'lmagan guruhlar o'tkazib yuboriladi)"""
+	start_date, end_date = resolve_period("today")
+	posted = 0
+	with send_priority(Priority.NOTIFICATION):
+		for _, group_id, group_name, message_thread_id, _, _ in await get_all_telegram_groups():
+			rows = await get_leaderboard(start_date, end_date, group_id)
+			if not rows:
+				continue
+			
+			try:
+				await bot.send_message(
+					group_id, format_leaderboard(rows, PERIOD_TITLES["today"], scope=group_name),
+					message_thread_id=message_thread_id
+				)
+				posted += 1
+			except Exception as e:
+				logging.warning(f"🏆 {group_name} guruhiga reytingni yuborishda xatolik: {e}")
+	
+	if posted:
+		logging.info(f"🏆 Kunlik reyting {posted} ta guruhga yuborildi")
+	return posted
+
+def seconds_until(post_time: str, now: datetime = None) -> float:
+	"""Keyingi "HH:MM" gacha qolgan soniyalar (bugun o'tib ketgan bo'lsa — ertaga)"""
+	now = now or datetime.now()
+	hour, minute = map(int, post_time.split(":"))
+	target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+	if target <= now:
+		target += timedelta(days=1)
+	return (target - now).total_seconds()
+
+async def _post_loop(bot: Bot, stop_event: asyncio.Event):
+	while not stop_event.is_set():
+		try:
+			await asyncio.wait_for(stop_event.wait(), timeout=seconds_until(LEADERBOARD_POST_TIME))
+			break
+		except asyncio.TimeoutError:
+			pass
+		
+		try:
+			await post_daily_leaderboards(bot)
+		except Exception as e:
+			logging.error(f"🏆 Kunlik reytingni yuborishda xatolik: {e}")
+
+def start(bot: Bot):
+	global _post_task, _stop_event
+	if _post_task is None and LEADERBOARD_POST_TIME:
+		_stop_event = asyncio.Event()
+		_post_task = asyncio.create_task(_post_loop(bot, _stop_event))
+		logging.info(f"🏆 Kunlik reyting har kuni {LEADERBOARD_POST_TIME} da guruhlarga yuboriladi")
+
+async def stop():
+	global _post_task
+	if _post_task is None:
+		return
+	
+	_stop_event.set()
+	await _post_task
+	_post_task = None
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import signal
+import time
+from typing import Awaitable, Callable
+
+from config import SHUTDOWN_TIMEOUT
+
+# Muddat tugagan bo'lsa ham har bir xizmatga (masalan, FSM flush) shuncha vaqt beriladi
+MIN_STOP_TIMEOUT = 2.0
+
+class _Service:
+	__slots__ = ('name', 'start', 'stop')
+	
+	def __init__(self, name: str, start: Callable | None, stop: Callable[[], Awaitable] | None):
+		self.name = name
+		self.start = start
+		self.stop = stop
+
+class Lifecycle:
+	"""
+	Fon xizmatlari ro'yxati. start() ro'yxat tartibida ishga tushiradi; shutdown() teskari tartibda
+	to'xtatadi: avval yangi ish manbalari, oxirida ular yozadigan joylar (FSM storage, bot sessiyasi).
+	Umumiy muddat tugasa, qolgan ish bazada qoladi va keyingi ishga tushishda tiklanadi.
+	"""
+	
+	def __init__(self):
+		self._services = []
+		self._stop_event = None
+	
+	def register(self, name: str, stop: Callable[[], Awaitable] = None, start: Callable = None):
+		self._services.append(_Service(name, start, stop))
+	
+	def _event(self) -> asyncio.Event:
+		if self._stop_event is None:
+			self._stop_event = asyncio.Event()
+		return self._stop_event
+	
+	def install_signal_handlers(self):
+		loop = asyncio.get_running_loop()
+		for sig in (signal.SIGTERM, signal.SIGINT):
+			try:
+				loop.add_signal_handler(sig, self.request_stop, sig)
+			except NotImplementedError:
+				# Windows: faqat KeyboardInterrupt orqali
+				pass
+	
+	def request_stop(self, sig: signal.Signals = None):
+		if not self._event().is_set():
+			logging.info(f"🛑 To'xtash so'raldi{f' ({sig.name})' if sig else ''}: yangi update'lar qabul qilinmaydi")
+		self._event().set()
+	
+	@property
+	def stop_requested(self) -> bool:
+		return self._stop_event is not None and self._stop_event.is_set()
+	
+	async def wait_for_stop(self):
+		await self._event().wait()
+	
+	async def start(self):
+		for service in self._services:
+			if service.start:
+				result = service.start()
+				if asyncio.iscoroutine(result):
+					await result
+	
+	async def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT):
+		deadline = time.monotonic() + timeout
+		for service in reversed(self._services):
+			if not service.stop:
+				continue
+			
+			remaining = max(deadline - time.monotonic(), MIN_STOP_TIMEOUT)
+			started = time.monotonic()
+			try:
+				await asyncio.wait_for(service.stop(), timeout=remaining)
+				logging.info(f"✅ {service.name} to'xtatildi ({time.monotonic() - started:.1f} s)")
+			except asyncio.TimeoutError:
+				logging.warning(f"⏱ {service.name} {remaining:.0f} soniyada to'xtamadi, qolgan ish keyingi ishga tushishda tiklanadi")
+			except Exception as e:
+				logging.error(f"{service.name} ni to'xtatishda xatolik: {e}")
+		self._services.clear()
+
+lifecycle = Lifecycle()
+
+async def wait_until_idle(is_busy: Callable[[], bool], poll_interval: float = 0.1):
+	"""Bajarilayotgan ishlar tugashini kutish (muddatni Lifecycle.shutdown belgilaydi)"""
+	while is_busy():
+		await asyncio.sleep(poll_interval)
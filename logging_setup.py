@@ -0,0 +1,97 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from pathlib import Path
+
+from config import LOG_LEVEL, LOG_LEVELS, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: logging.handlers.QueueListener | None = None
+
+def _level(value) -> int:
+	return value if isinstance(value, int) else logging.getLevelName(value.upper())
+
+class ModuleLevelFilter(logging.Filter):
+	"""
+	Modul bo'yicha log darajasi. Bot kodi root logger'ga yozadi (logging.info), shuning uchun root yozuvlari
+	fayl nomi (record.module, masalan "otchot"), qolganlari logger nomi (masalan "aiogram.event") bo'yicha tekshiriladi.
+	"""
+	
+	def __init__(self, default_level: int, levels: dict):
+		super().__init__()
+		self.default_level = default_level
+		self.levels = levels
+		self._resolved = {}
+	
+	def _level_for(self, name: str, module: str) -> int:
+		if name == "root":
+			return self.levels.get(module, self.default_level)
+		while name:
+			if name in self.levels:
+				return self.levels[name]
+			name = name.rpartition(".")[0]
+		return self.default_level
+	
+	def filter(self, record: logging.LogRecord) -> bool:
+		key = (record.name, record.module)
+		level = self._resolved.get(key)
+		if level is None:
+			level = self._resolved[key] = self._level_for(record.name, record.module)
+		return record.levelno >= level
+
+def setup_logging(log_file: str = LOG_FILE):
+	"""
+	Loglash sozlamalarining yagona joyi. Handler'lar faqat navbatga yozadi (bloklanmaydi), konsol va aylanuvchi
+	faylga yozishni alohida QueueListener oqimi bajaradi. Har bir jarayon bir marta chaqiradi.
+	"""
+	global _listener
+	if _listener is not None:
+		return
+	
+	default_level = _level(LOG_LEVEL)
+	levels = {name: _level(level) for name, level in LOG_LEVELS.items()}
+	
+	formatter = logging.Formatter(LOG_FORMAT)
+	handlers = [logging.StreamHandler(sys.stdout)]
+	if log_file:
+		handlers.append(logging.handlers.RotatingFileHandler(
+			log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+		))
+	for handler in handlers:
+		handler.setFormatter(formatter)
+	
+	log_queue = queue.SimpleQueue()
+	queue_handler = logging.handlers.QueueHandler(log_queue)
+	queue_handler.addFilter(ModuleLevelFilter(default_level, levels))
+	
+	root = logging.getLogger()
+	for handler in root.handlers[:]:
+		root.removeHandler(handler)
+	root.addHandler(queue_handler)
+	# Eng past daraja root'da; modullar bo'yicha ajratish filtrda
+	root.setLevel(min([default_level, *levels.values()]))
+	
+	_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+	_listener.start()
+	atexit.register(stop_logging)
+
+def stop_logging():
+	"""Navbatdagi yozuvlarni yozib, listener oqimini to'xtatadi"""
+	global _listener
+	if _listener is None:
+		return
+	
+	_listener.stop()
+	for handler in _listener.handlers:
+		handler.close()
+	_listener = None
+
+def worker_log_file(worker_index: int) -> str:
+	"""RotatingFileHandler jarayonlar o'rtasida xavfsiz emas: har bir worker o'z fayliga yozadi (bot-worker-0.log)"""
+	if not LOG_FILE:
+		return LOG_FILE
+	path = Path(LOG_FILE)
+	return str(path.with_name(f"{path.stem}-worker-{worker_index}{path.suffix}"))
@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import List
+
+from aiogram.types import Message
+
+# Albomning keyingi qismi shu vaqt ichida kelmasa, albom to'liq deb hisoblanadi
+ALBUM_COLLECT_DELAY = 1.0
+# Telegram sendMediaGroup 2 tadan 10 tagacha element qabul qiladi
+MAX_ALBUM_SIZE = 10
+
+_albums: dict = {}
+
+class _Album:
+	__slots__ = ('messages', 'last_seen')
+	
+	def __init__(self, message: Message):
+		self.messages = [message]
+		self.last_seen = time.monotonic()
+
+async def collect_media_group(message: Message, delay: float = ALBUM_COLLECT_DELAY) -> List[Message] | None:
+	"""
+	Telegram albomni alohida update'lar sifatida yuboradi. Birinchi qism kelgan handler
+	qolganlarini kutib, butun albomni qaytaradi; keyingi qismlar uchun None qaytadi.
+	Albom bo'lmagan xabar darhol [message] ko'rinishida qaytadi.
+	"""
+	if not message.media_group_id:
+		return [message]
+	
+	key = (message.chat.id, message.media_group_id)
+	album = _albums.get(key)
+	if album is not None:
+		album.messages.append(message)
+		album.last_seen = time.monotonic()
+		return None
+	
+	album = _albums[key] = _Album(message)
+	try:
+		# Har bir yangi qism kutish muddatini uzaytiradi
+		while True:
+			remaining = album.last_seen + delay - time.monotonic()
+			if remaining <= 0:
+				break
+			await asyncio.sleep(remaining)
+	finally:
+		_albums.pop(key, None)
+	
+	return sorted(album.messages, key=lambda item: item.message_id)
@@ -0,0 +1,126 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from aiogram import Bot
+
+# Telegram deleteMessages bir so'rovda ko'pi bilan 100 ta xabarni qabul qiladi
+DELETE_BATCH_LIMIT = 100
+
+class MessageScheduler:
+	"""
+	"Shu xabarni T vaqtda o'chir" vazifalarini taymer uyumida saqlaydi va fon vazifasida bajaradi.
+	Bir vaqtga to'g'ri kelgan o'chirishlar chat bo'yicha guruhlanib, bitta delete_messages bilan yuboriladi.
+	"""
+	
+	def __init__(self, batch_window: float = 0.05):
+		self.batch_window = batch_window
+		self._heap = []
+		self._counter = itertools.count()
+		self._wakeup = None
+		self._task = None
+		# Navbatdan olingan va hozir yuborilayotgan paket — to'xtatishda u ham yakunlanadi
+		self._batch_task = None
+		self.failed_deletes = 0
+	
+	def schedule_delete(self, bot: Bot, chat_id: int, message_ids, delay: float = 0):
+		message_ids = [message_id for message_id in message_ids if message_id]
+		if not message_ids:
+			return
+		
+		due = time.monotonic() + delay
+		for message_id in message_ids:
+			heapq.heappush(self._heap, (due, next(self._counter), bot, chat_id, message_id))
+		
+		self._ensure_running()
+		self._wakeup.set()
+	
+	def _ensure_running(self):
+		if self._task is None or self._task.done():
+			self._wakeup = asyncio.Event()
+			self._task = asyncio.create_task(self._run())
+	
+	def start(self):
+		self._ensure_running()
+		logging.info("🧹 Xabarlarni o'chirish rejalashtiruvchisi ishga tushdi")
+	
+	async def stop(self, flush: bool = True):
+		"""To'xtatish; flush=True bo'lsa muddati kelmagan o'chirishlar ham darhol bajariladi"""
+		if self._task:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+			self._task = None
+		
+		if self._batch_task and not self._batch_task.done():
+			await asyncio.gather(self._batch_task, return_exceptions=True)
+		self._batch_task = None
+		
+		if flush and self._heap:
+			jobs = [heapq.heappop(self._heap) for _ in range(len(self._heap))]
+			await self._delete_batch(jobs)
+	
+	async def _run(self):
+		while True:
+			if not self._heap:
+				self._wakeup.clear()
+				await self._wakeup.wait()
+				continue
+			
+			delay = self._heap[0][0] - time.monotonic()
+			if delay > 0:
+				self._wakeup.clear()
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+				except asyncio.TimeoutError:
+					pass
+				continue
+			
+			# Bir-biriga yaqin vazifalarni bitta paketga yig'ish uchun qisqa kutish
+			await asyncio.sleep(self.batch_window)
+			now = time.monotonic()
+			jobs = []
+			while self._heap and self._heap[0][0] <= now:
+				jobs.append(heapq.heappop(self._heap))
+			
+			# shield: stop() siklni bekor qilsa ham, navbatdan olingan o'chirishlar yo'qolmaydi
+			self._batch_task = asyncio.create_task(self._delete_batch(jobs))
+			try:
+				await asyncio.shield(self._batch_task)
+			except Exception as e:
+				logging.error(f"Xabarlarni o'chirish paketida xatolik: {e}")
+	
+	async def _delete_batch(self, jobs: list):
+		chats = {}
+		for _, _, bot, chat_id, message_id in jobs:
+			chats.setdefault((bot, chat_id), []).append(message_id)
+		
+		requests = []
+		for (bot, chat_id), message_ids in chats.items():
+			message_ids = sorted(set(message_ids))
+			for i in range(0, len(message_ids), DELETE_BATCH_LIMIT):
+				requests.append((bot, chat_id, message_ids[i:i + DELETE_BATCH_LIMIT]))
+		
+		results = await asyncio.gather(
+			*(bot.delete_messages(chat_id=chat_id, message_ids=message_ids) for bot, chat_id, message_ids in requests),
+			return_exceptions=True
+		)
+		
+		failures = [
+			(chat_id, message_ids, result)
+			for (_, chat_id, message_ids), result in zip(requests, results)
+			if isinstance(result, Exception)
+		]
+		if failures:
+			self.failed_deletes += sum(len(message_ids) for _, message_ids, _ in failures)
+			summary = "; ".join(f"chat {chat_id}: {len(message_ids)} ta ({error})" for chat_id, message_ids, error in failures)
+			logging.warning(f"⚠️ {len(failures)} ta o'chirish so'rovi bajarilmadi: {summary}")
+
+message_scheduler = MessageScheduler()
+
+def schedule_message_deletion(bot: Bot, chat_id: int, message_ids, delay: float = 0):
+	message_scheduler.schedule_delete(bot, chat_id, message_ids, delay)
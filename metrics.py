@@ -0,0 +1,263 @@
+import bisect
+import contextvars
+import functools
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Router
+from aiogram.types import TelegramObject
+from aiohttp import web
+
+from config import METRICS_HOST, METRICS_PORT
+
+# Soniyalarda; Telegram javobi va Sheets so'rovlari uchun 5 ms dan 30 s gacha
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEPENDENCY_KINDS = ("db", "sheets")
+
+STARTED_AT = time.time()
+
+# Joriy update ichidagi DB/Sheets vaqtlari: {kind: [soniya, chaqiruvlar soni]}
+_update_timings: contextvars.ContextVar = contextvars.ContextVar("update_timings", default=None)
+# Ichma-ich chaqiruvlar (masalan, test_google_sheets_connection -> save_report_to_sheets) ikki marta sanalmasin
+_active_dependency: contextvars.ContextVar = contextvars.ContextVar("active_dependency", default=None)
+
+class Histogram:
+	"""Prometheus uslubidagi kumulyativ bo'lmagan bucket'lar; kvantillar bucket ichida chiziqli baholanadi"""
+	__slots__ = ('buckets', 'counts', 'total', 'count', '_lock')
+	
+	def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.total = 0.0
+		self.count = 0
+		self._lock = threading.Lock()
+	
+	def observe(self, value: float):
+		index = bisect.bisect_left(self.buckets, value)
+		with self._lock:
+			self.counts[index] += 1
+			self.total += value
+			self.count += 1
+	
+	def quantile(self, q: float) -> float:
+		if not self.count:
+			return 0.0
+		
+		rank = q * self.count
+		cumulative = 0
+		for index, bucket_count in enumerate(self.counts):
+			if cumulative + bucket_count >= rank and bucket_count:
+				lower = self.buckets[index - 1] if index > 0 else 0.0
+				if index == len(self.buckets):
+					# +Inf bucket: eng yuqori chegaradan yuqorisini baholab bo'lmaydi
+					return lower
+				return lower + (self.buckets[index] - lower) * (rank - cumulative) / bucket_count
+			cumulative += bucket_count
+		return self.buckets[-1]
+
+class MetricsRegistry:
+	def __init__(self):
+		self.histograms: Dict[tuple, Histogram] = {}
+		self.counters: Dict[tuple, float] = {}
+		self.gauges: Dict[tuple, float] = {}
+		self.help: Dict[str, tuple] = {}
+		self._lock = threading.Lock()
+	
+	def describe(self, name: str, metric_type: str, help_text: str):
+		self.help[name] = (metric_type, help_text)
+	
+	def histogram(self, name: str, **labels) -> Histogram:
+		key = (name, tuple(sorted(labels.items())))
+		histogram = self.histograms.get(key)
+		if histogram is None:
+			with self._lock:
+				histogram = self.histograms.setdefault(key, Histogram())
+		return histogram
+	
+	def inc(self, name: str, value: float = 1, **labels):
+		key = (name, tuple(sorted(labels.items())))
+		with self._lock:
+			self.counters[key] = self.counters.get(key, 0) + value
+	
+	def add_gauge(self, name: str, value: float, **labels):
+		key = (name, tuple(sorted(labels.items())))
+		with self._lock:
+			self.gauges[key] = self.gauges.get(key, 0) + value
+	
+	def render(self) -> str:
+		"""Prometheus text exposition formati (0.0.4)"""
+		lines = []
+		described = set()
+		
+		def header(name: str):
+			if name not in described and name in self.help:
+				metric_type, help_text = self.help[name]
+				lines.append(f"# HELP {name} {help_text}")
+				lines.append(f"# TYPE {name} {metric_type}")
+				described.add(name)
+		
+		for (name, labels), value in sorted(self.counters.items()):
+			header(name)
+			lines.append(f"{name}{_format_labels(labels)} {value}")
+		
+		for (name, labels), value in sorted(self.gauges.items()):
+			header(name)
+			lines.append(f"{name}{_format_labels(labels)} {value}")
+		
+		for (name, labels), histogram in sorted(self.histograms.items()):
+			header(name)
+			cumulative = 0
+			for bound, bucket_count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+				cumulative += bucket_count
+				le = "+Inf" if bound == float("inf") else repr(bound)
+				lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+			lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+			lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+		
+		return "\n".join(lines) + "\n"
+
+def _format_labels(labels: tuple) -> str:
+	if not labels:
+		return ""
+	escaped = (
+		f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+		for key, value in labels
+	)
+	return "{" + ",".join(escaped) + "}"
+
+metrics = MetricsRegistry()
+metrics.describe("bot_handler_duration_seconds", "histogram", "Handler bajarilish vaqti")
+metrics.describe("bot_handler_errors_total", "counter", "Handler ichida ko'tarilgan xatoliklar")
+metrics.describe("bot_handler_in_flight", "gauge", "Hozir bajarilayotgan handler'lar")
+metrics.describe("bot_dependency_duration_seconds", "histogram", "Bitta DB/Sheets chaqiruvi vaqti")
+metrics.describe("bot_update_dependency_seconds", "histogram", "Bitta update ichida DB/Sheets'ga ketgan jami vaqt")
+
+def record_dependency(kind: str, operation: str, seconds: float):
+	metrics.histogram("bot_dependency_duration_seconds", kind=kind, operation=operation).observe(seconds)
+	timings = _update_timings.get()
+	if timings is not None:
+		spent = timings.setdefault(kind, [0.0, 0])
+		spent[0] += seconds
+		spent[1] += 1
+
+def timed_dependency(kind: str):
+	"""Sinxron tashqi chaqiruvni (masalan, Sheets) o'lchaydigan dekorator"""
+	def decorator(func):
+		@functools.wraps(func)
+		def wrapper(*args, **kwargs):
+			if _active_dependency.get() == kind:
+				return func(*args, **kwargs)
+			
+			token = _active_dependency.set(kind)
+			started = time.perf_counter()
+			try:
+				return func(*args, **kwargs)
+			finally:
+				_active_dependency.reset(token)
+				record_dependency(kind, func.__name__, time.perf_counter() - started)
+		
+		return wrapper
+	
+	return decorator
+
+class TimedConnection(sqlite3.Connection):
+	"""Ulanish ochilgandan yopilgunigacha bo'lgan vaqt chaqirgan funksiya nomi bilan yoziladi"""
+	
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._started = time.perf_counter()
+		self.operation = "unknown"
+	
+	def close(self):
+		try:
+			super().close()
+		finally:
+			if self._started is not None:
+				record_dependency("db", self.operation, time.perf_counter() - self._started)
+				self._started = None
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+	"""Router observer'lariga ulanadigan ichki middleware: handler vaqti, xatoliklar va DB/Sheets ulushi"""
+	
+	def __init__(self, router_name: str):
+		self.router_name = router_name
+	
+	async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+	                   event: TelegramObject, data: Dict[str, Any]) -> Any:
+		handler_object = data.get("handler")
+		handler_name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+		labels = {"router": self.router_name, "handler": handler_name}
+		
+		timings = {}
+		token = _update_timings.set(timings)
+		metrics.add_gauge("bot_handler_in_flight", 1, router=self.router_name)
+		started = time.perf_counter()
+		try:
+			return await handler(event, data)
+		except Exception:
+			metrics.inc("bot_handler_errors_total", **labels)
+			raise
+		finally:
+			metrics.histogram("bot_handler_duration_seconds", **labels).observe(time.perf_counter() - started)
+			metrics.add_gauge("bot_handler_in_flight", -1, router=self.router_name)
+			for kind in DEPENDENCY_KINDS:
+				spent = timings.get(kind)
+				metrics.histogram("bot_update_dependency_seconds", kind=kind, **labels).observe(
+					spent[0] if spent else 0.0
+				)
+			_update_timings.reset(token)
+
+def install_handler_metrics(router: Router, router_name: str):
+	middleware = HandlerMetricsMiddleware(router_name)
+	router.message.middleware(middleware)
+	router.callback_query.middleware(middleware)
+
+def handler_summary(limit: int = 15) -> list:
+	"""Admin ekrani uchun: (router, handler, soni, p50, p95, p99, xatoliklar), eng ko'p chaqirilganlar avval"""
+	rows = []
+	for (name, labels), histogram in list(metrics.histograms.items()):
+		if name != "bot_handler_duration_seconds" or not histogram.count:
+			continue
+		label_map = dict(labels)
+		errors = metrics.counters.get(("bot_handler_errors_total", labels), 0)
+		rows.append((
+			label_map["router"], label_map["handler"], histogram.count,
+			histogram.quantile(0.5), histogram.quantile(0.95), histogram.quantile(0.99), int(errors)
+		))
+	rows.sort(key=lambda row: row[2], reverse=True)
+	return rows[:limit]
+
+def dependency_summary() -> dict:
+	"""kind -> (chaqiruvlar soni, p50, p95, p99) barcha operatsiyalar bo'yicha"""
+	summary = {}
+	for kind in DEPENDENCY_KINDS:
+		combined = Histogram()
+		for (name, labels), histogram in list(metrics.histograms.items()):
+			if name == "bot_dependency_duration_seconds" and dict(labels)["kind"] == kind:
+				combined.counts = [a + b for a, b in zip(combined.counts, histogram.counts)]
+				combined.count += histogram.count
+				combined.total += histogram.total
+		summary[kind] = (combined.count, combined.quantile(0.5), combined.quantile(0.95), combined.quantile(0.99))
+	return summary
+
+def in_flight_total() -> int:
+	return int(sum(value for (name, _), value in list(metrics.gauges.items()) if name == "bot_handler_in_flight"))
+
+async def metrics_endpoint(request: web.Request) -> web.Response:
+	return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+async def start_metrics_server(port: int = METRICS_PORT) -> web.AppRunner | None:
+	"""/metrics ni METRICS_HOST:port da ochadi (port = 0 bo'lsa o'chirilgan)"""
+	if not port:
+		return None
+	
+	app = web.Application()
+	app.router.add_get("/metrics", metrics_endpoint)
+	runner = web.AppRunner(app)
+	await runner.setup()
+	await web.TCPSite(runner, host=METRICS_HOST, port=port).start()
+	logging.info(f"📈 Metrikalar: http://{METRICS_HOST}:{port}/metrics")
+	return runner
@@ -1,3 +1,4 @@
+import html
 import logging
 import re
 from datetime import datetime
@@ -5,16 +6,18 @@ from typing import Optional, Dict, Any
 
 from aiogram import Router, F, Bot
 from aiogram.enums import ParseMode
-from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import (
+	CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, ReplyParameters
+)
 
 from config import ADMIN_ID, HELPER_ID
 from database import (
-	add_sales_report, get_user_assigned_group, update_report_status_in_db,
-	check_user_blocked, get_user_by_telegram_id, get_group_google_sheet,
-	get_user_reports_count, get_reports_by_user, get_all_users
+	add_sales_report, get_user_assigned_group,
+	get_seller_profile, get_all_users,
+	get_report_by_id, get_report_by_group_message, update_report_status_by_id,
+	confirm_report_by_id, set_report_group_message, delete_sales_report
 )
 from keyboards import (
 	get_cancel_report_inline_keyboard, get_main_menu_reply_keyboard,
@@ -23,7 +26,16 @@ from keyboards import (
 	get_rejection_reason_keyboard, get_contact_helper_keyboard,
 	get_yes_no_additional_phone_inline_keyboard
 )
-from google_sheets_integration import save_report_to_sheets
+from sheets_outbox import save_report_to_google_sheets
+from message_scheduler import schedule_message_deletion
+from state_transaction import StateTransaction
+from callback_tasks import run_ack_first
+from contracts import find_duplicate_contract, remember_contract
+from media_groups import collect_media_group, MAX_ALBUM_SIZE
+from user_gate import UserContext
+
+# Vaqtinchalik xabarlar shuncha soniyadan keyin o'chiriladi
+TRANSIENT_MESSAGE_TTL = 2
 
 # Router yaratish
 otchot_router = Router()
@@ -61,7 +73,30 @@ REPORT_CAPTION_TEMPLATE = """📝 Yangi Hisobot:
 
 {status_line}"""
 
+REPORT_STATUS_PENDING = "Holati: ⏳ Kutilmoqda"
+REPORT_STATUS_CONFIRMED = "Holati: ✅ Tasdiqlandi"
+
 # Yordamchi funksiyalar
+def render_report_caption(report: Dict[str, Any], sender_full_name: str, status_line: str) -> str:
+	"""Guruh xabari matnini saqlangan (yoki FSM'dagi) hisobot ma'lumotlaridan yaratish"""
+	additional_phone = report.get('additional_phone_number')
+	additional_phone_line = ""
+	if additional_phone and additional_phone != 'Mavjud emas':
+		additional_phone_line = f"📱 Qo'shimcha telefon: {html.escape(additional_phone)}\n"
+	
+	# Xabar HTML rejimida yuboriladi: foydalanuvchi kiritgan matndagi <, > va & teg deb o'qilmasin
+	return REPORT_CAPTION_TEMPLATE.format(
+		client_name=html.escape(report.get('client_name') or 'Noma\'lum'),
+		phone_number=html.escape(report.get('phone_number') or 'Noma\'lum'),
+		additional_phone_line=additional_phone_line,
+		product_type=html.escape(report.get('product_type') or 'Noma\'lum'),
+		client_location=html.escape(report.get('client_location') or 'Noma\'lum'),
+		contract_id=html.escape(report.get('contract_id') or 'Noma\'lum'),
+		contract_amount=html.escape(report.get('contract_amount') or 'Noma\'lum') + " so'm",
+		sender_full_name=html.escape(sender_full_name),
+		status_line=status_line
+	)
+
 def format_amount(amount_str: str) -> str:
 	"""
 	Summani formatlash funksiyasi
@@ -122,30 +157,12 @@ async def get_seller_detailed_profile(telegram_id: int) -> Optional[Dict[str, An
 	Sotuvchi batafsil profil ma'lumotlarini olish
 	"""
 	try:
-		# Foydalanuvchi ma'lumotlarini olish
-		user_info = await get_user_by_telegram_id(telegram_id)
-		if not user_info:
+		# Profil, holatlar soni va so'nggi faollik bitta so'rovda (qisqa muddat keshlanadi)
+		profile = await get_seller_profile(telegram_id)
+		if not profile:
 			return None
 		
-		user_id, telegram_id, full_name, reg_date, is_blocked, group_name = user_info
-		
-		# Hisobotlar statistikasini olish
-		total_reports = await get_user_reports_count(telegram_id)
-		recent_reports = await get_reports_by_user(telegram_id, 10)
-		
-		# Tasdiqlangan va kutilayotgan hisobotlar soni
-		confirmed_count = 0
-		pending_count = 0
-		rejected_count = 0
-		
-		for report in recent_reports:
-			status = report[11]  # status field
-			if status == "confirmed":
-				confirmed_count += 1
-			elif status == "pending":
-				pending_count += 1
-			elif status == "rejected":
-				rejected_count += 1
+		reg_date = profile['reg_date']
 		
 		# Registration sanasini formatlash
 		reg_date_formatted = "Noma'lum"
@@ -159,31 +176,14 @@ async def get_seller_detailed_profile(telegram_id: int) -> Optional[Dict[str, An
 			except:
 				reg_date_formatted = reg_date
 		
-		# So'nggi faollik sanasini hisoblash
+		# So'nggi faollik sanasi (butun tarix bo'yicha MAX(submission_timestamp))
 		last_activity = "Hech qachon"
-		if recent_reports:
-			try:
-				last_report = recent_reports[0]
-				last_submission = last_report[10]  # submission_timestamp
-				if last_submission:
-					if isinstance(last_submission, str):
-						last_activity = last_submission.split(' ')[0] if ' ' in last_submission else last_submission
-					else:
-						last_activity = str(last_submission)[:10]
-			except:
-				last_activity = "Noma'lum"
+		if profile['last_activity']:
+			last_activity = str(profile['last_activity'])[:10]
 		
 		return {
-			'telegram_id': telegram_id,
-			'full_name': full_name,
-			'group_name': group_name,
+			**profile,
 			'reg_date': reg_date_formatted,
-			'is_blocked': is_blocked,
-			'total_reports': total_reports,
-			'confirmed_count': confirmed_count,
-			'pending_count': pending_count,
-			'rejected_count': rejected_count,
-			'recent_reports': recent_reports[:5],  # So'nggi 5 ta hisobot
 			'last_activity': last_activity
 		}
 	
@@ -296,82 +296,65 @@ async def find_user_by_name(full_name: str) -> Optional[int]:
 		logging.error(f"Foydalanuvchini topishda xatolik: {e}")
 		return None
 
+def clear_previous_messages(bot: Bot, chat_id: int, data: dict, user_reply_id: int = None):
+	"""
+	Oldingi bot xabarini (va foydalanuvchi javobini) o'chirishga qo'yadi, ID'larni data ichida tozalaydi
+	"""
+	# Ikkala xabar bitta delete_messages so'rovi bilan fonda o'chiriladi,
+	# xatoliklar rejalashtiruvchida yig'ilib, bitta log yozuvi bilan chiqadi
+	schedule_message_deletion(
+		bot, chat_id,
+		[data.get("last_bot_prompt_id"), user_reply_id or data.get("last_user_reply_id")]
+	)
+	data.update(last_bot_prompt_id=None, last_user_reply_id=None)
+
 async def delete_previous_messages(bot: Bot, chat_id: int, state: FSMContext):
 	"""
 	Oldingi bot va foydalanuvchi xabarlarini o'chirish
 	"""
-	data = await state.get_data()
-	bot_prompt_id = data.get("last_bot_prompt_id")
-	user_reply_id = data.get("last_user_reply_id")
-	
-	# Bot xabarini o'chirish
-	if bot_prompt_id:
-		try:
-			await bot.delete_message(chat_id, bot_prompt_id)
-		except (TelegramBadRequest, Exception) as e:
-			logging.warning(f"Bot xabarini o'chirishda xatolik {bot_prompt_id}: {e}")
-	
-	# Foydalanuvchi xabarini o'chirish
-	if user_reply_id:
-		try:
-			await bot.delete_message(chat_id, user_reply_id)
-		except (TelegramBadRequest, Exception) as e:
-			logging.warning(f"Foydalanuvchi xabarini o'chirishda xatolik {user_reply_id}: {e}")
-	
-	# ID'larni tozalash
-	await state.update_data(last_bot_prompt_id=None, last_user_reply_id=None)
+	async with StateTransaction(state) as tx:
+		clear_previous_messages(bot, chat_id, tx.data)
 
 async def process_step(message: Message, state: FSMContext, bot: Bot, next_state: State, prompt_text: str,
-                       keyboard_markup=None):
+                       keyboard_markup=None, **data_updates):
 	"""
-	Keyingi bosqichga o'tish uchun umumiy funksiya
+	Keyingi bosqichga o'tish uchun umumiy funksiya.
+	data_updates — shu bosqichda saqlanadigan maydonlar; holat va ma'lumotlar bir marta yoziladi.
 	"""
-	# Foydalanuvchi xabar ID'sini saqlash
-	await state.update_data(last_user_reply_id=message.message_id)
-	
-	# Oldingi xabarlarni o'chirish
-	await delete_previous_messages(bot, message.chat.id, state)
-	
-	# Yangi xabar yuborish
-	sent_message = await message.answer(
-		prompt_text,
-		reply_markup=keyboard_markup or get_cancel_report_inline_keyboard()
-	)
-	
-	# Holatni o'rnatish va bot xabar ID'sini saqlash
-	await state.set_state(next_state)
-	await state.update_data(last_bot_prompt_id=sent_message.message_id)
+	async with StateTransaction(state) as tx:
+		tx.update(**data_updates)
+		clear_previous_messages(bot, message.chat.id, tx.data, message.message_id)
+		
+		sent_message = await message.answer(
+			prompt_text,
+			reply_markup=keyboard_markup or get_cancel_report_inline_keyboard()
+		)
+		
+		tx.set_state(next_state)
+		tx.update(last_bot_prompt_id=sent_message.message_id)
 
 async def show_error_and_retry(message: Message, state: FSMContext, bot: Bot, error_text: str):
 	"""
 	Xatolik xabarini ko'rsatish va qayta urinish
 	"""
-	await state.update_data(last_user_reply_id=message.message_id)
-	await delete_previous_messages(bot, message.chat.id, state)
-	
-	error_prompt = await message.answer(
-		error_text,
-		reply_markup=get_cancel_report_inline_keyboard()
-	)
-	await state.update_data(last_bot_prompt_id=error_prompt.message_id)
+	async with StateTransaction(state) as tx:
+		clear_previous_messages(bot, message.chat.id, tx.data, message.message_id)
+		
+		error_prompt = await message.answer(
+			error_text,
+			reply_markup=get_cancel_report_inline_keyboard()
+		)
+		tx.update(last_bot_prompt_id=error_prompt.message_id)
 
 # HISOBOT TOPSHIRISH JARAYONI
 
 @otchot_router.message(F.text == "📝 Hisobot topshirish")
 async def start_report_submission(message: Message, state: FSMContext, bot: Bot):
 	"""
-	Hisobot topshirish jarayonini boshlash
+	Hisobot topshirish jarayonini boshlash (bloklanganlar UserGateMiddleware'da to'xtatiladi)
 	"""
 	user_id = message.from_user.id
 	
-	# Foydalanuvchi bloklanganligini tekshirish
-	if await check_user_blocked(user_id):
-		await message.answer(
-			"🚫 Sizning hisobingiz vaqtincha bloklangan.\n"
-			"Qo'shimcha ma'lumot uchun admin bilan bog'laning."
-		)
-		return
-	
 	# Guruh tayinlanganligini tekshirish
 	assigned_group = await get_user_assigned_group(user_id)
 	if not assigned_group:
@@ -388,8 +371,9 @@ async def start_report_submission(message: Message, state: FSMContext, bot: Bot)
 		"💡 Masalan: Abdullayev Akmal Akbarovich",
 		reply_markup=get_cancel_report_inline_keyboard()
 	)
-	await state.set_state(ReportState.waiting_for_client_name)
-	await state.update_data(last_bot_prompt_id=sent_message.message_id)
+	async with StateTransaction(state) as tx:
+		tx.set_state(ReportState.waiting_for_client_name)
+		tx.update(last_bot_prompt_id=sent_message.message_id)
 	
 	logging.info(f"Foydalanuvchi {user_id} hisobot topshirish jarayonini boshladi")
 
@@ -440,12 +424,12 @@ async def process_client_name(message: Message, state: FSMContext, bot: Bot):
 		)
 		return
 	
-	await state.update_data(client_name=client_name)
 	await process_step(
 		message, state, bot,
 		ReportState.waiting_for_phone_number,
 		"📱 Mijozning telefon raqamini kiriting:\n\n"
-		"💡 Masalan: +998901234567 yoki 998901234567"
+		"💡 Masalan: +998901234567 yoki 998901234567",
+		client_name=client_name
 	)
 	
 	logging.info(f"Mijoz ismi qayta ishlandi: {client_name}")
@@ -464,13 +448,13 @@ async def process_phone_number(message: Message, state: FSMContext, bot: Bot):
 		)
 		return
 	
-	await state.update_data(phone_number=phone_number)
 	await process_step(
 		message, state, bot,
 		ReportState.waiting_for_additional_phone_question,
 		"📱 Mijozning qo'shimcha telefon raqami bormi?\n\n"
 		"💡 Agar bor bo'lsa, uni ham qo'shishingiz mumkin.",
-		get_yes_no_additional_phone_inline_keyboard()
+		get_yes_no_additional_phone_inline_keyboard(),
+		phone_number=phone_number
 	)
 	
 	logging.info(f"Telefon raqami qayta ishlandi: {phone_number}")
@@ -512,12 +496,12 @@ async def process_additional_phone_number(message: Message, state: FSMContext, b
 		)
 		return
 	
-	await state.update_data(additional_phone_number=additional_phone)
 	await process_step(
 		message, state, bot,
 		ReportState.waiting_for_product_type,
 		"🛍️ Mahsulot nomini kiriting:\n\n"
-		"💡 Masalan: Samsung Galaxy A54 128GB yoki iPhone 15 Pro"
+		"💡 Masalan: Samsung Galaxy A54 128GB yoki iPhone 15 Pro",
+		additional_phone_number=additional_phone
 	)
 	
 	logging.info(f"Qo'shimcha telefon raqami qayta ishlandi: {additional_phone}")
@@ -536,12 +520,12 @@ async def process_product_type(message: Message, state: FSMContext, bot: Bot):
 		)
 		return
 	
-	await state.update_data(product_type=product_type)
 	await process_step(
 		message, state, bot,
 		ReportState.waiting_for_client_location_text,
 		"📍 Mijozning to'liq manzilini kiriting:\n\n"
-		"💡 Masalan: Toshkent shahar, Chilonzor tumani, Bunyodkor ko'chasi 12-uy"
+		"💡 Masalan: Toshkent shahar, Chilonzor tumani, Bunyodkor ko'chasi 12-uy",
+		product_type=product_type
 	)
 	
 	logging.info(f"Mahsulot turi qayta ishlandi: {product_type}")
@@ -560,12 +544,12 @@ async def process_client_location_text(message: Message, state: FSMContext, bot:
 		)
 		return
 	
-	await state.update_data(client_location=client_location_text)
 	await process_step(
 		message, state, bot,
 		ReportState.waiting_for_contract_id,
 		"📄 Shartnoma ID raqamini kiriting:\n\n"
-		"💡 Masalan: SH-2024-001 yoki 240115001"
+		"💡 Masalan: SH-2024-001 yoki 240115001",
+		client_location=client_location_text
 	)
 	
 	logging.info(f"Mijoz manzili qayta ishlandi: {client_location_text}")
@@ -584,13 +568,28 @@ async def process_contract_id(message: Message, state: FSMContext, bot: Bot):
 		)
 		return
 	
-	await state.update_data(contract_id=contract_id)
+	# Bloom filtri orqali tezkor tekshiruv; faqat "ehtimol bor" bo'lsa indeksdan qidiriladi
+	duplicate = await find_duplicate_contract(contract_id)
+	if duplicate:
+		duplicate_id, duplicate_seller, _, duplicate_date = duplicate
+		await show_error_and_retry(
+			message, state, bot,
+			f"⚠️ Bu shartnoma ID allaqachon kiritilgan!\n\n"
+			f"📋 Hisobot: #{duplicate_id}\n"
+			f"👨‍💼 Sotuvchi: {duplicate_seller or 'Noma\'lum'}\n"
+			f"📅 Sana: {duplicate_date}\n\n"
+			"Boshqa shartnoma ID'sini kiriting:"
+		)
+		logging.warning(f"Takroriy shartnoma ID kiritildi: {contract_id} (hisobot #{duplicate_id})")
+		return
+	
 	await process_step(
 		message, state, bot,
 		ReportState.waiting_for_contract_amount,
 		"💰 Shartnoma summasini kiriting:\n\n"
 		"💡 Masalan: 5000000 yoki 5,000,000 yoki 5.000.000\n"
-		"📝 Raqamlarni istalgan formatda kiritishingiz mumkin"
+		"📝 Raqamlarni istalgan formatda kiritishingiz mumkin",
+		contract_id=contract_id
 	)
 	
 	logging.info(f"Shartnoma ID qayta ishlandi: {contract_id}")
@@ -621,37 +620,47 @@ async def process_contract_amount(message: Message, state: FSMContext, bot: Bot)
 				f"📊 Formatlangan summa: {formatted_amount}\n\n"
 				f"✅ Summa to'g'ri formatlandi va saqlandi!"
 			)
-			# 2 soniyadan keyin xabarni o'chirish
-			import asyncio
-			await asyncio.sleep(2)
-			await bot.delete_message(message.chat.id, confirmation_message.message_id)
+			# Xabar fon rejalashtiruvchisi orqali o'chiriladi — handler kutib turmaydi
+			schedule_message_deletion(
+				bot, message.chat.id, [confirmation_message.message_id], delay=TRANSIENT_MESSAGE_TTL
+			)
 		except Exception:
 			pass
 	
-	await state.update_data(contract_amount=formatted_amount)
 	await process_step(
 		message, state, bot,
 		ReportState.waiting_for_product_image,
 		"🖼️ Mahsulot rasmini yuboring:\n\n"
-		"💡 Faqat rasm formatida yuborishingiz kerak (JPG, PNG)"
+		"💡 Faqat rasm formatida yuborishingiz kerak (JPG, PNG)\n"
+		f"📎 Shartnoma va mahsulot rasmlarini bitta albom qilib yuborish mumkin ({MAX_ALBUM_SIZE} tagacha)",
+		contract_amount=formatted_amount
 	)
 	
 	logging.info(f"Shartnoma summasi qayta ishlandi: {contract_amount_raw} -> {formatted_amount}")
 
 @otchot_router.message(ReportState.waiting_for_product_image, F.photo)
-async def process_product_image(message: Message, state: FSMContext, bot: Bot):
-	"""Mahsulot rasmini qayta ishlash"""
-	await state.update_data(last_user_reply_id=message.message_id)
-	await delete_previous_messages(bot, message.chat.id, state)
+async def process_product_image(message: Message, state: FSMContext, bot: Bot, user_context: UserContext):
+	"""Mahsulot rasmi yoki rasmlar albomini qayta ishlash"""
+	album = await collect_media_group(message)
+	if album is None:
+		# Albomning qolgan qismlari birinchi qismni qabul qilgan handler'da qayta ishlanadi
+		return
+	
+	# Har bir rasmning eng yuqori sifatli varianti
+	photo_file_ids = [item.photo[-1].file_id for item in album if item.photo][:MAX_ALBUM_SIZE]
+	photo_file_id = photo_file_ids[0]
 	
-	# Eng yuqori sifatli rasmni olish
-	photo_file_id = message.photo[-1].file_id
-	await state.update_data(product_image_id=photo_file_id)
+	async with StateTransaction(state) as tx:
+		clear_previous_messages(bot, message.chat.id, tx.data, message.message_id)
+		tx.update(product_image_id=photo_file_id, product_image_ids=photo_file_ids)
+		tx.set_state(ReportState.waiting_for_confirmation)
+	schedule_message_deletion(
+		bot, message.chat.id, [item.message_id for item in album if item.message_id != message.message_id]
+	)
 	
 	# Foydalanuvchi ma'lumotlarini olish
-	user_data = await state.get_data()
-	user_info = await get_user_by_telegram_id(message.from_user.id)
-	registered_name = user_info[2] if user_info else message.from_user.full_name
+	user_data = tx.data
+	registered_name = user_context.display_name(message.from_user)
 	
 	# Qo'shimcha telefon matnini tayyorlash
 	additional_phone_text = ""
@@ -668,19 +677,18 @@ Kiritilgan ma'lumotlarni tekshiring:
 🛍️ Mahsulot: {user_data.get('product_type', 'Noma\'lum')}
 📍 Manzil: {user_data.get('client_location', 'Noma\'lum')}
 📄 Shartnoma ID: {user_data.get('contract_id', 'Noma\'lum')}
-💰 Shartnoma summasi: {user_data.get('contract_amount', 'Noma\'lum')} so'm
+💰 Shartnoma summasi: {user_data.get('contract_amount', 'Noma\'lum')} so'm{format_images_count(user_data)}
 👨‍💼 Sotuvchi: {registered_name}
 
 ❓ Barcha ma'lumotlar to'g'rimi?"""
 	
-	await state.set_state(ReportState.waiting_for_confirmation)
 	await message.answer_photo(
 		photo=photo_file_id,
 		caption=confirmation_text,
 		reply_markup=get_report_confirmation_keyboard()
 	)
 	
-	logging.info(f"Mahsulot rasmi qayta ishlandi: {message.from_user.id}")
+	logging.info(f"Mahsulot rasmlari qayta ishlandi ({len(photo_file_ids)} ta): {message.from_user.id}")
 
 @otchot_router.message(ReportState.waiting_for_product_image)
 async def incorrect_product_image(message: Message, state: FSMContext, bot: Bot):
@@ -694,14 +702,41 @@ async def incorrect_product_image(message: Message, state: FSMContext, bot: Bot)
 
 # TASDIQLASH VA TAHRIRLASH
 
+def format_images_count(user_data: dict) -> str:
+	"""Bir nechta rasm yuborilgan bo'lsa, tasdiqlash matni uchun qator"""
+	images_count = len(user_data.get('product_image_ids') or [])
+	return f"\n🖼️ Rasmlar: {images_count} ta" if images_count > 1 else ""
+
+async def send_report_album(bot: Bot, chat_id: int, topic_id: int, image_ids: list, reply_to_message_id: int) -> list:
+	"""
+	Hisobotning qo'shimcha rasmlarini asosiy (tugmali) xabarga javob sifatida bitta so'rov bilan yuborish.
+	Yuborilgan xabarlar ID'larini qaytaradi.
+	"""
+	if not image_ids:
+		return []
+	
+	reply_parameters = ReplyParameters(message_id=reply_to_message_id, allow_sending_without_reply=True)
+	# sendMediaGroup kamida 2 ta element talab qiladi
+	if len(image_ids) == 1:
+		sent_message = await bot.send_photo(
+			chat_id=chat_id, photo=image_ids[0], message_thread_id=topic_id, reply_parameters=reply_parameters
+		)
+		return [sent_message.message_id]
+	
+	sent_messages = await bot.send_media_group(
+		chat_id=chat_id,
+		media=[InputMediaPhoto(media=image_id) for image_id in image_ids],
+		message_thread_id=topic_id,
+		reply_parameters=reply_parameters
+	)
+	return [sent_message.message_id for sent_message in sent_messages]
+
 @otchot_router.callback_query(ReportState.waiting_for_confirmation, F.data == "confirm_report")
-async def confirm_report_submission(callback_query: CallbackQuery, state: FSMContext, bot: Bot):
+async def confirm_report_submission(callback_query: CallbackQuery, state: FSMContext, bot: Bot,
+                                    user_context: UserContext):
 	"""Hisobotni tasdiqlash va guruhga yuborish"""
 	user_id = callback_query.from_user.id
-	
-	# Foydalanuvchi ma'lumotlarini olish
-	user_info = await get_user_by_telegram_id(user_id)
-	registered_name = user_info[2] if user_info else callback_query.from_user.full_name
+	registered_name = user_context.display_name(callback_query.from_user)
 	
 	# Tayinlangan guruhni tekshirish
 	assigned_group = await get_user_assigned_group(user_id)
@@ -713,41 +748,48 @@ async def confirm_report_submission(callback_query: CallbackQuery, state: FSMCon
 	group_id, group_name, topic_id, google_sheet_id = assigned_group
 	user_data = await state.get_data()
 	
-	# Qo'shimcha telefon qatorini tayyorlash
-	additional_phone_line = ""
-	if user_data.get('additional_phone_number'):
-		additional_phone_line = f"📱 Qo'shimcha telefon: {user_data.get('additional_phone_number')}\n"
+	# Hisobot avval bazaga yoziladi: guruh tugmalari uning ID'sini olib yuradi
+	report_id = await add_sales_report(user_id, user_data, None, google_sheet_id, group_id)
+	if not report_id:
+		await callback_query.answer("❌ Hisobotni saqlashda xatolik yuz berdi!", show_alert=True)
+		return
+	remember_contract(user_data.get('contract_id'))
 	
 	# Guruh uchun hisobot matnini tayyorlash
-	status_line = "Holati: ⏳ Kutilmoqda"
-	report_caption = REPORT_CAPTION_TEMPLATE.format(
-		client_name=user_data.get('client_name', 'Noma\'lum'),
-		phone_number=user_data.get('phone_number', 'Noma\'lum'),
-		additional_phone_line=additional_phone_line,
-		product_type=user_data.get('product_type', 'Noma\'lum'),
-		client_location=user_data.get('client_location', 'Noma\'lum'),
-		contract_id=user_data.get('contract_id', 'Noma\'lum'),
-		contract_amount=user_data.get('contract_amount', 'Noma\'lum') + " so'm",
-		sender_full_name=registered_name,
-		status_line=status_line
-	)
+	report_caption = render_report_caption(user_data, registered_name, REPORT_STATUS_PENDING)
+	image_ids = user_data.get('product_image_ids') or [user_data.get('product_image_id')]
+	group_message_sent = None
+	album_message_ids = []
 	
 	try:
-		# Guruhga hisobotni yuborish
+		# Guruhga hisobotni yuborish: birinchi rasm tugmalar bilan, qolganlari bitta albom bilan
 		group_message_sent = await bot.send_photo(
 			chat_id=group_id,
-			photo=user_data.get('product_image_id'),
+			photo=image_ids[0],
 			caption=report_caption,
 			parse_mode=ParseMode.HTML,
 			message_thread_id=topic_id,
-			reply_markup=get_group_report_keyboard()
+			reply_markup=get_group_report_keyboard(report_id)
 		)
-		
-		# Ma'lumotlar bazasiga saqlash (faqat asosiy telefon raqami)
-		group_msg_id_to_save = group_message_sent.message_id if group_message_sent else None
-		report_id = await add_sales_report(user_id, user_data, group_msg_id_to_save, google_sheet_id)
-		
-		# Foydalanuvchiga muvaffaqiyat xabarini yuborish
+		album_message_ids = await send_report_album(
+			bot, group_id, topic_id, image_ids[1:], group_message_sent.message_id
+		)
+		await set_report_group_message(report_id, group_message_sent.message_id, album_message_ids)
+	
+	except Exception as e:
+		logging.error(f"Hisobotni guruhga yuborishda xatolik: {e}")
+		await delete_sales_report(report_id)
+		if group_message_sent:
+			# Hisobot bekor qilindi: tugmali xabar ham, yuborilgan albom ham guruhda yetim qolmasin
+			schedule_message_deletion(bot, group_id, [group_message_sent.message_id, *album_message_ids])
+		await callback_query.answer("❌ Hisobotni yuborishda xatolik yuz berdi!", show_alert=True)
+		return
+	
+	logging.info(f"Hisobot muvaffaqiyatli yuborildi: {group_name} - {user_id}")
+	await state.clear()
+	
+	# Hisobot guruhda va bazada: foydalanuvchiga xabar berishdagi xatolik uni bekor qilmasligi kerak
+	try:
 		await callback_query.message.edit_caption(
 			caption="✅ Hisobotingiz muvaffaqiyatli yuborildi!\n\n"
 			        "🎯 Hisobotingiz tekshirilish uchun yuborildi.\n"
@@ -756,22 +798,15 @@ async def confirm_report_submission(callback_query: CallbackQuery, state: FSMCon
 		)
 		
 		await callback_query.message.answer(
-			f"🎉 Hisobotingiz '{group_name}' guruhiga yuborildi!\n\n"
+			f"🎉 Hisobotingiz '{html.escape(group_name)}' guruhiga yuborildi!\n\n"
 			f"📋 Hisobot ID: #{report_id}\n"
 			f"⏰ Yuborilgan vaqt: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
 			f"✅ Hisobotingiz tez orada ko'rib chiqiladi.",
 			reply_markup=get_main_menu_reply_keyboard()
 		)
-		
-		logging.info(f"Hisobot muvaffaqiyatli yuborildi: {group_name} - {user_id}")
-	
+		await callback_query.answer("✅ Hisobot muvaffaqiyatli yuborildi!")
 	except Exception as e:
-		logging.error(f"Hisobotni guruhga yuborishda xatolik: {e}")
-		await callback_query.answer("❌ Hisobotni yuborishda xatolik yuz berdi!", show_alert=True)
-		return
-	
-	await state.clear()
-	await callback_query.answer("✅ Hisobot muvaffaqiyatli yuborildi!")
+		logging.warning(f"Hisobot #{report_id} yuborilgani haqida foydalanuvchiga xabar berishda xatolik: {e}")
 
 @otchot_router.callback_query(ReportState.waiting_for_confirmation, F.data == "edit_report")
 async def edit_report(callback_query: CallbackQuery, state: FSMContext, bot: Bot):
@@ -855,7 +890,7 @@ async def handle_edit_selection(callback_query: CallbackQuery, state: FSMContext
 		},
 		"image": {
 			"state": ReportState.waiting_for_product_image,
-			"prompt": "🖼️ Yangi mahsulot rasmini yuboring:\n\n💡 Faqat rasm formatida (JPG, PNG)"
+			"prompt": "🖼️ Yangi mahsulot rasmini yuboring:\n\n💡 Faqat rasm formatida (JPG, PNG), albom ham mumkin"
 		}
 	}
 	
@@ -872,11 +907,11 @@ async def handle_edit_selection(callback_query: CallbackQuery, state: FSMContext
 	await callback_query.answer()
 
 @otchot_router.callback_query(ReportState.waiting_for_edit_selection, F.data == "back_to_confirmation")
-async def back_to_confirmation(callback_query: CallbackQuery, state: FSMContext, bot: Bot):
+async def back_to_confirmation(callback_query: CallbackQuery, state: FSMContext, bot: Bot,
+                               user_context: UserContext):
 	"""Tasdiqlash sahifasiga qaytish"""
 	user_data = await state.get_data()
-	user_info = await get_user_by_telegram_id(callback_query.from_user.id)
-	registered_name = user_info[2] if user_info else callback_query.from_user.full_name
+	registered_name = user_context.display_name(callback_query.from_user)
 	
 	# Qo'shimcha telefon matnini tayyorlash
 	additional_phone_text = ""
@@ -892,7 +927,7 @@ Kiritilgan ma'lumotlarni tekshiring:
 🛍️ Mahsulot: {user_data.get('product_type', 'Noma\'lum')}
 📍 Manzil: {user_data.get('client_location', 'Noma\'lum')}
 📄 Shartnoma ID: {user_data.get('contract_id', 'Noma\'lum')}
-💰 Shartnoma summasi: {user_data.get('contract_amount', 'Noma\'lum')} so'm
+💰 Shartnoma summasi: {user_data.get('contract_amount', 'Noma\'lum')} so'm{format_images_count(user_data)}
 👨‍💼 Sotuvchi: {registered_name}
 
 ❓ Barcha ma'lumotlar to'g'rimi?"""
@@ -906,7 +941,21 @@ Kiritilgan ma'lumotlarni tekshiring:
 
 # GURUH HISOBOTLARINI BOSHQARISH
 
-@otchot_router.callback_query(F.data == "confirm_report_action")
+async def get_group_report(callback_query: CallbackQuery, action: str) -> Optional[Dict[str, Any]]:
+	"""
+	Guruh tugmasi bosilgan hisobotni bazadan olish: tugmadagi hisobot ID'si bo'yicha,
+	ID'siz eski xabarlarda esa guruh xabari ID'si bo'yicha
+	"""
+	report_id = callback_query.data[len(action):].lstrip("_")
+	if report_id.isdigit():
+		return await get_report_by_id(int(report_id))
+	
+	msg = callback_query.message
+	if not msg:
+		return None
+	return await get_report_by_group_message(msg.chat.id, msg.message_id)
+
+@otchot_router.callback_query(F.data.startswith("confirm_report_action"))
 async def confirm_report_handler(callback_query: CallbackQuery, bot: Bot):
 	"""Guruhda hisobotni tasdiqlash"""
 	user_id = callback_query.from_user.id
@@ -917,91 +966,70 @@ async def confirm_report_handler(callback_query: CallbackQuery, bot: Bot):
 		await callback_query.answer("🚫 Sizda bu amalni bajarish uchun ruxsat yo'q.", show_alert=True)
 		return
 	
-	if not msg or not msg.caption:
-		await callback_query.answer("❌ Xatolik: Asl xabarni topib bo'lmadi.", show_alert=True)
+	report = await get_group_report(callback_query, "confirm_report_action")
+	if not msg or not report:
+		await callback_query.answer("❌ Xatolik: Hisobot topilmadi.", show_alert=True)
 		return
 	
 	# Allaqachon tasdiqlangan hisobotni tekshirish
-	if "Holati: ✅ Tasdiqlandi" in msg.caption:
+	if report['status'] == 'confirmed':
 		await callback_query.answer("ℹ️ Bu hisobot allaqachon tasdiqlangan.", show_alert=True)
 		return
 	
-	# Hisobot holatini yangilash
-	filtered_lines = [line.strip() for line in msg.caption.splitlines() if line.strip()]
+	if report['status'] != 'pending':
+		await callback_query.answer("ℹ️ Bu hisobot allaqachon ko'rib chiqilgan.", show_alert=True)
+		return
 	
-	if filtered_lines and filtered_lines[-1].startswith("Holati:"):
-		filtered_lines[-1] = "Holati: ✅ Tasdiqlandi"
-	else:
-		filtered_lines.append("Holati: ✅ Tasdiqlandi")
+	# Darhol javob beriladi, qolgan ish fonda; takroriy bosishlar e'tiborsiz qoladi
+	await run_ack_first(
+		callback_query, ("report", report['id']),
+		lambda: complete_report_confirmation(bot, report, msg.chat.id, msg.message_id, user_id),
+		ack_text="⏳ Hisobot tasdiqlanmoqda..."
+	)
+
+async def complete_report_confirmation(bot: Bot, report: Dict[str, Any], chat_id: int, message_id: int,
+                                       helper_id: int):
+	"""Tasdiqlashning og'ir qismi: holatni band qilish, Google Sheets va yakuniy caption"""
+	# Faqat 'pending' holatidagi hisobot tasdiqlanadi — ikkinchi urinish (boshqa jarayon,
+	# qayta ishga tushirishdan keyingi bosish) Sheets'ga takroriy qator yoza olmaydi.
+	# Shartnoma boshqa hisobotda tasdiqlanganligi ham shu tranzaksiyaning o'zida tekshiriladi
+	confirmed, duplicate = await confirm_report_by_id(report['id'], helper_id)
+	if duplicate:
+		try:
+			# Hisobot kutilmoqda holatida qoladi: helper uni rad etishi mumkin
+			await bot.edit_message_caption(
+				chat_id=chat_id,
+				message_id=message_id,
+				caption=render_report_caption(
+					report, report['sender_full_name'] or 'Noma\'lum',
+					f"Holati: ⚠️ Takroriy shartnoma — #{duplicate[0]} hisobotida "
+					f"({html.escape(duplicate[1] or 'Noma\'lum')}, {duplicate[3]}) allaqachon tasdiqlangan"
+				),
+				reply_markup=get_group_report_keyboard(report['id'])
+			)
+		except Exception as e:
+			logging.error(f"Takroriy shartnoma haqida xabar berishda xatolik: {e}")
+		return
+	if not confirmed:
+		logging.info(f"Hisobot {report['id']} allaqachon ko'rib chiqilgan, tasdiqlash o'tkazib yuborildi")
+		return
 	
-	updated_caption = "\n".join(filtered_lines)
+	# Google Sheets'ga saqlash
+	await save_report_to_google_sheets(report, chat_id)
 	
 	try:
 		# Guruh xabarini yangilash
 		await bot.edit_message_caption(
-			chat_id=msg.chat.id,
-			message_id=msg.message_id,
-			caption=updated_caption,
+			chat_id=chat_id,
+			message_id=message_id,
+			caption=render_report_caption(report, report['sender_full_name'] or 'Noma\'lum', REPORT_STATUS_CONFIRMED),
 			reply_markup=get_report_confirmed_keyboard()
 		)
-		
-		# Ma'lumotlar bazasida holatni yangilash
-		await update_report_status_in_db(msg.message_id, "confirmed", user_id)
-		
-		# Google Sheets'ga saqlash
-		await save_report_to_google_sheets(msg)
-		
-		await callback_query.answer("✅ Hisobot muvaffaqiyatli tasdiqlandi va Google Sheets'ga saqlandi!",
-		                            show_alert=True)
-	
+		logging.info(f"Hisobot {report['id']} tasdiqlandi: helper {helper_id}")
 	except Exception as e:
 		logging.error(f"Hisobotni tasdiqlashda xatolik: {e}")
-		await callback_query.answer("❌ Xatolik: Hisobotni tasdiqlashda muammo yuz berdi.", show_alert=True)
 
-async def save_report_to_google_sheets(msg):
-	"""Hisobotni Google Sheets'ga saqlash"""
-	try:
-		group_sheet_info = await get_group_google_sheet(msg.chat.id)
-		if not group_sheet_info:
-			logging.info("Bu guruh uchun Google Sheet tayinlanmagan.")
-			return
-		
-		sheet_id, sheet_name, spreadsheet_id, worksheet_name = group_sheet_info
-		
-		# Hisobot ma'lumotlarini ajratib olish
-		report_data = {}
-		for line in msg.caption.splitlines():
-			if "Mijoz:" in line:
-				report_data['client_name'] = line.split(":", 1)[1].strip()
-			elif "Telefon:" in line and "Qo'shimcha" not in line:
-				report_data['phone_number'] = line.split(":", 1)[1].strip()
-			elif "Mahsulot:" in line:
-				report_data['product_type'] = line.split(":", 1)[1].strip()
-			elif "Manzil:" in line:
-				report_data['client_location'] = line.split(":", 1)[1].strip()
-			elif "Shartnoma ID:" in line:
-				report_data['contract_id'] = line.split(":", 1)[1].strip()
-			elif "Shartnoma summasi:" in line:
-				amount_text = line.split(":", 1)[1].strip()
-				# "so'm" so'zini olib tashlash
-				amount_text = amount_text.replace(" so'm", "").strip()
-				report_data['contract_amount'] = amount_text
-			elif "Sotuvchi:" in line:
-				report_data['sender_full_name'] = line.split(":", 1)[1].strip()
-		
-		report_data['status'] = 'Tasdiqlandi'
-		
-		# Google Sheets'ga saqlash
-		success = save_report_to_sheets(spreadsheet_id, worksheet_name, report_data)
-		if success:
-			logging.info(f"Hisobot muvaffaqiyatli Google Sheets'ga saqlandi: {sheet_name}")
-		else:
-			logging.error(f"Google Sheets'ga saqlashda xatolik: {sheet_name}")
-	
-	except Exception as e:
-		logging.error(f"Google Sheets'ga saqlashda xatolik: {e}")
-
-@otchot_router.callback_query(F.data == "reject_report_action")
+@otchot_router.callback_query(F.data.startswith("reject_report_action"))
 async def reject_report_handler(callback_query: CallbackQuery, bot: Bot):
 	"""Guruhda hisobotni rad etish"""
 	user_id = callback_query.from_user.id
@@ -1012,41 +1040,42 @@ async def reject_report_handler(callback_query: CallbackQuery, bot: Bot):
 		await callback_query.answer("🚫 Sizda bu amalni bajarish uchun ruxsat yo'q.", show_alert=True)
 		return
 	
-	if not msg or not msg.caption:
-		await callback_query.answer("❌ Xatolik: Asl xabarni topib bo'lmadi.", show_alert=True)
+	report = await get_group_report(callback_query, "reject_report_action")
+	if not msg or not report:
+		await callback_query.answer("❌ Xatolik: Hisobot topilmadi.", show_alert=True)
+		return
+	
+	if report['status'] != 'pending':
+		await callback_query.answer("ℹ️ Bu hisobot allaqachon ko'rib chiqilgan.", show_alert=True)
 		return
 	
-	# Sotuvchi ma'lumotlarini topish
-	sender_name = None
-	for line in msg.caption.splitlines():
-		if "Sotuvchi:" in line:
-			sender_name = line.split(":", 1)[1].strip()
-			break
+	await run_ack_first(
+		callback_query, ("report", report['id']),
+		lambda: complete_report_rejection(bot, report, msg.chat.id, msg.message_id, user_id),
+		ack_text="❌ Hisobot rad etilmoqda..."
+	)
+
+async def complete_report_rejection(bot: Bot, report: Dict[str, Any], chat_id: int, message_id: int,
+                                    helper_id: int):
+	if not await update_report_status_by_id(report['id'], "rejected", helper_id, expected_status="pending"):
+		logging.info(f"Hisobot {report['id']} allaqachon ko'rib chiqilgan, rad etish o'tkazib yuborildi")
+		return
 	
 	try:
-		# Guruh xabarini o'chirish
-		await bot.delete_message(chat_id=msg.chat.id, message_id=msg.message_id)
-		
-		# Ma'lumotlar bazasida holatni yangilash
-		await update_report_status_in_db(msg.message_id, "rejected", user_id)
+		# Guruh xabarini albomdagi rasmlar bilan birga o'chirish
+		await bot.delete_messages(chat_id=chat_id, message_ids=[message_id] + report['group_album_message_ids'])
 		
 		# Sotuvchiga xabar yuborish
-		if sender_name:
-			sender_telegram_id = await find_user_by_name(sender_name)
-			if sender_telegram_id:
-				await bot.send_message(
-					chat_id=sender_telegram_id,
-					text=f"❌ Sizning hisobotingiz rad etildi.\n\n"
-					     f"📞 Rad etilish sababi haqida ma'lumot olish uchun quyidagi tugmani bosing:",
-					reply_markup=get_rejection_reason_keyboard(user_id)
-				)
-		
-		await callback_query.answer("❌ Hisobot rad etildi va o'chirildi!", show_alert=True)
-		logging.info(f"Hisobot rad etildi: helper {user_id}")
+		await bot.send_message(
+			chat_id=report['user_telegram_id'],
+			text=f"❌ Sizning hisobotingiz rad etildi.\n\n"
+			     f"📞 Rad etilish sababi haqida ma'lumot olish uchun quyidagi tugmani bosing:",
+			reply_markup=get_rejection_reason_keyboard(helper_id)
+		)
+		logging.info(f"Hisobot {report['id']} rad etildi: helper {helper_id}")
 	
 	except Exception as e:
 		logging.error(f"Hisobotni rad etishda xatolik: {e}")
-		await callback_query.answer("❌ Xatolik yuz berdi!", show_alert=True)
 
 @otchot_router.callback_query(F.data.startswith("contact_helper_"))
 async def contact_helper(callback_query: CallbackQuery, bot: Bot):
@@ -1073,19 +1102,24 @@ async def view_seller_info(callback_query: CallbackQuery, bot: Bot):
 		await callback_query.answer("❌ Xatolik: Ma'lumot topilmadi.", show_alert=True)
 		return
 	
-	# Sotuvchi ismini ajratib olish
-	seller_name = None
-	for line in msg.caption.splitlines():
-		if "Sotuvchi:" in line:
-			seller_name = line.split(":", 1)[1].strip()
-			break
-	
-	if not seller_name:
-		await callback_query.answer("❌ Sotuvchi ma'lumoti topilmadi.", show_alert=True)
-		return
-	
-	# Sotuvchi telegram ID'sini topish
-	seller_telegram_id = await find_user_by_name(seller_name)
+	# Sotuvchi hisobot yozuvidan aniqlanadi; yozuv topilmasa caption'dagi ism bo'yicha
+	report = await get_group_report(callback_query, "view_seller_info")
+	if report:
+		seller_name = report['sender_full_name'] or "Noma'lum"
+		seller_telegram_id = report['user_telegram_id']
+	else:
+		seller_name = None
+		for line in msg.caption.splitlines():
+			if "Sotuvchi:" in line:
+				seller_name = line.split(":", 1)[1].strip()
+				break
+		
+		if not seller_name:
+			await callback_query.answer("❌ Sotuvchi ma'lumoti topilmadi.", show_alert=True)
+			return
+		
+		# Sotuvchi telegram ID'sini topish
+		seller_telegram_id = await find_user_by_name(seller_name)
 	
 	if not seller_telegram_id:
 		await callback_query.answer(f"👨‍💼 Sotuvchi: {seller_name}\n❌ Profil ma'lumotlari topilmadi.", show_alert=True)
@@ -1135,23 +1169,3 @@ async def back_to_group_report(callback_query: CallbackQuery, bot: Bot):
 async def confirmed_noop_handler(callback_query: CallbackQuery):
 	"""Tasdiqlangan hisobot tugmasini bosish"""
 	await callback_query.answer("ℹ️ Bu hisobot allaqachon tasdiqlangan.")
-
-# LOGGING SOZLAMALARI
-logging.basicConfig(
-	level=logging.INFO,
-	format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-	handlers=[
-		logging.StreamHandler(),
-		logging.FileHandler('otchot.log', encoding='utf-8')
-	]
-)
-
-# MODUL MA'LUMOTLARI
-logging.info("📝 Otchot router muvaffaqiyatli yuklandi")
-logging.info(
-	"🔄 Hisobot jarayoni: Mijoz → Telefon → Qo'shimcha telefon → Mahsulot → Manzil → Shartnoma ID → Summa → Rasm → Tasdiqlash")
-logging.info("💰 Summa formatlash: 500000 → 500.000")
-logging.info("📱 Qo'shimcha telefon: Guruhga yuboriladi, Google Sheets'ga saqlanmaydi")
-logging.info("👨‍💼 Sotuvchi profili: To'liq batafsil ma'lumotlar")
-logging.info("🔗 Sotuvchi bilan bog'lanish: Helper kabi ishlaydi")
-logging.info("🔧 Optimallashtirilgan va to'liq tangilangan versiya")
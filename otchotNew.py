@@ -17,6 +17,7 @@ from keyboards import (
 	get_report_confirmed_keyboard,
 	get_yes_no_additional_phone_inline_keyboard,
 )
+from message_scheduler import schedule_message_deletion
 
 otchot_router = Router()
 
@@ -54,21 +55,8 @@ async def delete_previous_messages(bot: Bot, chat_id: int, state: FSMContext):
 	bot_prompt_id = data.get("last_bot_prompt_id")
 	user_reply_id = data.get("last_user_reply_id")
 	
-	try:
-		if bot_prompt_id:
-			await bot.delete_message(chat_id, bot_prompt_id)
-	except TelegramBadRequest:
-		logging.warning(f"Could not delete bot prompt message {bot_prompt_id} in chat {chat_id}")
-	except Exception as e:
-		logging.error(f"Error deleting bot_prompt_id {bot_prompt_id}: {e}")
-	
-	try:
-		if user_reply_id:
-			await bot.delete_message(chat_id, user_reply_id)
-	except TelegramBadRequest:
-		logging.warning(f"Could not delete user reply message {user_reply_id} in chat {chat_id}")
-	except Exception as e:
-		logging.error(f"Error deleting user_reply_id {user_reply_id}: {e}")
+	# One bulk delete, sent off the handler's critical path
+	schedule_message_deletion(bot, chat_id, [bot_prompt_id, user_reply_id])
 	
 	await state.update_data(last_bot_prompt_id=None, last_user_reply_id=None)
 
@@ -0,0 +1,245 @@
+import asyncio
+import bisect
+import contextvars
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMediaGroup, TelegramMethod
+from aiogram.types import TelegramObject
+
+from config import WORKER_COUNT
+from metrics import metrics
+
+# Telegram cheklovlari (core.telegram.org/bots/faq): umumiy ~30 xabar/s, bitta guruhga ~20 xabar/daqiqa,
+# bitta shaxsiy chatga ~1 xabar/s.
+# Umumiy cheklov worker'lar o'rtasida statik, teng bo'lingan: har biri 30 / WORKER_COUNT xabar/s.
+# SharedState bot_data.db orqali soniyada bir marta so'raladi — har yuborishda umumiy bucket'dan token
+# olish har xabarga bazaga yozuv va kechikish qo'shardi. Natijada bo'sh worker'ning ulushi ishlatilmaydi
+# va bitta band guruhni olgan worker 30/N xabar/s bilan cheklanadi (guruh va shaxsiy chat cheklovlari
+# bunga ta'sir qilmaydi: chat doim bitta worker'da). Aniq umumiy cheklov kerak bo'lsa, Redis kabi
+# umumiy backend'dagi token bucket shu yerga ulanadi
+GLOBAL_RATE = 30 / max(WORKER_COUNT, 1)
+GROUP_RATE, GROUP_BURST = 20 / 60, 10
+PRIVATE_RATE, PRIVATE_BURST = 1.0, 3
+# retry_after kelganda so'rov shuncha marta qayta yuboriladi, keyin xatolik handler'ga qaytadi
+MAX_RETRIES = 3
+# Chat bucket'lari shundan ko'payganda to'lib turganlari (ya'ni bo'sh turganlari) tozalanadi
+MAX_CHAT_BUCKETS = 10000
+# Cheklanadigan metodlar: chatga xabar yuboradigan yoki o'zgartiradiganlar (answerCallbackQuery kabilar emas)
+LIMITED_METHOD_PREFIXES = ("Send", "Edit", "Copy", "Forward")
+
+class Priority(IntEnum):
+	USER_REPLY = 0
+	GROUP_REPORT = 1
+	NOTIFICATION = 2
+
+# Joriy update kelgan chat: shu chatga yuborilgan xabar foydalanuvchiga javob hisoblanadi
+_update_chat_id: contextvars.ContextVar = contextvars.ContextVar("update_chat_id", default=None)
+_priority_override: contextvars.ContextVar = contextvars.ContextVar("send_priority", default=None)
+
+metrics.describe("bot_send_queue_depth", "gauge", "Telegram cheklovi tufayli navbatda turgan so'rovlar")
+metrics.describe("bot_send_throttled_total", "counter", "Navbatda kutgan yoki retry_after olgan so'rovlar")
+
+def is_group_chat(chat_id) -> bool:
+	# Guruh va kanallar manfiy ID yoki @username bilan keladi
+	return not isinstance(chat_id, int) or chat_id < 0
+
+@contextmanager
+def send_priority(priority: Priority):
+	"""Blok ichidagi barcha yuborishlar uchun ustuvorlikni aniq belgilash (masalan, ommaviy xabarlar)"""
+	token = _priority_override.set(priority)
+	try:
+		yield
+	finally:
+		_priority_override.reset(token)
+
+def classify(chat_id) -> Priority:
+	override = _priority_override.get()
+	if override is not None:
+		return override
+	if is_group_chat(chat_id):
+		return Priority.GROUP_REPORT
+	if chat_id == _update_chat_id.get():
+		return Priority.USER_REPLY
+	return Priority.NOTIFICATION
+
+class TokenBucket:
+	__slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+	
+	def __init__(self, rate: float, capacity: float):
+		self.rate = rate
+		self.capacity = capacity
+		self.tokens = capacity
+		self.updated = time.monotonic()
+		self.paused_until = 0.0
+	
+	def wait_time(self, now: float, amount: int) -> float:
+		if now < self.paused_until:
+			return self.paused_until - now
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+		# Sig'imdan katta so'rov (10 rasmli albom) to'la bucket'da o'tadi va qarzga kiradi
+		needed = min(amount, self.capacity)
+		return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+	
+	def take(self, amount: int):
+		self.tokens -= amount
+	
+	def pause(self, now: float, seconds: float):
+		self.paused_until = max(self.paused_until, now + seconds)
+		self.tokens = 0
+	
+	@property
+	def is_idle(self) -> bool:
+		return self.tokens >= self.capacity and self.paused_until < time.monotonic()
+
+class SendLimiter:
+	"""
+	Umumiy va har bir chat uchun token bucket'lar. Token bo'lmasa so'rov navbatga tushadi; navbat ustuvorlik
+	bo'yicha ko'rib chiqiladi, lekin o'z chati cheklangan so'rov boshqa chatlarni to'sib qo'ymaydi.
+	"""
+	
+	def __init__(self, global_rate: float = GLOBAL_RATE):
+		self.global_bucket = TokenBucket(global_rate, max(global_rate, 1))
+		self.chat_buckets: Dict[Any, TokenBucket] = {}
+		# (priority, seq, chat_id, amount, future) — tartiblangan ro'yxat
+		self._waiters: list = []
+		self._seq = itertools.count()
+		self._wakeup: asyncio.Event | None = None
+		self._pump_task: asyncio.Task | None = None
+		self.throttled = {priority: 0 for priority in Priority}
+		self.retry_after_count = 0
+	
+	def _chat_bucket(self, chat_id) -> TokenBucket:
+		bucket = self.chat_buckets.get(chat_id)
+		if bucket is None:
+			if len(self.chat_buckets) >= MAX_CHAT_BUCKETS:
+				self.chat_buckets = {key: value for key, value in self.chat_buckets.items() if not value.is_idle}
+			bucket = self.chat_buckets[chat_id] = (
+				TokenBucket(GROUP_RATE, GROUP_BURST) if is_group_chat(chat_id) else TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+			)
+		return bucket
+	
+	def _wait_time(self, chat_id, amount: int, now: float) -> float:
+		return max(self.global_bucket.wait_time(now, amount), self._chat_bucket(chat_id).wait_time(now, amount))
+	
+	def _take(self, chat_id, amount: int):
+		self.global_bucket.take(amount)
+		self._chat_bucket(chat_id).take(amount)
+	
+	async def acquire(self, chat_id, amount: int, priority: Priority):
+		# Navbat bo'sh bo'lsagina darhol o'tadi, aks holda oldinroq/ustuvorroq so'rovlardan o'zib ketmasin
+		if not self._waiters and self._wait_time(chat_id, amount, time.monotonic()) == 0:
+			self._take(chat_id, amount)
+			return
+		
+		future = asyncio.get_running_loop().create_future()
+		waiter = (priority, next(self._seq), chat_id, amount, future)
+		bisect.insort(self._waiters, waiter, key=lambda item: item[:2])
+		self.throttled[priority] += 1
+		metrics.inc("bot_send_throttled_total", priority=priority.name.lower(), reason="bucket")
+		metrics.add_gauge("bot_send_queue_depth", 1, priority=priority.name.lower())
+		self._notify()
+		try:
+			await future
+		except asyncio.CancelledError:
+			if waiter in self._waiters:
+				self._waiters.remove(waiter)
+			raise
+		finally:
+			metrics.add_gauge("bot_send_queue_depth", -1, priority=priority.name.lower())
+	
+	def _notify(self):
+		if self._wakeup is None:
+			self._wakeup = asyncio.Event()
+		self._wakeup.set()
+		if self._pump_task is None or self._pump_task.done():
+			self._pump_task = asyncio.create_task(self._pump())
+	
+	async def _pump(self):
+		while self._waiters:
+			self._wakeup.clear()
+			now = time.monotonic()
+			next_wait = None
+			for index, (priority, _, chat_id, amount, future) in enumerate(self._waiters):
+				if future.done():
+					# Kutayotgan vazifa bekor qilingan, acquire() o'zi olib tashlaydi
+					continue
+				wait = self._wait_time(chat_id, amount, now)
+				if wait == 0:
+					self._take(chat_id, amount)
+					del self._waiters[index]
+					future.set_result(None)
+					break
+				next_wait = wait if next_wait is None else min(next_wait, wait)
+			else:
+				# Hech kim o'ta olmaydi: eng yaqin token yoki yangi so'rov kelguncha kutiladi
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), timeout=next_wait)
+				except asyncio.TimeoutError:
+					pass
+				continue
+			await asyncio.sleep(0)
+	
+	def pause(self, chat_id, seconds: float, priority: Priority):
+		"""Telegram retry_after qaytarganda shu chatga yuborish to'xtatiladi"""
+		self._chat_bucket(chat_id).pause(time.monotonic(), seconds)
+		self.retry_after_count += 1
+		metrics.inc("bot_send_throttled_total", priority=priority.name.lower(), reason="retry_after")
+	
+	def stats(self) -> dict:
+		depths = {priority: 0 for priority in Priority}
+		for priority, *_ in self._waiters:
+			depths[priority] += 1
+		return {
+			"queue_depth": depths,
+			"throttled": dict(self.throttled),
+			"retry_after": self.retry_after_count,
+			"chats": len(self.chat_buckets),
+		}
+
+send_limiter = SendLimiter()
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+	"""Bot sessiyasi middleware'i: chatga yuboriladigan har bir so'rov limiter'dan o'tadi"""
+	
+	def __init__(self, limiter: SendLimiter = send_limiter):
+		self.limiter = limiter
+	
+	async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod):
+		chat_id = getattr(method, "chat_id", None)
+		if chat_id is None or not type(method).__name__.startswith(LIMITED_METHOD_PREFIXES):
+			return await make_request(bot, method)
+		
+		amount = len(method.media) if isinstance(method, SendMediaGroup) else 1
+		priority = classify(chat_id)
+		for attempt in range(MAX_RETRIES + 1):
+			await self.limiter.acquire(chat_id, amount, priority)
+			try:
+				return await make_request(bot, method)
+			except TelegramRetryAfter as e:
+				if attempt == MAX_RETRIES:
+					raise
+				logging.warning(
+					f"⏳ Telegram cheklovi: {type(method).__name__} chat {chat_id}, {e.retry_after} s dan keyin qayta yuboriladi"
+				)
+				self.limiter.pause(chat_id, e.retry_after, priority)
+
+class UpdateChatMiddleware(BaseMiddleware):
+	"""Update kelgan chatni eslab qoladi: shu chatga yuborilgan xabarlar eng yuqori ustuvorlikni oladi"""
+	
+	async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+	                   event: TelegramObject, data: Dict[str, Any]) -> Any:
+		event_chat = data.get("event_chat")
+		token = _update_chat_id.set(event_chat.id if event_chat else None)
+		try:
+			return await handler(event, data)
+		finally:
+			_update_chat_id.reset(token)
@@ -0,0 +1,168 @@
+import re
+from functools import lru_cache
+
+UNKNOWN_REGION = "Boshqa"
+
+# Hudud -> unga tegishli shahar/tuman nomlari (kichik harflarda, lotin yozuvida).
+# Ko'p ma'noli so'zlar ("uzun", "kitob", "shirin" ...) faqat "tumani" bilan birga olinadi.
+GAZETTEER = {
+	"Toshkent shahri": [
+		"toshkent shahri", "toshkent shahar", "toshkent sh", "tashkent city",
+		"bektemir", "chilonzor", "mirobod", "mirzo ulug'bek", "olmazor", "sergeli", "shayxontohur",
+		"uchtepa", "yakkasaroy", "yashnobod", "yunusobod", "yangihayot",
+	],
+	"Toshkent viloyati": [
+		"toshkent viloyati", "toshkent viloyat", "toshkent vil", "toshkent tumani", "tashkent region",
+		"chirchiq", "angren", "olmaliq", "bekobod", "ohangaron", "yangiyo'l", "nurafshon", "g'azalkent",
+		"parkent", "piskent", "bo'stonliq", "zangiota", "qibray", "o'rta chirchiq", "yuqori chirchiq",
+		"quyi chirchiq", "oqqo'rg'on", "bo'ka", "chinoz", "keles",
+	],
+	"Andijon viloyati": [
+		"andijon", "andijan", "asaka", "xonobod", "shahrixon", "marhamat", "paxtaobod", "qo'rg'ontepa",
+		"oltinko'l", "baliqchi", "bo'z tumani", "buloqboshi", "izboskan", "jalaquduq", "xo'jaobod",
+		"ulug'nor",
+	],
+	"Farg'ona viloyati": [
+		"farg'ona", "fergana", "qo'qon", "kokand", "marg'ilon", "quvasoy", "quva", "rishton", "oltiariq",
+		"beshariq", "bog'dod", "buvayda", "dang'ara", "furqat tumani", "qo'shtepa", "toshloq",
+		"uchko'prik", "yozyovon", "so'x",
+	],
+	"Namangan viloyati": [
+		"namangan", "chust", "kosonsoy", "pop tumani", "chortoq", "uchqo'rg'on", "to'raqo'rg'on",
+		"yangiqo'rg'on", "uychi", "mingbuloq", "norin tumani", "davlatobod",
+	],
+	"Samarqand viloyati": [
+		"samarqand", "samarkand", "kattaqo'rg'on", "urgut", "bulung'ur", "jomboy", "ishtixon",
+		"pastdarg'om", "payariq", "oqdaryo", "narpay", "nurobod", "paxtachi", "qo'shrabot", "tayloq",
+		"toyloq",
+	],
+	"Buxoro viloyati": [
+		"buxoro", "bukhara", "kogon", "g'ijduvon", "vobkent", "shofirkon", "qorako'l", "olot", "jondor",
+		"romitan", "peshku", "qorovulbozor", "g'alaosiyo",
+	],
+	"Navoiy viloyati": [
+		"navoiy", "navoi", "zarafshon", "uchquduq", "karmana", "nurota", "xatirchi", "qiziltepa",
+		"konimex", "tomdi",
+	],
+	"Qashqadaryo viloyati": [
+		"qashqadaryo", "qarshi", "karshi", "shahrisabz", "kitob tumani", "kitob shahri", "g'uzor", "koson",
+		"muborak", "yakkabog'", "chiroqchi", "dehqonobod", "kasbi", "mirishkor", "nishon tumani",
+		"qamashi", "ko'kdala",
+	],
+	"Surxondaryo viloyati": [
+		"surxondaryo", "termiz", "termez", "denov", "sherobod", "sho'rchi", "qumqo'rg'on", "jarqo'rg'on",
+		"boysun", "sariosiyo", "uzun tumani", "angor", "bandixon", "muzrabot", "oltinsoy", "qiziriq",
+	],
+	"Jizzax viloyati": [
+		"jizzax", "jizzakh", "zomin", "g'allaorol", "do'stlik tumani", "paxtakor tumani", "forish",
+		"baxmal", "zarbdor", "arnasoy", "mirzacho'l", "sharof rashidov",
+	],
+	"Sirdaryo viloyati": [
+		"sirdaryo", "guliston", "gulistan", "yangiyer", "shirin shahri", "boyovut", "oqoltin", "sardoba",
+		"xovos", "mirzaobod", "sayxunobod",
+	],
+	"Xorazm viloyati": [
+		"xorazm", "urganch", "urgench", "xiva", "khiva", "xonqa", "hazorasp", "gurlan", "shovot", "bog'ot",
+		"qo'shko'pir", "yangiariq", "yangibozor", "tuproqqal'a",
+	],
+	"Qoraqalpog'iston Respublikasi": [
+		"qoraqalpog'iston", "karakalpakstan", "nukus", "xo'jayli", "to'rtko'l", "beruniy", "chimboy",
+		"qo'ng'irot", "mo'ynoq", "ellikqal'a", "taxiatosh", "amudaryo tumani", "kegeyli", "shumanay",
+		"qonliko'l", "taxtako'pir",
+	],
+}
+
+# Faqat "Toshkent" deb yozilganda shahar deb olinadi, lekin aniqroq nom (tuman, shahar) ustun turadi
+AMBIGUOUS_ALIASES = {
+	"toshkent": "Toshkent shahri",
+	"tashkent": "Toshkent shahri",
+}
+
+CYRILLIC_TO_LATIN = {
+	'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'ғ': "g'", 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j',
+	'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'қ': 'q', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+	'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ў': "o'", 'ф': 'f', 'х': 'x', 'ҳ': 'h',
+	'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': "'", 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu',
+	'я': 'ya',
+}
+
+APOSTROPHES = "ʻʼ’‘`´"
+
+def normalize_text(text: str) -> str:
+	"""Kichik harf, lotin yozuvi, yagona apostrof va so'zlar orasida bitta bo'shliq"""
+	text = text.lower()
+	for apostrophe in APOSTROPHES:
+		text = text.replace(apostrophe, "'")
+	text = ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in text)
+	text = re.sub(r"[^a-z0-9']+", ' ', text)
+	return f" {text.strip()} "
+
+class RegionMatcher:
+	"""
+	Gazetteer bo'yicha Aho-Corasick avtomati: manzil bir marta o'qilib, barcha nomlar topiladi.
+	Eng uzun (ya'ni eng aniq) nom g'olib, tenglikda — matnda avvalroq kelgani.
+	"""
+
+	def __init__(self, gazetteer: dict, ambiguous: dict = None):
+		self.goto = [{}]
+		self.fail = [0]
+		self.outputs = [[]]
+
+		for region, aliases in gazetteer.items():
+			for alias in aliases:
+				self._add(normalize_text(alias), region, len(alias))
+		for alias, region in (ambiguous or {}).items():
+			self._add(normalize_text(alias), region, 0)
+
+		self._build_fail_links()
+
+	def _add(self, pattern: str, region: str, score: int):
+		node = 0
+		for char in pattern:
+			if char not in self.goto[node]:
+				self.goto.append({})
+				self.fail.append(0)
+				self.outputs.append([])
+				self.goto[node][char] = len(self.goto) - 1
+			node = self.goto[node][char]
+		self.outputs[node].append((score, len(pattern), region))
+
+	def _build_fail_links(self):
+		queue = list(self.goto[0].values())
+		for node in queue:
+			for char, child in self.goto[node].items():
+				queue.append(child)
+				fallback = self.fail[node]
+				while fallback and char not in self.goto[fallback]:
+					fallback = self.fail[fallback]
+				target = self.goto[fallback].get(char, 0)
+				self.fail[child] = target if target != child else 0
+				self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+	def find(self, text: str) -> list:
+		"""(boshlanish pozitsiyasi, ball, hudud) ro'yxati"""
+		matches = []
+		node = 0
+		for position, char in enumerate(text):
+			while node and char not in self.goto[node]:
+				node = self.fail[node]
+			node = self.goto[node].get(char, 0)
+			for score, length, region in self.outputs[node]:
+				matches.append((position - length + 1, score, region))
+		return matches
+
+	def match(self, address: str) -> str | None:
+		matches = self.find(normalize_text(address))
+		if not matches:
+			return None
+		start, score, region = min(matches, key=lambda item: (-item[1], item[0]))
+		return region
+
+_matcher = RegionMatcher(GAZETTEER, AMBIGUOUS_ALIASES)
+
+@lru_cache(maxsize=4096)
+def normalize_region(address: str) -> str:
+	"""Erkin yozilgan manzildan hudud nomini aniqlaydi (masalan, "Toshkent viloyati")"""
+	if not address:
+		return UNKNOWN_REGION
+	return _matcher.match(address) or UNKNOWN_REGION
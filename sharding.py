@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import multiprocessing
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+# Worker to'xtatilganda navbatdagi update'larni tugatishi uchun beriladigan vaqt
+WORKER_STOP_TIMEOUT = 30
+WORKER_SUPERVISE_INTERVAL = 5
+
+def shard_for(shard_key: int, worker_count: int) -> int:
+	# Manfiy guruh ID'lari uchun ham Python % natijasi 0..worker_count-1
+	return shard_key % worker_count
+
+class ShardForwardMiddleware(BaseMiddleware):
+	"""
+	Asosiy jarayonning tashqi update middleware'i: update handler'larga berilmaydi, chat_id bo'yicha
+	worker navbatiga qo'yiladi. Bitta chat update'lari har doim bitta worker'ga, kelish tartibida tushadi
+	va worker ularni shu tartibda, birma-bir qayta ishlaydi (consume_updates).
+	"""
+	
+	def __init__(self, queues: list):
+		self.queues = queues
+	
+	async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+	                   event: Update, data: Dict[str, Any]) -> Any:
+		chat = data.get("event_chat")
+		user = data.get("event_from_user")
+		shard_key = chat.id if chat else (user.id if user else 0)
+		self.queues[shard_for(shard_key, len(self.queues))].put(
+			(shard_key, event.model_dump(mode="json", exclude_none=True, by_alias=True))
+		)
+		return None
+
+async def _feed_update(dp: Dispatcher, bot: Bot, update_data: dict):
+	try:
+		await dp.feed_raw_update(bot, update_data)
+	except Exception as e:
+		logging.error(f"Update {update_data.get('update_id')} ni qayta ishlashda xatolik: {e}")
+
+def _media_group_id(update_data: dict) -> str | None:
+	return (update_data.get("message") or {}).get("media_group_id")
+
+async def _serve_chat(dp: Dispatcher, bot: Bot, shard_key: int, chat_queue: asyncio.Queue, chats: dict):
+	"""
+	Bitta chat update'lari birma-bir: keyingisi oldingi handler tugagach boshlanadi, FSM holati o'qish
+	va yozishlari aralashmaydi. Istisno — albom: collect_media_group birinchi qism handler'ida qolgan
+	qismlarni kutadi, shuning uchun o'sha albomning keyingi qismlari kutmasdan beriladi.
+	Navbat bo'shagach vazifa tugaydi.
+	"""
+	pending = None
+	while True:
+		if pending is None:
+			if chat_queue.empty():
+				chats.pop(shard_key, None)
+				return
+			pending = chat_queue.get_nowait()
+		update_data, pending = pending, None
+		
+		media_group_id = _media_group_id(update_data)
+		if not media_group_id:
+			await _feed_update(dp, bot, update_data)
+			continue
+		
+		first_part = asyncio.create_task(_feed_update(dp, bot, update_data))
+		parts = [first_part]
+		while not first_part.done():
+			next_update = asyncio.create_task(chat_queue.get())
+			await asyncio.wait({first_part, next_update}, return_when=asyncio.FIRST_COMPLETED)
+			if not next_update.done():
+				next_update.cancel()
+				break
+			
+			update_data = next_update.result()
+			if _media_group_id(update_data) != media_group_id:
+				# Albomdan keyingi update albom to'liq qayta ishlangach boshlanadi
+				pending = update_data
+				break
+			parts.append(asyncio.create_task(_feed_update(dp, bot, update_data)))
+		await asyncio.gather(*parts)
+
+async def consume_updates(dp: Dispatcher, bot: Bot, update_queue) -> int:
+	"""
+	Worker jarayonida: navbatdagi update'lar chat bo'yicha ketma-ket, turli chatlar esa parallel
+	qayta ishlanadi. None — to'xtash belgisi; to'xtashdan oldin kelgan update'lar tugashi kutiladi.
+	"""
+	loop = asyncio.get_running_loop()
+	# shard kaliti (chat_id) -> shu chatning hali qayta ishlanmagan update'lari
+	chats: dict = {}
+	tasks = set()
+	handled = 0
+	while True:
+		item = await loop.run_in_executor(None, update_queue.get)
+		if item is None:
+			break
+		
+		shard_key, update_data = item
+		chat_queue = chats.get(shard_key)
+		if chat_queue is None:
+			chat_queue = chats[shard_key] = asyncio.Queue()
+			task = asyncio.create_task(_serve_chat(dp, bot, shard_key, chat_queue, chats))
+			tasks.add(task)
+			task.add_done_callback(tasks.discard)
+		chat_queue.put_nowait(update_data)
+		handled += 1
+	
+	if tasks:
+		await asyncio.gather(*tasks)
+	return handled
+
+def start_worker_processes(target: Callable, worker_count: int) -> tuple:
+	"""target(worker_index, update_queue) alohida jarayonlarda ishga tushiriladi"""
+	context = multiprocessing.get_context("spawn")
+	queues = [context.Queue() for _ in range(worker_count)]
+	processes = [_start_worker(context, target, index, queues[index]) for index in range(worker_count)]
+	return processes, queues
+
+def _start_worker(context, target: Callable, index: int, update_queue):
+	process = context.Process(target=target, args=(index, update_queue), name=f"bot-worker-{index}")
+	process.start()
+	logging.info(f"👷 Worker {index} ishga tushdi (pid {process.pid})")
+	return process
+
+async def supervise_workers(processes: list, queues: list, target: Callable):
+	"""Kutilmaganda to'xtagan worker o'sha navbat bilan qayta ishga tushiriladi — chat taqsimoti o'zgarmaydi"""
+	context = multiprocessing.get_context("spawn")
+	while True:
+		await asyncio.sleep(WORKER_SUPERVISE_INTERVAL)
+		for index, process in enumerate(processes):
+			if not process.is_alive():
+				logging.error(f"👷 Worker {index} to'xtab qoldi (exit code {process.exitcode}), qayta ishga tushirilmoqda")
+				processes[index] = _start_worker(context, target, index, queues[index])
+
+def stop_worker_processes(processes: list, queues: list, timeout: float = WORKER_STOP_TIMEOUT):
+	"""Har bir worker'ga to'xtash belgisi yuboriladi; navbat tugagach o'zi chiqadi"""
+	for update_queue in queues:
+		update_queue.put(None)
+	for index, process in enumerate(processes):
+		process.join(timeout)
+		if process.is_alive():
+			logging.warning(f"👷 Worker {index} {timeout} soniyada to'xtamadi, majburan to'xtatilmoqda")
+			process.terminate()
+			process.join()
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable
+
+from cache import seller_profile_cache, user_status_cache, leaderboard_cache
+from config import SHARED_EVENT_POLL_INTERVAL
+from database import (
+	publish_shared_event, get_shared_events, get_last_shared_event_id, delete_shared_events_before,
+	get_shared_value, get_shared_values, set_shared_value, delete_shared_value
+)
+
+# Bekor qilish jurnali shuncha vaqt saqlanadi (qayta ishga tushgan worker oxirgi ID'dan davom etadi)
+EVENT_RETENTION_SECONDS = 3600
+CLEANUP_EVERY_POLLS = 600
+
+class SharedState:
+	"""
+	Worker jarayonlari o'rtasidagi umumiy holat: JSON kalit-qiymatlar (TTL bilan) va kesh
+	o'zgarishlari jurnali. Bitta mashinada bot_data.db (WAL) orqali ishlaydi; boshqa backend
+	(masalan, Redis) shu metodlarni takrorlashi kifoya.
+	"""
+	
+	def __init__(self, poll_interval: float = SHARED_EVENT_POLL_INTERVAL):
+		self.poll_interval = poll_interval
+		self._handlers: dict = {}
+		self._last_event_id = 0
+		self._task = None
+	
+	async def get(self, key: str, default: Any = None) -> Any:
+		value = await get_shared_value(key)
+		return json.loads(value) if value is not None else default
+	
+	async def get_prefix(self, prefix: str) -> dict:
+		return {key: json.loads(value) for key, value in (await get_shared_values(prefix)).items()}
+	
+	async def set(self, key: str, value: Any, ttl: float = None) -> bool:
+		expires_at = time.time() + ttl if ttl else None
+		return await set_shared_value(key, json.dumps(value, ensure_ascii=False), expires_at)
+	
+	async def delete(self, key: str) -> bool:
+		return await delete_shared_value(key)
+	
+	def publish(self, channel: str, key=None):
+		publish_shared_event(channel, key)
+	
+	def subscribe(self, channel: str, handler: Callable[[str | None], None]):
+		"""handler boshqa (va shu) jarayon e'lon qilgan har bir hodisa kaliti bilan chaqiriladi"""
+		self._handlers.setdefault(channel, []).append(handler)
+	
+	async def start(self):
+		if self._task is not None:
+			return
+		# Ishga tushishdan oldingi hodisalar kerak emas: keshlar bo'sh, filtr bazadan yuklanadi
+		self._last_event_id = await get_last_shared_event_id()
+		self._task = asyncio.create_task(self._poll_loop())
+	
+	async def stop(self):
+		if self._task:
+			self._task.cancel()
+			self._task = None
+	
+	async def poll(self):
+		for event_id, channel, event_key in await get_shared_events(self._last_event_id):
+			self._last_event_id = event_id
+			for handler in self._handlers.get(channel, ()):
+				try:
+					handler(event_key)
+				except Exception as e:
+					logging.error(f"Umumiy hodisani qayta ishlashda xatolik ({channel}): {e}")
+	
+	async def _poll_loop(self):
+		polls = 0
+		while True:
+			await asyncio.sleep(self.poll_interval)
+			try:
+				await self.poll()
+				polls += 1
+				if polls % CLEANUP_EVERY_POLLS == 0:
+					await delete_shared_events_before(time.time() - EVENT_RETENTION_SECONDS)
+			except Exception as e:
+				logging.error(f"Umumiy holatni yangilashda xatolik: {e}")
+
+shared_state = SharedState()
+
+def _invalidate_seller_profile(event_key: str | None):
+	if event_key is None:
+		seller_profile_cache.clear()
+	else:
+		seller_profile_cache.invalidate(int(event_key))
+
+def _invalidate_user_status(event_key: str | None):
+	seller_profile_cache.invalidate(int(event_key))
+	user_status_cache.invalidate(int(event_key))
+
+def _invalidate_leaderboard(event_key: str | None):
+	leaderboard_cache.clear()
+
+shared_state.subscribe("seller_profile", _invalidate_seller_profile)
+shared_state.subscribe("user_status", _invalidate_user_status)
+shared_state.subscribe("leaderboard", _invalidate_leaderboard)
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from datetime import date
+
+from config import SHEET_ROTATION_PERIOD, SHEET_ROTATION_MAX_ROWS
+from database import get_active_sheet_tab, activate_sheet_tab, add_sheet_tab_rows, set_sheet_tab_rows, get_sheet_tabs
+from sheets import count_worksheet_rows
+
+# Qator soni shu jarayonda varaqning o'zidan olingan tab'lar (eski yoki qo'lda to'ldirilgan varaqlar ham hisobga kirsin)
+_seeded_tabs: set = set()
+
+def rotation_enabled() -> bool:
+	return bool(SHEET_ROTATION_PERIOD) or SHEET_ROTATION_MAX_ROWS > 0
+
+def current_period_key(today: date = None) -> str | None:
+	today = today or date.today()
+	if SHEET_ROTATION_PERIOD == "month":
+		return today.strftime('%Y-%m')
+	return None
+
+def rotated_worksheet_name(base_name: str, period_key: str = None, part: int = 1) -> str:
+	"""
+	Aylantirilgan varaq nomi: "Malumotlar 2026-10", keyingi bo'laklari "Malumotlar 2026-10 (2)"
+	"""
+	name = f"{base_name} {period_key}" if period_key else base_name
+	if part > 1:
+		name = f"{name} ({part})"
+	return name
+
+async def _sheet_row_count(spreadsheet_id: str | None, worksheet_name: str) -> int | None:
+	if not spreadsheet_id or SHEET_ROTATION_MAX_ROWS <= 0:
+		return None
+	return await asyncio.to_thread(count_worksheet_rows, spreadsheet_id, worksheet_name)
+
+async def resolve_target_worksheet(google_sheet_id: int, base_worksheet_name: str, spreadsheet_id: str = None) -> tuple:
+	"""
+	Yangi qatorlar yoziladigan varaq nomini va uning google_sheet_tabs id'sini qaytaradi.
+	Davr tugagan yoki qator chegarasiga yetilgan bo'lsa, yangi varaq faollashtiriladi.
+	spreadsheet_id berilsa, tab birinchi marta ishlatilganda qator soni varaqdagi mavjud qatorlardan olinadi.
+	"""
+	if not rotation_enabled():
+		return base_worksheet_name, None
+
+	period_key = current_period_key()
+	active_tab = await get_active_sheet_tab(google_sheet_id)
+
+	if active_tab:
+		tab_id, worksheet_name, active_period_key, row_count = active_tab
+		if tab_id not in _seeded_tabs:
+			sheet_rows = await _sheet_row_count(spreadsheet_id, worksheet_name)
+			if sheet_rows is not None:
+				_seeded_tabs.add(tab_id)
+				if sheet_rows != row_count:
+					await set_sheet_tab_rows(tab_id, sheet_rows)
+					row_count = sheet_rows
+
+		period_ended = SHEET_ROTATION_PERIOD and active_period_key != period_key
+		rows_exceeded = SHEET_ROTATION_MAX_ROWS > 0 and row_count >= SHEET_ROTATION_MAX_ROWS
+
+		if not period_ended and not rows_exceeded:
+			return worksheet_name, tab_id
+
+		if period_ended:
+			new_name = rotated_worksheet_name(base_worksheet_name, period_key)
+		else:
+			tabs = await get_sheet_tabs(google_sheet_id)
+			part = sum(1 for tab in tabs if tab[2] == period_key) + 1
+			new_name = rotated_worksheet_name(base_worksheet_name, period_key, part)
+	else:
+		new_name = rotated_worksheet_name(base_worksheet_name, period_key)
+
+	sheet_rows = await _sheet_row_count(spreadsheet_id, new_name)
+	tab_id = await activate_sheet_tab(google_sheet_id, new_name, period_key, sheet_rows or 0)
+	if tab_id is None:
+		return base_worksheet_name, None
+	if sheet_rows is not None:
+		_seeded_tabs.add(tab_id)
+
+	logging.info(f"📑 Google Sheet {google_sheet_id} uchun yangi faol varaq: '{new_name}' ({sheet_rows or 0} ta qator)")
+	if SHEET_ROTATION_MAX_ROWS > 0 and (sheet_rows or 0) >= SHEET_ROTATION_MAX_ROWS:
+		# Varaq allaqachon to'la — navbatdagi bo'lakka o'tiladi
+		return await resolve_target_worksheet(google_sheet_id, base_worksheet_name, spreadsheet_id)
+	return new_name, tab_id
+
+async def record_rows_written(tab_id: int | None, count: int):
+	if tab_id and count:
+		await add_sheet_tab_rows(tab_id, count)
+
+async def get_statistics_worksheets(google_sheet_id: int, base_worksheet_name: str) -> list:
+	"""Statistika uchun asosiy varaq va barcha aylantirilgan varaqlar nomlari"""
+	names = [base_worksheet_name]
+	for tab in await get_sheet_tabs(google_sheet_id):
+		if tab[1] not in names:
+			names.append(tab[1])
+	return names
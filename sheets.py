@@ -0,0 +1,39 @@
+import importlib
+import logging
+import threading
+import time
+
+# google_sheets_integration gspread va google-auth'ni tortadi (~0.3 s); bot ishga tushishini sekinlashtirmasligi
+# uchun modul birinchi Sheets chaqiruvida yuklanadi. Boshqa modullar Sheets funksiyalarini shu yerdan oladi.
+_module = None
+_lock = threading.Lock()
+
+def _integration():
+	global _module
+	if _module is None:
+		with _lock:
+			if _module is None:
+				started = time.perf_counter()
+				module = importlib.import_module("google_sheets_integration")
+				logging.info(f"📊 Google Sheets moduli yuklandi ({(time.perf_counter() - started) * 1000:.0f} ms)")
+				_module = module
+	return _module
+
+def is_loaded() -> bool:
+	return _module is not None
+
+def _lazy(name: str):
+	def call(*args, **kwargs):
+		return getattr(_integration(), name)(*args, **kwargs)
+	
+	call.__name__ = call.__qualname__ = name
+	return call
+
+get_worksheet = _lazy("get_worksheet")
+get_next_row_number = _lazy("get_next_row_number")
+count_worksheet_rows = _lazy("count_worksheet_rows")
+build_report_row = _lazy("build_report_row")
+append_report_rows = _lazy("append_report_rows")
+save_report_to_sheets = _lazy("save_report_to_sheets")
+test_google_sheets_connection = _lazy("test_google_sheets_connection")
+get_reports_statistics = _lazy("get_reports_statistics")
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from config import SHEETS_RESYNC_INTERVAL
+from database import get_group_google_sheet, get_report_by_id, get_unsynced_report_ids, mark_report_sheet_synced
+from sheets import save_report_to_sheets
+from sheet_rotation import resolve_target_worksheet, record_rows_written
+
+# Shu jarayonda hozir yozilayotgan hisobotlar — qayta yuborish ularni ikkinchi marta yozmasin
+_syncing: set = set()
+_resync_task: asyncio.Task | None = None
+_stop_event: asyncio.Event | None = None
+_started_at: datetime | None = None
+
+async def save_report_to_google_sheets(report: Dict[str, Any], chat_id: int) -> bool:
+	"""Bazadagi hisobotni Google Sheets'ga saqlash; muvaffaqiyatli bo'lsa hisobot yozilgan deb belgilanadi"""
+	_syncing.add(report['id'])
+	try:
+		group_sheet_info = await get_group_google_sheet(report.get('group_id') or chat_id)
+		if not group_sheet_info:
+			logging.info("Bu guruh uchun Google Sheet tayinlanmagan.")
+			await mark_report_sheet_synced(report['id'])
+			return True
+		
+		sheet_id, sheet_name, spreadsheet_id, worksheet_name = group_sheet_info
+		
+		report_data = dict(report)
+		report_data['status'] = 'Tasdiqlandi'
+		
+		# Aylantirish yoqilgan bo'lsa, joriy faol varaqni aniqlash
+		target_worksheet, tab_id = await resolve_target_worksheet(sheet_id, worksheet_name, spreadsheet_id)
+		
+		# Google Sheets'ga saqlash
+		success = await asyncio.to_thread(save_report_to_sheets, spreadsheet_id, target_worksheet, report_data)
+		if success:
+			await mark_report_sheet_synced(report['id'])
+			await record_rows_written(tab_id, 1)
+			logging.info(f"Hisobot muvaffaqiyatli Google Sheets'ga saqlandi: {sheet_name} / {target_worksheet}")
+		else:
+			logging.error(f"Google Sheets'ga saqlashda xatolik: {sheet_name}")
+		return success
+	
+	except Exception as e:
+		logging.error(f"Google Sheets'ga saqlashda xatolik: {e}")
+		return False
+	finally:
+		_syncing.discard(report['id'])
+
+async def resync_unsynced_reports(confirmed_before: datetime, stop_event: asyncio.Event = None) -> int:
+	"""Tasdiqlangan, lekin Sheets'ga yozilmay qolgan hisobotlarni qayta yuborish; yozilganlar sonini qaytaradi"""
+	synced = 0
+	for report_id in await get_unsynced_report_ids(confirmed_before):
+		if stop_event and stop_event.is_set():
+			break
+		if report_id in _syncing:
+			continue
+		
+		report = await get_report_by_id(report_id)
+		if not report or report['status'] != 'confirmed':
+			continue
+		
+		if await save_report_to_google_sheets(report, report['group_id']):
+			synced += 1
+	
+	if synced:
+		logging.info(f"📤 Sheets'ga yozilmay qolgan {synced} ta hisobot qayta yuborildi")
+	return synced
+
+async def _resync_loop(stop_event: asyncio.Event):
+	# Birinchi o'tishda oldingi ishga tushishdan qolganlari; keyin faqat bir necha daqiqa oldin
+	# tasdiqlanganlari — hozir yozilayotgan hisobotlar bilan to'qnashmaslik uchun
+	confirmed_before = _started_at
+	while not stop_event.is_set():
+		try:
+			await resync_unsynced_reports(confirmed_before, stop_event)
+		except Exception as e:
+			logging.error(f"Sheets'ni qayta yuborishda xatolik: {e}")
+		
+		try:
+			await asyncio.wait_for(stop_event.wait(), timeout=SHEETS_RESYNC_INTERVAL)
+		except asyncio.TimeoutError:
+			pass
+		confirmed_before = datetime.now() - timedelta(seconds=SHEETS_RESYNC_INTERVAL)
+
+def start():
+	global _resync_task, _stop_event, _started_at
+	if _resync_task is None:
+		_started_at = datetime.now()
+		_stop_event = asyncio.Event()
+		_resync_task = asyncio.create_task(_resync_loop(_stop_event))
+
+async def stop():
+	"""
+	Qayta yuborish siklini to'xtatadi. Boshlangan yozuv oxirigacha kutiladi (bekor qilinsa, qator
+	Sheets'ga yozilib, bazada belgilanmay qolishi mumkin); qolganlari keyingi ishga tushishda yuboriladi.
+	"""
+	global _resync_task
+	if _resync_task is None:
+		return
+	
+	_stop_event.set()
+	await _resync_task
+	_resync_task = None
@@ -0,0 +1,64 @@
+"""
+Bot ishga tushish vaqtini o'lchash: bot.py importi alohida jarayonda `python -X importtime` bilan bajariladi.
+
+	python startup_benchmark.py                    # eng sekin modullar va jami vaqt (mediana)
+	python startup_benchmark.py --budget-ms 6000   # jami vaqt byudjetdan oshsa yoki dangasa modul
+	                                               # oldindan yuklansa, 1 kodi bilan chiqadi (deploy tekshiruvi)
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Faqat birinchi foydalanishda yuklanishi kerak bo'lgan modullar (sheets.py orqali)
+LAZY_MODULES = ("google_sheets_integration", "gspread", "google.oauth2")
+
+def measure_import(module: str) -> dict:
+	"""Bitta toza jarayonda importni o'lchaydi: {modul nomi: (o'z vaqti, jami vaqt)} mikrosoniyalarda"""
+	result = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		capture_output=True, text=True
+	)
+	if result.returncode != 0:
+		raise RuntimeError(f"{module} import qilinmadi:\n{result.stderr[-2000:]}")
+	
+	timings = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "self [us]" in line:
+			continue
+		self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+		timings[name.strip()] = (int(self_us), int(cumulative_us))
+	return timings
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description="bot.py import vaqti (python -X importtime)")
+	parser.add_argument("--module", default="bot")
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--top", type=int, default=15)
+	parser.add_argument("--budget-ms", type=float, default=None, help="jami import vaqti uchun yuqori chegara")
+	args = parser.parse_args()
+	
+	runs = [measure_import(args.module) for _ in range(args.runs)]
+	totals_ms = [timings[args.module][1] / 1000 for timings in runs]
+	total_ms = statistics.median(totals_ms)
+	
+	# Eng sekin modullar o'z vaqti bo'yicha (oxirgi o'lchov)
+	slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+	print(f"{"o'z vaqti, ms":>14} {'jami, ms':>10}  modul")
+	for name, (self_us, cumulative_us) in slowest:
+		print(f"{self_us / 1000:>14.1f} {cumulative_us / 1000:>10.1f}  {name}")
+	print(f"\n{args.module}: {total_ms:.0f} ms (mediana, {args.runs} ta o'lchov: "
+	      f"{', '.join(f'{value:.0f}' for value in totals_ms)})")
+	
+	failed = False
+	eager = [name for name in LAZY_MODULES if any(name in timings for timings in runs)]
+	if eager:
+		print(f"❌ Ishga tushishda yuklanmasligi kerak edi: {', '.join(eager)}")
+		failed = True
+	if args.budget_ms is not None and total_ms > args.budget_ms:
+		print(f"❌ Byudjetdan oshdi: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+		failed = True
+	return 1 if failed else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
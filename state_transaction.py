@@ -0,0 +1,51 @@
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+
+_UNSET = object()
+
+class StateTransaction:
+	"""
+	FSM ma'lumotlarini bir marta o'qiydi, barcha o'zgarishlarni xotirada yig'adi va chiqishda
+	holat va ma'lumotlarni bir martadan yozadi. Blok ichida xatolik bo'lsa hech narsa yozilmaydi.
+	
+	async with StateTransaction(state) as tx:
+		tx.update(client_name=name)
+		tx.set_state(ReportState.waiting_for_phone_number)
+	"""
+	
+	def __init__(self, state: FSMContext):
+		self.context = state
+		self.data = {}
+		self._original_data = {}
+		self._new_state = _UNSET
+	
+	async def __aenter__(self) -> 'StateTransaction':
+		self.data = await self.context.get_data()
+		self._original_data = dict(self.data)
+		return self
+	
+	async def __aexit__(self, exc_type, exc, tb):
+		if exc_type is None:
+			await self.commit()
+		return False
+	
+	def update(self, **kwargs):
+		self.data.update(kwargs)
+	
+	def set_state(self, state: State | str | None):
+		self._new_state = state
+	
+	async def commit(self):
+		state_changed = self._new_state is not _UNSET
+		data_changed = self.data != self._original_data
+		storage = self.context.storage
+		
+		if state_changed and data_changed and hasattr(storage, 'set_state_and_data'):
+			await storage.set_state_and_data(self.context.key, self._new_state, self.data)
+		else:
+			if state_changed:
+				await self.context.set_state(self._new_state)
+			if data_changed:
+				await self.context.set_data(self.data)
+		
+		self._original_data = dict(self.data)
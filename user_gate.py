@@ -0,0 +1,75 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+
+from cache import user_status_cache
+from config import ADMIN_ID, HELPER_ID
+from database import get_user_status
+
+BLOCKED_USER_TEXT = (
+	"🚫 Sizning hisobingiz vaqtincha bloklangan.\n"
+	"Qo'shimcha ma'lumot uchun admin bilan bog'laning."
+)
+
+class UserContext:
+	"""Update yuborgan foydalanuvchining holati; handler'larga user_context nomi bilan beriladi"""
+	__slots__ = ('telegram_id', 'full_name', 'is_registered', 'is_blocked', 'assigned_group_id')
+	
+	def __init__(self, telegram_id: int, status: tuple | None):
+		self.telegram_id = telegram_id
+		self.is_registered = status is not None
+		self.full_name, is_blocked, self.assigned_group_id = status or (None, 0, None)
+		self.is_blocked = bool(is_blocked)
+	
+	@property
+	def is_staff(self) -> bool:
+		return self.telegram_id in (ADMIN_ID, HELPER_ID)
+	
+	def display_name(self, user: User = None) -> str:
+		return self.full_name or (user.full_name if user else "Noma'lum")
+
+async def resolve_user_context(telegram_id: int) -> UserContext:
+	"""Keshdan, bo'lmasa bitta so'rov bilan bazadan"""
+	user_context = user_status_cache.get(telegram_id)
+	if user_context is None:
+		user_context = UserContext(telegram_id, await get_user_status(telegram_id))
+		user_status_cache.set(telegram_id, user_context)
+	return user_context
+
+class UserGateMiddleware(BaseMiddleware):
+	"""
+	Dispatcher'ning tashqi update middleware'i: foydalanuvchi holatini har update uchun ko'pi bilan
+	bir marta aniqlaydi va bloklangan foydalanuvchilarni routerlargacha yetkazmaydi.
+	"""
+	
+	async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+	                   event: Update, data: Dict[str, Any]) -> Any:
+		user: User | None = data.get("event_from_user")
+		if user is None:
+			return await handler(event, data)
+		
+		try:
+			user_context = await resolve_user_context(user.id)
+		except Exception as e:
+			# Baza vaqtincha ishlamasa ham update yo'qolmasin; holat keshlanmaydi
+			logging.error(f"Foydalanuvchi holatini aniqlashda xatolik {user.id}: {e}")
+			user_context = UserContext(user.id, None)
+		
+		if user_context.is_blocked and not user_context.is_staff:
+			await self._reject_blocked(event)
+			return None
+		
+		data["user_context"] = user_context
+		return await handler(event, data)
+	
+	@staticmethod
+	async def _reject_blocked(event: Update):
+		try:
+			if event.message and event.message.chat.type == "private":
+				await event.message.answer(BLOCKED_USER_TEXT)
+			elif event.callback_query:
+				await event.callback_query.answer(BLOCKED_USER_TEXT, show_alert=True)
+		except Exception as e:
+			logging.warning(f"Bloklangan foydalanuvchiga javob yuborishda xatolik: {e}")
@@ -0,0 +1,52 @@
+import logging
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT
+from lifecycle import lifecycle
+
+async def healthcheck(request: web.Request) -> web.Response:
+	"""Reverse proxy / load balancer uchun oddiy tekshiruv"""
+	return web.Response(text="ok")
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+	"""
+	Telegram update'larini WEBHOOK_PATH orqali qabul qiladigan aiohttp ilovasi.
+	X-Telegram-Bot-Api-Secret-Token sarlavhasi WEBHOOK_SECRET bilan mos kelmasa so'rov rad etiladi.
+	"""
+	app = web.Application()
+	app.router.add_get("/healthz", healthcheck)
+	SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+	# Dispatcher startup/shutdown hodisalari ilova hayot sikliga ulanadi
+	setup_application(app, dp, bot=bot)
+	return app
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+	"""
+	Webhook rejimida ishlash. TLS reverse proxy (nginx, caddy) tomonida tugaydi,
+	ilova esa WEBAPP_HOST:WEBAPP_PORT da oddiy HTTP tinglaydi.
+	"""
+	if not WEBHOOK_URL or not WEBHOOK_SECRET:
+		raise RuntimeError("Webhook rejimi uchun config.py da WEBHOOK_URL va WEBHOOK_SECRET o'rnatilishi kerak")
+	
+	runner = web.AppRunner(create_webhook_app(bot, dp))
+	await runner.setup()
+	site = web.TCPSite(runner, host=WEBAPP_HOST, port=WEBAPP_PORT)
+	await site.start()
+	
+	webhook_url = WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH
+	# Bir nechta nusxa bir xil URL'ni o'rnatadi; to'xtashda webhook o'chirilmaydi, aks holda qolganlari ham uziladi
+	await bot.set_webhook(
+		url=webhook_url,
+		secret_token=WEBHOOK_SECRET,
+		allowed_updates=dp.resolve_used_update_types()
+	)
+	logging.info(f"🌐 Webhook o'rnatildi: {webhook_url} (tinglanmoqda {WEBAPP_HOST}:{WEBAPP_PORT})")
+	
+	try:
+		await lifecycle.wait_for_stop()
+	finally:
+		# Yangi so'rovlar qabul qilinmaydi; fonda boshlangan update'larni lifecycle kutadi
+		await runner.cleanup()